@@ -0,0 +1,72 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Converts the timestamps of an event batch one object at a time, in bulk,
+and into a NumPy column.
+
+    $ python -m benchmarks.bulk_datetime --events 10000 --distinct 500
+"""
+from __future__ import print_function
+
+import copy
+import time
+import argparse
+
+from syncthing import (keys_to_datetime, keys_to_datetime_many,
+                       datetime64_column)
+
+
+def make_events(count, distinct):
+    return [{'id': i, 'type': 'ItemFinished',
+             'time': '2017-01-12T08:%02d:%02d.%09d+01:00'
+                     % (i % distinct // 60 % 60, i % distinct % 60, i % distinct)}
+            for i in range(count)]
+
+
+def timed(fn, events):
+    events = copy.deepcopy(events)
+    started = time.perf_counter()
+    fn(events)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--distinct', type=int, default=500)
+    args = parser.parse_args()
+    events = make_events(args.events, args.distinct)
+
+    single = timed(lambda objs: [keys_to_datetime(o, 'time') for o in objs],
+                   events)
+    print('keys_to_datetime      %8.2f ms' % (single * 1e3))
+    bulk = timed(lambda objs: keys_to_datetime_many(objs, 'time'), events)
+    print('keys_to_datetime_many %8.2f ms   (%.1fx)'
+          % (bulk * 1e3, single / bulk))
+    try:
+        datetime64_column([])  # leave the numpy import out of the timing
+        column = timed(lambda objs: datetime64_column(o['time'] for o in objs),
+                       events)
+    except ImportError:
+        print('datetime64_column     skipped, numpy is not installed')
+    else:
+        print('datetime64_column     %8.2f ms   (%.1fx)'
+              % (column * 1e3, single / column))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Polls a large, unchanging ``/rest/system/config`` with and without
+conditional revalidation.
+
+    $ python -m benchmarks.config_poll --folders 2000 --polls 50
+"""
+from __future__ import print_function
+
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from syncthing import Syncthing, ResponseCache
+
+
+def make_config(devices, folders):
+    ids = ['DEVICE%04d-AAAAAAA-BBBBBBB-CCCCCCC' % i for i in range(devices)]
+    return {
+        'version': 28,
+        'devices': [{'deviceID': d, 'name': d[:10], 'addresses': ['dynamic']}
+                    for d in ids],
+        'folders': [{'id': 'folder-%05d' % i,
+                     'path': '/data/folder-%05d' % i,
+                     'rescanIntervalS': 3600,
+                     'devices': [{'deviceID': d} for d in ids]}
+                    for i in range(folders)],
+    }
+
+
+def serve(body, etag):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if etag and self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def poll(port, polls, cache):
+    with Syncthing('', port=port, cache=cache) as s:
+        s.system.config()
+        started = time.perf_counter()
+        for _ in range(polls):
+            s.system.config()
+        return (time.perf_counter() - started) / polls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=40)
+    parser.add_argument('--folders', type=int, default=2000)
+    parser.add_argument('--polls', type=int, default=50)
+    args = parser.parse_args()
+
+    body = json.dumps(make_config(args.devices, args.folders)).encode()
+    etag = '"%s"' % hashlib.sha1(body).hexdigest()
+    print('config: %.1f MB' % (len(body) / 1e6))
+
+    for label, server_etag in (('etag', etag), ('no etag', None)):
+        server = serve(body, server_etag)
+        try:
+            plain = poll(server.server_port, args.polls, None)
+            revalidated = poll(server.server_port, args.polls,
+                               ResponseCache(ttls={}))
+        finally:
+            server.shutdown()
+        print('%-8s full decode %8.2f ms/poll   revalidated %8.2f ms/poll'
+              '   (%.1fx)' % (label, plain * 1e3, revalidated * 1e3,
+                              plain / revalidated))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Compares the memory held by decoded JSON dicts and by the typed records
+of :mod:`syncthing.models`.
+
+    $ python -m benchmarks.models_memory --records 10000
+"""
+from __future__ import print_function
+
+import json
+import argparse
+import tracemalloc
+
+from syncthing.models import SystemStatus, FolderStatus
+
+
+def system_status(i):
+    return {'alloc': 12345678 + i, 'connectionServiceStatus': {},
+            'cpuPercent': 0.5, 'discoveryEnabled': True,
+            'discoveryErrors': {}, 'discoveryMethods': 5, 'goroutines': 83,
+            'myID': 'P56IOI7-MZJNU2Y-IQGDREY-DM2MGTI-MGL3BXN-PQ6W5BM-TBBZ4TJ-'
+                    'XZWICQ2', 'pathSeparator': '/',
+            'startTime': '2016-06-06T19:41:43.039284753+02:00',
+            'sys': 42092792, 'tilde': '/home/user', 'uptime': 2635 + i}
+
+
+def folder_status(i):
+    keys = ['globalBytes', 'globalDeleted', 'globalFiles', 'localBytes',
+            'localDeleted', 'localFiles', 'inSyncBytes', 'inSyncFiles',
+            'needBytes', 'needFiles', 'sequence', 'version']
+    doc = {k: i * n for n, k in enumerate(keys)}
+    doc.update(state='idle', invalid='', ignorePatterns=False,
+               stateChanged='2016-06-06T19:41:43.039284753+02:00')
+    return doc
+
+
+def measure(factory, wrap, records):
+    # decode from JSON so the strings are not shared with the templates
+    bodies = [json.dumps(factory(i)) for i in range(records)]
+    tracemalloc.start()
+    held = [wrap(json.loads(b)) for b in bodies]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return size / float(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=10000)
+    args = parser.parse_args()
+
+    for label, factory, model in (('system/status', system_status, SystemStatus),
+                                  ('db/status', folder_status, FolderStatus)):
+        plain = measure(factory, lambda d: d, args.records)
+        typed = measure(factory, model, args.records)
+        print('%-14s dict %6d B/record   %-12s %6d B/record   (%.0f%%)'
+              % (label, plain, model.__name__, typed, 100.0 * typed / plain))
+
+
+if __name__ == '__main__':
+    main()
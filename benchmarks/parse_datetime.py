@@ -0,0 +1,57 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Times :func:`syncthing.parse_datetime` against :func:`dateutil.parser.parse`
+on the timestamps Syncthing emits.
+
+    $ python -m benchmarks.parse_datetime --number 20000
+"""
+from __future__ import print_function
+
+import argparse
+import timeit
+
+from dateutil.parser import parse as dateutil_parser
+
+from syncthing import parse_datetime
+
+SAMPLES = (
+    '2016-06-06T19:41:43.039284753+02:00',
+    '2017-01-12T08:15:02.961746117Z',
+    '1984-12-31T16:00:00-08:00',
+    '0001-01-01T00:00:00Z',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    for sample in SAMPLES:
+        assert parse_datetime(sample) == dateutil_parser(sample)
+        slow = min(timeit.repeat(lambda: dateutil_parser(sample),
+                                 number=args.number, repeat=3))
+        fast = min(timeit.repeat(lambda: parse_datetime(sample),
+                                 number=args.number, repeat=3))
+        print('%-36s dateutil %6.2f us   fast path %6.2f us   (%.0fx)'
+              % (sample, slow / args.number * 1e6, fast / args.number * 1e6,
+                 slow / fast))
+
+
+if __name__ == '__main__':
+    main()
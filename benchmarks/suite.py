@@ -0,0 +1,272 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Runs the client hot-path benchmarks against a local
+:class:`syncthing.testing.FakeSyncthing` and reports them as JSON, optionally
+failing on regressions against a stored baseline.
+
+    $ python -m benchmarks.suite --output baseline.json
+    $ python -m benchmarks.suite --baseline baseline.json --threshold 0.25
+
+Every metric records whether lower (latencies, durations) or higher
+(throughputs) is better; a run regresses when a metric is worse than the
+baseline by more than ``--threshold``, as a fraction of the baseline.
+"""
+from __future__ import print_function
+
+import sys
+import copy
+import json
+import time
+import timeit
+import argparse
+import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from syncthing import (BaseAPI, parse_datetime, keys_to_datetime,
+                       keys_to_datetime_many)
+from syncthing.meta import __version__
+from syncthing.streaming import browse_entries, json_events
+from syncthing.testing import FakeSyncthing
+
+LOWER, HIGHER = 'lower', 'higher'
+
+TIMESTAMPS = (
+    '2016-06-06T19:41:43.039284753+02:00',
+    '2017-01-12T08:15:02.961746117Z',
+    '1984-12-31T16:00:00-08:00',
+)
+
+
+def metric(value, unit, better):
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def bench_requests(scale):
+    """ Per-call latency and throughput of ``BaseAPI.get`` / ``post``. """
+    calls = 2000 * scale
+    results = {}
+    with FakeSyncthing() as fake, fake.client() as s:
+        for method in ('GET', 'POST'):
+            s.system.ping(method)
+            samples = []
+            for _ in range(calls):
+                started = time.perf_counter()
+                s.system.ping(method)
+                samples.append(time.perf_counter() - started)
+            name = method.lower()
+            results[name + '.latency_p50'] = metric(
+                percentile(samples, 0.5) * 1e6, 'us', LOWER)
+            results[name + '.latency_p99'] = metric(
+                percentile(samples, 0.99) * 1e6, 'us', LOWER)
+            results[name + '.throughput'] = metric(
+                len(samples) / sum(samples), 'calls/s', HIGHER)
+
+        workers = 8
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            started = time.perf_counter()
+            list(executor.map(lambda _: s.system.ping(), range(calls)))
+            elapsed = time.perf_counter() - started
+        results['get.throughput_%d_threads' % workers] = metric(
+            calls / elapsed, 'calls/s', HIGHER)
+    return results
+
+
+def bench_decode(scale):
+    """ JSON decode cost of large ``System.config`` and ``Database.browse``
+        payloads. """
+    results = {}
+    with FakeSyncthing(devices=40, folders=500 * scale, files=0,
+                       need=0) as fake, fake.client() as s:
+        resp = s.system.get('config', return_response=True)
+    results.update(_decode_metrics('config', resp, 5))
+
+    with FakeSyncthing(folders=['big'], files=20000 * scale,
+                       need=0) as fake, fake.client() as s:
+        resp = s.db.get('browse', params={'folder': 'big'},
+                        return_response=True)
+    results.update(_decode_metrics('browse', resp, 5))
+
+    body = resp.content
+    chunks = [body[i:i + 65536] for i in range(0, len(body), 65536)]
+    duration = min(timeit.repeat(
+        lambda: sum(1 for _ in browse_entries(json_events(chunks))),
+        number=1, repeat=5))
+    results['decode.browse_streamed'] = metric(duration * 1e3, 'ms', LOWER)
+    return results
+
+
+def _decode_metrics(name, resp, repeat):
+    content_type = resp.headers.get('Content-Type')
+    content = resp.content
+    duration = min(timeit.repeat(
+        lambda: BaseAPI._decode(content_type, content),
+        number=1, repeat=repeat))
+    return {'decode.%s' % name: metric(duration * 1e3, 'ms', LOWER),
+            'decode.%s_throughput' % name: metric(
+                len(content) / duration / 1e6, 'MB/s', HIGHER)}
+
+
+def bench_datetimes(scale):
+    """ ``parse_datetime`` and ``keys_to_datetime`` throughput. """
+    number = 20000 * scale
+    duration = min(timeit.repeat(
+        lambda: [parse_datetime(t) for t in TIMESTAMPS],
+        number=number // len(TIMESTAMPS), repeat=3))
+    results = {'parse_datetime.throughput': metric(
+        number / duration, 'timestamps/s', HIGHER)}
+
+    docs = [{'lastSeen': TIMESTAMPS[i % len(TIMESTAMPS)],
+             'lastScan': TIMESTAMPS[(i + 1) % len(TIMESTAMPS)]}
+            for i in range(number // 2)]
+    for name, convert in (
+            ('keys_to_datetime',
+             lambda objs: [keys_to_datetime(o, 'lastSeen', 'lastScan')
+                           for o in objs]),
+            ('keys_to_datetime_many',
+             lambda objs: keys_to_datetime_many(objs, 'lastSeen',
+                                                'lastScan'))):
+        best = None
+        for _ in range(3):
+            objs = copy.deepcopy(docs)
+            started = time.perf_counter()
+            convert(objs)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[name + '.throughput'] = metric(
+            len(docs) * 2 / best, 'timestamps/s', HIGHER)
+    return results
+
+
+def bench_events(scale):
+    """ Sustained events/s of an :class:`syncthing.Events` stream. """
+    number = 20000 * scale
+    with FakeSyncthing(event_buffer=number) as fake, fake.client() as s:
+        events = s.events(timeout=10.0)
+
+        def produce():
+            for i in range(number):
+                fake.emit('ItemFinished', {'folder': 'default',
+                                           'item': 'file-%d' % i,
+                                           'action': 'update'})
+
+        producer = threading.Thread(target=produce)
+        started = time.perf_counter()
+        producer.start()
+        for _ in events:
+            if events.count >= number:
+                events.stop()
+        elapsed = time.perf_counter() - started
+        producer.join()
+    return {'events.throughput': metric(number / elapsed, 'events/s', HIGHER)}
+
+
+BENCHMARKS = [
+    ('requests', bench_requests),
+    ('decode', bench_decode),
+    ('datetimes', bench_datetimes),
+    ('events', bench_events),
+]
+
+
+def run(only=None, scale=1):
+    """ Runs the benchmarks whose name contains ``only``.
+
+        Returns:
+            dict: ``{'meta': {...}, 'metrics': {name: metric}}``
+    """
+    metrics = {}
+    for name, bench in BENCHMARKS:
+        if only and only not in name:
+            continue
+        print('running %s...' % name, file=sys.stderr)
+        metrics.update(bench(scale))
+    return {'meta': {'version': __version__,
+                     'python': platform.python_version(),
+                     'implementation': platform.python_implementation(),
+                     'platform': platform.platform(),
+                     'scale': scale,
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                           time.gmtime())},
+            'metrics': metrics}
+
+
+def compare(current, baseline, threshold):
+    """ Compares the metrics of two runs.
+
+        Args:
+            current (dict): a result of :func:`run`.
+            baseline (dict): a stored result of :func:`run`.
+            threshold (float): tolerated change, as a fraction of the
+                baseline.
+
+        Returns:
+            List[tuple]: ``(name, baseline, current, change, regressed)``
+            for the metrics of both runs, ``change`` being positive when
+            ``current`` is better.
+    """
+    rows = []
+    for name, now in sorted(current['metrics'].items()):
+        then = baseline['metrics'].get(name)
+        if then is None or not then['value']:
+            continue
+        change = (now['value'] - then['value']) / then['value']
+        if now['better'] == LOWER:
+            change = -change
+        rows.append((name, then['value'], now['value'], change,
+                     change < -threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--baseline', help='results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--only', help='run the benchmarks matching this')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='multiplies the sizes and iterations')
+    args = parser.parse_args()
+
+    results = run(args.only, args.scale)
+    doc = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(doc + '\n')
+    else:
+        print(doc)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    for name, then, now, change, regressed in rows:
+        print('%-36s %12.2f -> %12.2f  %+6.1f%%%s'
+              % (name, then, now, change * 100,
+                 '  REGRESSION' if regressed else ''), file=sys.stderr)
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,6 +16,15 @@ setup(
         'requests>=2.24.0,<=2.28.0'
     ],
     extras_require = {
+        'async': [
+            'aiohttp>=3.7'
+        ],
+        'streaming': [
+            'ijson>=3.0'
+        ],
+        'numpy': [
+            'numpy>=1.11'
+        ],
         'dev': [
             'sphinx',
             'sphinxcontrib-napoleon',
@@ -18,17 +18,35 @@
 from __future__ import unicode_literals
 
 import os
+import re
 import sys
 import json
+import time
 import logging
 import warnings
+import threading
+from datetime import datetime
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from dateutil.parser import parse as dateutil_parser
-from requests.exceptions import Timeout
+from dateutil.tz import tzoffset, tzutc
+from requests.adapters import HTTPAdapter
+from requests.exceptions import (ChunkedEncodingError,
+                                 ConnectionError as HTTPConnectionError,
+                                 ConnectTimeout, HTTPError, Timeout)
 from urllib3.exceptions import TimeoutError
 
+from syncthing.breaker import CircuitBreaker, PROBE, REJECT
+from syncthing.cache import ResponseCache
+from syncthing.cursor import Cursor, MemoryCursorStore, FileCursorStore
+from syncthing.limits import RateLimiter
+from syncthing.metrics import Hooks, MetricsCollector
+from syncthing.retry import RetryPolicy
+from syncthing.singleflight import SingleFlight
+from syncthing.streaming import BrowseEntry, browse_entries, json_events
+
 PY2 = sys.version_info[0] < 3
 
 if PY2:
@@ -46,23 +64,95 @@ logger = logging.getLogger(__name__)
 
 NoneType = type(None)
 DEFAULT_TIMEOUT = 10.0
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+# `at`: time.monotonic() deadline of the requests sent by the current thread,
+# set by SyncthingFleet.call so late calls give up their worker
+_deadline = threading.local()
+
 
-__all__ = ['SyncthingError', 'ErrorEvent', 'BaseAPI', 'System',
-           'Database', 'Statistics', 'Syncthing',
+def _timeout(timeout):
+    """ Shortens a request timeout to what is left of the thread's
+        deadline, if any.
+    """
+    deadline = getattr(_deadline, 'at', None)
+    if deadline is None:
+        return timeout
+    remaining = max(deadline - time.monotonic(), 0.001)
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if t is None else min(t, remaining)
+                     for t in timeout)
+    return min(timeout, remaining)
+
+
+def _before(deadline, delay):
+    """ Drops a retry ``delay`` that would end past ``deadline``. """
+    if delay is None or deadline is None or \
+            time.monotonic() + delay < deadline:
+        return delay
+    return None
+
+
+__all__ = ['SyncthingError', 'ErrorEvent', 'PooledSession', 'ResponseCache',
+           'BaseAPI', 'System', 'Database', 'Statistics', 'Syncthing',
+           'CompletionMatrix', 'BrowseEntry', 'NeedEntry', 'MemoryCursorStore',
+           'FileCursorStore', 'Hooks', 'MetricsCollector', 'RetryPolicy',
+           'CircuitBreaker', 'CircuitOpenError', 'SingleFlight',
+           'RateLimiter', 'RateLimitError',
            # methods
-           'keys_to_datetime', 'parse_datetime']
+           'keys_to_datetime', 'keys_to_datetime_many', 'datetime64_column',
+           'parse_datetime']
 
 ErrorEvent = namedtuple('ErrorEvent', 'when, message')
 """tuple[datetime.datetime,str]: used to process error lists more easily, 
 instead of by two-key dictionaries. """
 
+NeedEntry = namedtuple('NeedEntry', 'category, name, size, file')
+"""tuple[str,str,int,dict]: a file this device needs, ``category`` is the
+download queue it sits in (``progress``, ``queued`` or ``rest``) and
+``file`` the full file info. """
+
+NEED_CATEGORIES = ('progress', 'queued', 'rest')
+
+
+class CompletionMatrix(namedtuple('CompletionMatrix',
+                                  'devices, folders, values, errors, elapsed')):
+    """tuple: sync completion of every device (rows) by folder (columns).
+
+        ``values[i][j]`` is the completion percentage of ``devices[i]`` for
+        ``folders[j]``, or ``None`` when the folder isn't shared with the device
+        or the request failed; failures are kept in ``errors`` keyed by
+        ``(device, folder)``. ``elapsed`` is the total wall time in seconds.
+    """
+
+    __slots__ = ()
+
+    def get(self, device, folder):
+        """ Returns the completion of one cell, ``None`` when missing. """
+        try:
+            row = self.devices.index(device)
+            col = self.folders.index(folder)
+        except ValueError:
+            return None
+        return self.values[row][col]
+
+    def as_dict(self):
+        """ Returns the matrix as ``{device: {folder: completion}}``, without
+            the unshared or failed cells.
+        """
+        return {device: {folder: value
+                         for folder, value in zip(self.folders, row)
+                         if value is not None}
+                for device, row in zip(self.devices, self.values)}
+
 def _syncthing():
-    KEY = os.getenv('SYNCTHING_API_KEY')
-    HOST = os.getenv('SYNCTHING_HOST', '127.0.0.1')
-    PORT = os.getenv('SYNCTHING_PORT', 8384)
-    IS_HTTPS = bool(int(os.getenv('SYNCTHING_HTTPS', '0')))
-    SSL_CERT_FILE = os.getenv('SYNCTHING_CERT_FILE')
-    return Syncthing(KEY, HOST, PORT, 10.0, IS_HTTPS, SSL_CERT_FILE)
+    # a local stand-in answers the doctests when no Syncthing is configured
+    from syncthing.testing import env_client
+    return env_client()
 
 
 def keys_to_datetime(obj, *keys):
@@ -104,20 +194,167 @@ def keys_to_datetime(obj, *keys):
     return obj
 
 
+def keys_to_datetime_many(objs, *keys):
+    """ Converts the keys of many objects to DateTime instances, like
+        :func:`.keys_to_datetime` does for one. Identical timestamps (common
+        in ``lastSeen`` and ``lastScan``) are parsed once and the resulting
+        DateTime instance is shared.
+
+        Args:
+            objs (iterable[dict]): the JSON-like objects to modify inplace, or
+                a ``dict`` of them such as :meth:`.Statistics.device` returns.
+            keys (str): keys of the objects being converted into DateTime
+                instances.
+
+        Returns:
+            ``objs`` inplace.
+
+        >>> stats = {'A': {'lastSeen': '2016-06-06T19:41:43Z'},
+        ...          'B': {'lastSeen': '2016-06-06T19:41:43Z'}}
+        >>> stats = keys_to_datetime_many(stats, 'lastSeen')
+        >>> stats['A']['lastSeen'] is stats['B']['lastSeen']
+        True
+    """
+    if objs is None or not keys:
+        return objs
+    memo = {}
+    for obj in (objs.values() if isinstance(objs, dict) else objs):
+        for k in keys:
+            v = obj.get(k)
+            if not isinstance(v, string_types):
+                continue
+            parsed = memo.get(v)
+            if parsed is None:
+                parsed = memo[v] = parse_datetime(v)
+            obj[k] = parsed
+    return objs
+
+
+def datetime64_column(values):
+    """ Converts a column of timestamps into a NumPy ``datetime64[ns]``
+        array of UTC instants, keeping Syncthing's nanosecond precision.
+        Each distinct string is parsed once.
+
+        Requires the optional ``numpy`` dependency, ``pip install
+        syncthing[numpy]``.
+
+        Note:
+            Zone-less timestamps are taken as UTC. Empty values and instants
+            outside the ``datetime64[ns]`` range (such as Syncthing's
+            ``0001-01-01T00:00:00Z`` meaning "never") become ``NaT``.
+
+        Args:
+            values (iterable[str]): RFC 3339 timestamps.
+
+        Returns:
+            numpy.ndarray
+    """
+    import numpy as np
+
+    index = {}
+    codes = []
+    for v in values:
+        code = index.get(v)
+        if code is None:
+            code = index[v] = len(index)
+        codes.append(code)
+
+    seconds, nanos, offsets = [], [], []
+    for v in index:
+        m = _RFC3339.match(v) if v and isinstance(v, string_types) else None
+        if m is None:
+            if not v:
+                seconds.append('NaT')
+                nanos.append(0)
+                offsets.append(0)
+                continue
+            # not RFC 3339, let the generic parser have a go at it
+            d = parse_datetime(v)
+            offset = d.utcoffset()
+            offset = offset.days * 86400 + offset.seconds if offset else 0
+            m = _RFC3339.match(d.replace(tzinfo=None).isoformat())
+        else:
+            offset = 0
+            if m.group(9):
+                offset = int(m.group(10)) * 3600 + int(m.group(11)) * 60
+                if m.group(9) == '-':
+                    offset = -offset
+        year = int(m.group(1))
+        if not 1678 <= year <= 2261:
+            seconds.append('NaT')
+            nanos.append(0)
+            offsets.append(0)
+            continue
+        seconds.append('%s-%s-%sT%s:%s:%s' % m.groups()[:6])
+        fraction = m.group(7)
+        nanos.append(int(fraction[:9].ljust(9, '0')) if fraction else 0)
+        offsets.append(offset)
+
+    column = np.array(seconds, dtype='datetime64[s]').astype('datetime64[ns]')
+    column += np.array(nanos, dtype='timedelta64[ns]')
+    column -= np.array(offsets, dtype='timedelta64[s]')
+    return column[np.array(codes, dtype=np.intp)]
+
+
+_RFC3339 = re.compile(r'(\d{4})-(\d\d)-(\d\d)[Tt ](\d\d):(\d\d):(\d\d)'
+                      r'(?:\.(\d+))?(?:([Zz])|([-+])(\d\d):(\d\d))?$')
+_TZINFOS = {0: tzutc()}
+
+
+def _parse_rfc3339(s):
+    """ Parses the RFC 3339 timestamps Syncthing emits, fractions beyond
+        microseconds are truncated like :func:`.dateutil_parser` does.
+
+        Returns:
+            :py:class:`~datetime.datetime.DateTime`, or ``None`` when ``s``
+            needs the generic parser.
+    """
+    m = _RFC3339.match(s)
+    if m is None:
+        return None
+    (year, month, day, hour, minute, second, fraction,
+     utc, sign, tz_hours, tz_minutes) = m.groups()
+    tzinfo = None
+    if utc:
+        tzinfo = _TZINFOS[0]
+    elif sign:
+        offset = int(tz_hours) * 3600 + int(tz_minutes) * 60
+        if sign == '-':
+            offset = -offset
+        tzinfo = _TZINFOS.get(offset)
+        if tzinfo is None:
+            tzinfo = _TZINFOS.setdefault(offset, tzoffset(None, offset))
+    try:
+        return datetime(int(year), int(month), int(day), int(hour),
+                        int(minute), int(second),
+                        int(fraction[:6].ljust(6, '0')) if fraction else 0,
+                        tzinfo)
+    except ValueError:
+        return None
+
+
 def parse_datetime(s, **kwargs):
     """ Converts a time-string into a valid
     :py:class:`~datetime.datetime.DateTime` object.
 
+        RFC 3339 timestamps, the only format Syncthing emits, are parsed
+        directly; anything else goes through :func:`.dateutil_parser`.
+
         Args:
             s (str): string to be formatted.
 
-        ``**kwargs`` is passed directly to :func:`.dateutil_parser`.
+        ``**kwargs`` is passed directly to :func:`.dateutil_parser`, and
+        disables the RFC 3339 fast path.
 
         Returns:
             :py:class:`~datetime.datetime.DateTime`
     """
     if not s:
         return None
+    if not kwargs and isinstance(s, string_types):
+        ret = _parse_rfc3339(s)
+        if ret is not None:
+            return ret
     try:
         ret = dateutil_parser(s, **kwargs)
     except (OverflowError, TypeError, ValueError) as e:
@@ -129,13 +366,76 @@ class SyncthingError(Exception):
     """Base Syncthing Exception class all non-assert errors will raise from."""
 
 
+class CircuitOpenError(SyncthingError):
+    """A request refused without being sent, as its node failed too many
+    requests in a row, see :class:`.CircuitBreaker`."""
+
+
+class RateLimitError(SyncthingError):
+    """A request refused without being sent, as it would have waited too
+    long for its turn, see :class:`.RateLimiter`."""
+
+
+class PooledSession(requests.Session):
+    """ A :class:`requests.Session` backed by a keep-alive connection pool.
+
+        A single instance is shared by every sub-API of a :class:`.Syncthing`
+        client so consecutive calls re-use the same TCP (and TLS) connection
+        instead of performing a new handshake per request.
+
+        Args:
+            pool_connections (int): number of per-host connection pools
+                to keep around.
+            pool_maxsize (int): maximum number of connections kept alive
+                for a single host.
+            idle_timeout (float): seconds a pool may sit unused before its
+                connections are dropped and re-established on the next
+                request. ``None`` or ``0`` disables the check.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        super(PooledSession, self).__init__()
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self._last_used = time.monotonic()
+        self._idle_lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        self._touch()
+        try:
+            return super(PooledSession, self).request(*args, **kwargs)
+        finally:
+            self._touch()
+
+    def _touch(self):
+        """ Records pool activity, dropping the pooled connections first if
+            they have been idle for longer than :attr:`.idle_timeout`; the
+            server has most likely closed them on its end by now.
+        """
+        with self._idle_lock:
+            now = time.monotonic()
+            if self.idle_timeout and now - self._last_used > self.idle_timeout:
+                for adapter in self.adapters.values():
+                    adapter.poolmanager.clear()
+            self._last_used = now
+
+
 class BaseAPI(object):
     """ Placeholder for HTTP REST API URL prefix. """
 
     prefix = ''
 
     def __init__(self, api_key, host='localhost', port=8384,
-                 timeout=DEFAULT_TIMEOUT, is_https=False, ssl_cert_file=None):
+                 timeout=DEFAULT_TIMEOUT, is_https=False, ssl_cert_file=None,
+                 session=None, cache=None, hooks=None, retry=None,
+                 breaker=None, single_flight=None, limiter=None):
 
         if ssl_cert_file:
             if not os.path.exists(ssl_cert_file):
@@ -157,23 +457,361 @@ class BaseAPI(object):
             proto='https' if is_https else 'http', host=host, port=port)
         self._base_url = self.url + '{endpoint}'
 
+        # a session handed to us belongs to the caller (e.g. a `Syncthing`
+        # instance sharing it between its sub-APIs), only close our own.
+        self._owns_session = session is None
+        self.session = self._new_session() if session is None else session
+
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = cache
+        self.hooks = hooks
+        self.retry = retry
+        if breaker is True:
+            breaker = CircuitBreaker()
+        self.breaker = breaker
+        if single_flight is True:
+            single_flight = SingleFlight()
+        self.single_flight = single_flight
+        if limiter is True:
+            limiter = RateLimiter()
+        self.limiter = limiter
+
+    def _new_session(self):
+        return PooledSession()
+
+    def close(self):
+        """ Releases the pooled connections, if this instance owns them.
+
+            Returns:
+                None
+        """
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def get(self, endpoint, data=None, headers=None, params=None,
             return_response=False, raw_exceptions=False):
         endpoint = self.prefix + endpoint
-        return self._request('GET', endpoint, data, headers, params,
+        key = self._flight_key(endpoint, data, headers, params,
+                               return_response, raw_exceptions)
+        if key is None:
+            return self._get(endpoint, data, headers, params,
                              return_response, raw_exceptions)
+        return self.single_flight.do(
+            key, lambda: self._get(endpoint, data, headers, params,
+                                   False, raw_exceptions))
 
     def post(self, endpoint, data=None, headers=None, params=None,
              return_response=False, raw_exceptions=False):
         endpoint = self.prefix + endpoint
-        return self._request('POST', endpoint, data, headers, params,
-                             return_response, raw_exceptions)
+        try:
+            return self._request('POST', endpoint, data, headers, params,
+                                 return_response, raw_exceptions)
+        finally:
+            if self.cache is not None:
+                self.cache.mutated(endpoint)
+
+    def _flight_key(self, endpoint, data, headers, params, return_response,
+                    raw_exceptions):
+        """ Key under which identical GETs share a call of
+            :attr:`.single_flight`, ``None`` when the request is not shared:
+            a :class:`requests.Response` is read once, and a body is not
+            expected on a GET.
+        """
+        if self.single_flight is None or return_response or data is not None:
+            return None
+        return ResponseCache.key(endpoint, params, headers) + (raw_exceptions,)
+
+    def _get(self, endpoint, data=None, headers=None, params=None,
+             return_response=False, raw_exceptions=False):
+        """ GETs a full endpoint path, answering from :attr:`.cache` when
+            the endpoint is cacheable and a fresh response is available, or
+            when Syncthing confirms a stale one hasn't changed.
+        """
+        cache = self.cache
+        ttl = revalidate = 0
+        if cache is not None and not return_response:
+            ttl = cache.ttl_for(endpoint)
+            revalidate = cache.revalidates(endpoint)
+        if not ttl and not revalidate:
+            return self._request('GET', endpoint, data, headers, params,
+                                 return_response, raw_exceptions)
+
+        key = cache.key(endpoint, params, headers)
+        hit, value = cache.lookup(key)
+        if hit:
+            return value
+
+        if not revalidate:
+            value = self._request('GET', endpoint, data, headers, params,
+                                  return_response, raw_exceptions)
+            if not isinstance(value, requests.Response):
+                cache.store(key, value, ttl)
+            return value
+
+        stale = cache.stale(key)
+        conditional = dict(headers or {})
+        if stale is not None:
+            conditional.update(cache.conditional_headers(stale[1]))
+
+        resp = self._request('GET', endpoint, data, conditional, params,
+                             True, raw_exceptions)
+        if stale is not None and \
+                resp.status_code == requests.codes.not_modified:
+            cache.refresh(key, ttl)
+            return stale[0]
+
+        validator = cache.validator(resp.headers, resp.content)
+        if stale is not None and validator.digest == stale[1].digest:
+            # unchanged, skip decoding and hand back the previous object
+            cache.refresh(key, ttl, validator)
+            return stale[0]
+
+        value = self._response(resp, raw_exceptions)
+        if not isinstance(value, requests.Response):
+            cache.store(key, value, ttl, validator)
+        return value
 
     def _request(self, method, endpoint, data=None, headers=None, params=None,
                     return_response=False, raw_exceptions=False):
+        method, url, body, headers, params = self._prepare(
+            method, endpoint, data, headers, params)
+
+        retry = self.retry
+        if retry is not None and not retry.applies(method, endpoint):
+            retry = None
+        breaker, limiter = self.breaker, self.limiter
+        attempt, started = 0, time.monotonic()
+        deadline = getattr(_deadline, 'at', None)
+
+        while True:
+            if breaker is not None:
+                self._admit(breaker)
+            permit = None
+            if limiter is not None:
+                permit = self._throttle(limiter, method, endpoint)
+            try:
+                resp = self._send(method, endpoint, url, body, headers,
+                                  params, permit)
+
+            except requests.RequestException as e:
+                if breaker is not None:
+                    breaker.record(transient=self._transient(e))
+                delay = None
+                if retry is not None:
+                    delay = _before(deadline, retry.delay(
+                        attempt, started, transient=self._transient(e)))
+                if delay is None:
+                    if raw_exceptions:
+                        raise e
+                    reraise('http request error', e)
+
+            else:
+                if breaker is not None:
+                    breaker.record(resp.status_code)
+                delay = None
+                if retry is not None:
+                    delay = _before(deadline, retry.delay(
+                        attempt, started, resp.status_code))
+                if delay is None:
+                    if return_response:
+                        return resp
+                    return self._response(resp, raw_exceptions)
+                resp.close()
+
+            logger.warning('%s %s failed, retrying in %.2fs', method,
+                           endpoint, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(self, method, endpoint, url, body, headers, params,
+              permit=None):
+        """ Sends a single request, running the :attr:`.hooks` around it
+            and releasing the :class:`~syncthing.limits.Permit` it was
+            given once answered.
+
+            Returns:
+                :obj:`requests.Response`
+        """
+        hooks = self.hooks
+        if hooks is not None:
+            info = hooks.request_started(method, endpoint, params, body,
+                                         permit.waited if permit else 0.0)
+
+        try:
+            resp = self.session.request(
+                method,
+                url,
+                data=body,
+                params=params,
+                timeout=_timeout(self.timeout),
+                cert=self.ssl_cert_file,
+                headers=headers
+            )
+        except requests.RequestException as e:
+            if hooks is not None:
+                hooks.request_failed(info, e)
+            raise
+        finally:
+            if permit is not None:
+                permit.release()
+
+        if hooks is not None:
+            hooks.request_finished(info, resp, resp.status_code,
+                                   len(resp.content))
+        return resp
+
+    @staticmethod
+    def _transient(e):
+        """ Whether a request failed for a reason worth retrying. """
+        return isinstance(e, (HTTPConnectionError, Timeout,
+                              ChunkedEncodingError))
+
+    def _admit(self, breaker):
+        """ Fails fast while the :attr:`.breaker` is open, pinging the node
+            once its reset timeout has passed.
+
+            Raises:
+                CircuitOpenError
+        """
+        decision = breaker.admit()
+        if decision == PROBE:
+            ok = False
+            try:
+                ok = self._probe()
+            finally:
+                breaker.probed(ok)
+            if not ok:
+                decision = REJECT
+        if decision == REJECT:
+            raise CircuitOpenError(
+                '%s is unreachable, next attempt in %.1fs' %
+                (self.url, breaker.retry_in))
+
+    def _throttle(self, limiter, method, endpoint):
+        """ Waits for the turn of a request under the :attr:`.limiter`.
+
+            Returns:
+                :obj:`~syncthing.limits.Permit`
+
+            Raises:
+                RateLimitError
+        """
+        permit = limiter.acquire(endpoint)
+        if permit is None:
+            raise RateLimitError('%s %s refused by the client-side rate '
+                                 'limit of %s' % (method, endpoint, self.url))
+        return permit
+
+    def _probe(self):
+        """ Sends the request of :meth:`System.ping`, bypassing the
+            :attr:`.breaker`.
+
+            Returns:
+                bool: whether the node answered.
+        """
+        endpoint = System.prefix + 'ping'
+        method, url, body, headers, params = self._prepare('GET', endpoint)
+        try:
+            resp = self._send(method, endpoint, url, body, headers, params)
+        except requests.RequestException:
+            return False
+        return resp.status_code == requests.codes.ok
+
+    def _stream(self, endpoint, params=None, chunk_size=64 * 1024):
+        """ GETs a full endpoint path without buffering the body.
+
+            Returns:
+                generator[bytes]: the response body, chunk by chunk.
+        """
+        method, url, body, headers, params = self._prepare(
+            'GET', endpoint, None, None, params)
+
+        breaker = self.breaker
+        if breaker is not None:
+            self._admit(breaker)
+        permit = None
+        if self.limiter is not None:
+            permit = self._throttle(self.limiter, method, endpoint)
+
+        hooks = self.hooks
+        if hooks is not None:
+            info = hooks.request_started(method, endpoint, params, body,
+                                         permit.waited if permit else 0.0)
+        received = 0
+
+        try:
+            resp = self.session.request(
+                method,
+                url,
+                data=body,
+                params=params,
+                timeout=_timeout(self.timeout),
+                cert=self.ssl_cert_file,
+                headers=headers,
+                stream=True
+            )
+            with resp:
+                resp.raise_for_status()
+                for chunk in resp.iter_content(chunk_size):
+                    received += len(chunk)
+                    yield chunk
+
+        except requests.RequestException as e:
+            if breaker is not None:
+                response = getattr(e, 'response', None)
+                breaker.record(getattr(response, 'status_code', None),
+                               self._transient(e))
+            if hooks is not None:
+                hooks.request_failed(info, e)
+            reraise('http request error', e)
+
+        else:
+            if breaker is not None:
+                breaker.record(resp.status_code)
+            if hooks is not None:
+                hooks.request_finished(info, resp, resp.status_code, received)
+
+        finally:
+            if permit is not None:
+                permit.release()
+
+    def _response(self, resp, raw_exceptions=False):
+        """ Checks the status of a :class:`requests.Response` and returns
+            its decoded body.
+        """
+        try:
+            resp.raise_for_status()
+        except requests.RequestException as e:
+            if raw_exceptions:
+                raise e
+            reraise('http request error', e)
+
+        if resp.status_code != requests.codes.ok:
+            logger.error('%d %s (%s): %s', resp.status_code, resp.reason,
+                            resp.url, resp.text)
+            return resp
+
+        return self._decode(resp.headers.get('Content-Type'),
+                            resp.content)
+
+    def _prepare(self, method, endpoint, data=None, headers=None,
+                 params=None):
+        """ Validates and normalizes the arguments of a request, independent
+            of the HTTP transport that ends up sending it.
+
+            Returns:
+                tuple: ``(method, url, body, headers, params)``
+        """
         method = method.upper()
 
-        endpoint = self._base_url.format(endpoint=endpoint)
+        url = self._base_url.format(endpoint=endpoint)
 
         if method not in ('GET', 'POST', 'PUT', 'DELETE'):
             raise SyncthingError(
@@ -189,50 +827,39 @@ class BaseAPI(object):
 
         headers.update(self._headers)
 
-        try:
-            resp = requests.request(
-                method,
-                endpoint,
-                data=json.dumps(data),
-                params=params,
-                timeout=self.timeout,
-                cert=self.ssl_cert_file,
-                headers=headers
-            )
+        if params:
+            # unset query parameters are omitted entirely
+            params = {k: v for k, v in params.items() if v is not None}
 
-            if not return_response:
-                resp.raise_for_status()
+        return method, url, json.dumps(data), headers, params
 
-        except requests.RequestException as e:
-            if raw_exceptions:
-                raise e
-            reraise('http request error', e)
+    @staticmethod
+    def _decode(content_type, content):
+        """ Turns a successful response body into its Python value, raising
+            :class:`.SyncthingError` when Syncthing reports an API error.
 
-        else:
-            if return_response:
-                return resp
+            Args:
+                content_type (str): the ``Content-Type`` response header.
+                content (bytes): the raw response body.
 
-            if resp.status_code != requests.codes.ok:
-                logger.error('%d %s (%s): %s', resp.status_code, resp.reason,
-                                resp.url, resp.text)
-                return resp
+            Returns:
+                dict, list or str
+        """
+        if 'json' in (content_type or 'text/plain').lower():
+            json_data = json.loads(content)
 
-            if 'json' in resp.headers.get('Content-Type', 'text/plain')\
-                    .lower():
-                json_data = resp.json()
+        else:
+            content = content.decode('utf-8')
+            if content and content[0] == '{' and content[-1] == '}':
+                json_data = json.loads(content)
 
             else:
-                content = resp.content.decode('utf-8')
-                if content and content[0] == '{' and content[-1] == '}':
-                    json_data = json.loads(content)
+                return content
 
-                else:
-                    return content
-
-            if isinstance(json_data, dict) and json_data.get('error'):
-                api_err = json_data.get('error')
-                raise SyncthingError(api_err)
-            return json_data
+        if isinstance(json_data, dict) and json_data.get('error'):
+            api_err = json_data.get('error')
+            raise SyncthingError(api_err)
+        return json_data
 
 
 class System(BaseAPI):
@@ -297,11 +924,15 @@ class System(BaseAPI):
             status = False
         return status
 
-    def connections(self):
+    def connections(self, typed=False):
         """ Returns the list of configured devices and some metadata
             associated with them. The list also contains the local device
             itself as not connected.
 
+            Args:
+                typed (bool): return :class:`~syncthing.models.Connection`
+                    records instead of dicts.
+
             Returns:
                 dict
 
@@ -314,7 +945,11 @@ class System(BaseAPI):
             >>> isinstance(connections['total'], dict)
             True
         """
-        return self.get('connections')
+        resp = self.get('connections')
+        if typed:
+            from syncthing import models
+            return models.connections(resp)
+        return resp
 
     def debug(self):
         """ Returns the set of debug facilities and which of them are
@@ -528,13 +1163,20 @@ class System(BaseAPI):
         """
         self.post('shutdown', data={})
 
-    def status(self):
+    def status(self, typed=False):
         """ Returns information about current system status and resource usage.
 
+            Args:
+                typed (bool): return a :class:`~syncthing.models.SystemStatus`
+                    whose ``start_time`` is parsed on first access.
+
             Returns:
                 dict
         """
         resp = self.get('status')
+        if typed:
+            from syncthing.models import SystemStatus
+            return SystemStatus(resp)
         resp = keys_to_datetime(resp, 'startTime')
         return resp
 
@@ -602,6 +1244,37 @@ class Database(BaseAPI):
                                           'levels': levels,
                                           'prefix': prefix})
 
+    def iter_browse(self, folder, prefix=None, levels=None,
+                    chunk_size=64 * 1024):
+        """ Streams the files of the global model as they are received,
+            parsing the response incrementally instead of building the whole
+            tree returned by :meth:`.browse`. Peak memory use does not grow
+            with the size of the folder.
+
+            Args:
+                folder (str): The root folder to traverse.
+                prefix (str): Defines a prefix within the tree where to start
+                    listing files, it is included in the yielded paths.
+                levels (int): How deep within the tree we want to dwell down.
+                    (0 based, defaults to unlimited depth)
+                chunk_size (int): bytes read from the socket at a time.
+
+            Returns:
+                generator[:obj:`.BrowseEntry`]: ``(path, mtime, size)``
+        """
+        assert isinstance(levels, int) or levels is None
+        assert isinstance(prefix, string_types) or prefix is None
+        chunks = self._stream(self.prefix + 'browse',
+                              params={'folder': folder,
+                                      'levels': levels,
+                                      'prefix': prefix},
+                              chunk_size=chunk_size)
+        try:
+            for entry in browse_entries(json_events(chunks), prefix):
+                yield entry
+        except ValueError as e:
+            reraise('malformed browse response', e)
+
     def completion(self, device, folder):
         """ Returns the completion percentage (0 to 100) for a given device
             and folder.
@@ -618,19 +1291,95 @@ class Database(BaseAPI):
             params={'folder': folder, 'device': device}
         ).get('completion', None)
 
-    def file(self, folder, file_):
+    def completion_matrix(self, devices=None, folders=None, max_workers=None):
+        """ Returns the completion of every device for every folder shared
+            with it, discovered from :meth:`System.config`.
+
+            The individual :meth:`.completion` requests are issued
+            concurrently over the pooled session.
+
+            Args:
+                devices (List[str]): restrict the rows to these device IDs.
+                folders (List[str]): restrict the columns to these folder IDs.
+                max_workers (int): concurrent requests, defaults to the
+                    session's per-host pool size.
+
+            Returns:
+                :obj:`.CompletionMatrix`
+        """
+        started = time.monotonic()
+        config = self._get(System.prefix + 'config')
+        devices, folders, cells = self._completion_cells(config, devices,
+                                                         folders)
+
+        def fetch(cell):
+            row, col = cell
+            try:
+                return self.completion(devices[row], folders[col]), None
+            except SyncthingError as e:
+                return None, e
+
+        values = [[None] * len(folders) for _ in devices]
+        errors = {}
+        if cells:
+            if max_workers is None:
+                max_workers = getattr(self.session, 'pool_maxsize',
+                                      DEFAULT_POOL_MAXSIZE)
+            workers = max(1, min(max_workers, len(cells)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for (row, col), (value, err) in zip(
+                        cells, executor.map(fetch, cells)):
+                    values[row][col] = value
+                    if err is not None:
+                        errors[(devices[row], folders[col])] = err
+
+        return CompletionMatrix(devices, folders, values, errors,
+                                time.monotonic() - started)
+
+    @staticmethod
+    def _completion_cells(config, devices=None, folders=None):
+        """ Resolves the rows, columns and shared cells of a
+            :obj:`.CompletionMatrix` from a configuration document.
+
+            Returns:
+                tuple: ``(devices, folders, [(row, col), ...])``
+        """
+        shared = {}
+        for folder in config.get('folders') or []:
+            shared[folder['id']] = [d['deviceID']
+                                    for d in folder.get('devices') or []]
+
+        if folders is None:
+            folders = sorted(shared)
+        if devices is None:
+            devices = sorted({d for ids in shared.values() for d in ids})
+        devices, folders = list(devices), list(folders)
+
+        cells = [(row, col)
+                 for row, device in enumerate(devices)
+                 for col, folder in enumerate(folders)
+                 if device in shared.get(folder, ())]
+        return devices, folders, cells
+
+    def file(self, folder, file_, typed=False):
         """ Returns most data available about a given file, including version
             and availability.
 
             Args:
                 folder (str):
                 file_ (str):
+                typed (bool): return the ``global`` and ``local`` entries as
+                    :class:`~syncthing.models.FileInfo` records.
 
             Returns:
                 dict
         """
-        return self.get('file', params={'folder': folder,
+        resp = self.get('file', params={'folder': folder,
                                         'file': file_})
+        if typed:
+            from syncthing import models
+            return models.file_info(resp)
+        return resp
 
     def ignores(self, folder):
         """ Returns the content of the ``.stignore`` as the ignore field. A
@@ -687,6 +1436,68 @@ class Database(BaseAPI):
                                  'page': page,
                                  'perpage': perpage})
 
+    def iter_need(self, folder, perpage=100, prefetch=True):
+        """ Lazily walks every page of :meth:`.need`, in download order.
+
+            Only one page is held in memory at a time (two with
+            ``prefetch``, which requests the next page in the background
+            while the current one is being consumed).
+
+            Args:
+                folder (str): Folder ID.
+                perpage (int): files requested per page.
+                prefetch (bool): fetch the next page ahead of time.
+
+            Returns:
+                generator[:obj:`.NeedEntry`]
+        """
+        assert isinstance(perpage, int) and perpage > 0
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            page, pending = 1, None
+            while True:
+                if pending is not None:
+                    resp = pending.result()
+                else:
+                    resp = self.need(folder, page, perpage)
+
+                entries, more = self._need_page(resp, page, perpage)
+                pending = None
+                if more and executor is not None:
+                    pending = executor.submit(self.need, folder, page + 1,
+                                              perpage)
+
+                for entry in entries:
+                    yield entry
+
+                if not more:
+                    break
+                page += 1
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    @staticmethod
+    def _need_page(resp, page, perpage):
+        """ Flattens one page of :meth:`.need` into tagged entries.
+
+            Returns:
+                tuple: ``(List[NeedEntry], bool)``, the entries and whether
+                a next page may exist.
+        """
+        entries = []
+        for category in NEED_CATEGORIES:
+            for f in resp.get(category) or []:
+                entries.append(NeedEntry(category, f.get('name'),
+                                         f.get('size'), f))
+
+        total = resp.get('total')
+        if total is not None:
+            more = page * perpage < total
+        else:
+            more = len(entries) >= perpage
+        return entries, more and bool(entries)
+
     def override(self, folder):
         """ Request override of a send-only folder.
 
@@ -734,7 +1545,7 @@ class Database(BaseAPI):
                                          'sub': sub,
                                          'next': next_})
 
-    def status(self, folder):
+    def status(self, folder, typed=False):
         """ Returns information about the current status of a folder.
 
             Note:
@@ -743,11 +1554,17 @@ class Database(BaseAPI):
 
             Args:
                 folder (str): Folder ID.
+                typed (bool): return a
+                    :class:`~syncthing.models.FolderStatus`.
 
             Returns:
                 dict
         """
-        return self.get('status', params={'folder': folder})
+        resp = self.get('status', params={'folder': folder})
+        if typed:
+            from syncthing.models import FolderStatus
+            return FolderStatus(resp)
+        return resp
 
 
 class Events(BaseAPI):
@@ -765,6 +1582,30 @@ class Events(BaseAPI):
                print(event)
                if event_stream.count > 10:
                    event_stream.stop()
+
+        A ``cursor_store`` (see :mod:`syncthing.cursor`) makes the stream
+        resumable: its position is restored when iteration starts and
+        checkpointed every ``checkpoint_every`` events or
+        ``checkpoint_interval`` seconds, and when the stream stops. A saved
+        position is dropped when Syncthing restarted since, as event ids
+        start over with every Syncthing process.
+
+        .. code-block:: python
+
+           store = FileCursorStore('events.cursor')
+           for event in syncthing.events(cursor_store=store):
+               print(event)
+
+        Long-polls last ``poll_timeout`` seconds, a bit less than the HTTP
+        ``timeout`` by default so Syncthing answers before the connection is
+        given up. With a ``backoff`` (see :class:`syncthing.backoff.Backoff`)
+        connection errors and 5xx responses are retried after a growing,
+        jittered delay instead of ending the stream; Syncthing is then asked
+        whether it restarted in the meantime. An ``adaptive_limit`` of
+        ``(low, high)`` doubles the ``limit`` of the next request when a
+        response comes back full and halves it when one is mostly empty;
+        Syncthing only returns the *latest* ``limit`` events, so a full
+        response may mean events were skipped, see :meth:`.stats`.
     """
 
     prefix = '/rest/'
@@ -777,14 +1618,50 @@ class Events(BaseAPI):
             # swallowed by the library anyway
             kwargs['timeout'] = 60.0  #seconds
 
+        self._cursor_store = kwargs.pop('cursor_store', None)
+        self._checkpoint_every = kwargs.pop('checkpoint_every', 100)
+        self._checkpoint_interval = kwargs.pop('checkpoint_interval', 5.0)
+        self._backoff = kwargs.pop('backoff', None)
+        self._adaptive_limit = kwargs.pop('adaptive_limit', None)
+        poll_timeout = kwargs.pop('poll_timeout', None)
+
         super(Events, self).__init__(api_key, *args, **kwargs)
+        # long-polls time out by design, failures are retried with `backoff`
+        self.retry = self.breaker = None
+        # each stream tracks its own cursor, a shared poll would skip events
+        self.single_flight = None
+        # a long-poll holds no resources on Syncthing while it waits
+        self.limiter = None
+        if poll_timeout is None and self.timeout:
+            poll_timeout = max(1, int(self.timeout * 0.9))
+        self.poll_timeout = poll_timeout
         self._last_seen_id = last_seen_id or 0
         self._filters = filters
         self._limit = limit
+        self._limit_now = limit
 
         self._count = 0
         self.blocking = True
 
+        # the Syncthing process the ids belong to, and the last checkpoint
+        self._start_time = None
+        self._checkpointed = (self._last_seen_id, 0, time.monotonic())
+
+        # set by `set_filters`; after a switch, events up to this global id
+        # were already delivered under the previous filters
+        self._filters_changed = False
+        self._skip_global_id = 0
+        self._last_global_id = 0
+
+        # consecutive failed polls, and whether Syncthing may have restarted
+        self._failures = 0
+        self._recheck = False
+        self._wakeup = threading.Event()
+        self._stats = dict.fromkeys(('requests', 'events', 'timeouts',
+                                     'errors', 'retries', 'missed'), 0)
+        self._stats.update(wait_time=0.0, process_time=0.0)
+        self._polled_at = None
+
     @property
     def count(self):
         """ The number of events that have been processed by this event stream.
@@ -803,6 +1680,32 @@ class Events(BaseAPI):
         """
         return self._last_seen_id
 
+    @property
+    def filters(self):
+        """ The event types the stream subscribes to, all when empty.
+
+            Returns:
+                List[str]
+        """
+        return self._coerce(self._filters, None)[0]
+
+    def set_filters(self, filters):
+        """ Changes the event types of a running stream, from its next
+            long-poll on.
+
+            Syncthing numbers the events of each set of filters separately,
+            so the stream starts over in the new sequence and skips the
+            events it already delivered (by their ``globalID``).
+
+            Args:
+                filters (List[str]): event types, ``None`` for all.
+
+            Returns:
+                None
+        """
+        self._filters = filters
+        self._filters_changed = True
+
     def disk_events(self):
         """ Blocking generator of disk related events. Each event is
         represented as a ``dict`` with metadata.
@@ -821,6 +1724,25 @@ class Events(BaseAPI):
                   None
         """
         self.blocking = False
+        self._wakeup.set()
+
+    def stats(self):
+        """ Returns the long-poll metrics of the stream: requests made,
+            events received, timeouts, errors and retries, events ``missed``
+            between two responses, the current ``limit``, average
+            ``events_per_request``, and the seconds spent waiting on
+            Syncthing (``wait_time``) versus in the consumer between two
+            requests (``process_time``).
+
+            Returns:
+                dict
+        """
+        stats = dict(self._stats)
+        stats['limit'] = self._limit_now
+        stats['events_per_request'] = (
+            float(stats['events']) / stats['requests']
+            if stats['requests'] else 0.0)
+        return stats
 
     def _events(self, using_url, filters=None, limit=None):
         """ A long-polling method that queries Syncthing for events..
@@ -836,11 +1758,80 @@ class Events(BaseAPI):
                 generator[dict]
         """
 
-        # coerce
+        filters, limit = self._coerce(filters, limit)
+        key = self._cursor_key(using_url, filters)
+        limit = self._start_limit(limit)
+
+        # reset the state if the loop was broken with `stop`
+        if not self.blocking:
+            self.blocking = True
+        self._wakeup.clear()
+
+        # the position is restored, or Syncthing's startTime learnt, within
+        # the first poll so a node that is down gets the same retries
+        self._recheck = self._tracks_restarts
+
+        try:
+            # block/long-poll for updates to the events api
+            while self.blocking:
+                if self._filters_changed:
+                    filters, key = self._switch_filters(using_url, key)
+                    if self._cursor_store is not None:
+                        self._resume(key, self._start_time)
+
+                started = self._poll_started()
+                try:
+                    if self._recheck:
+                        self._check_start_time(key,
+                                               self._current_start_time(True))
+                    params = self._poll_params(filters, limit)
+                    data = self.get(using_url, params=params,
+                                    raw_exceptions=True)
+                except Exception as e:
+                    # swallows the timeout errors of long polling, and
+                    # returns the delay before retrying other errors
+                    delay = self._poll_failed(e, started)
+                    if delay is not None:
+                        self._wakeup.wait(delay)
+                        continue
+                    data = None
+                limit = self._poll_done(started, data, limit)
+
+                if not data and self._tracks_restarts:
+                    # a quiet stream may be waiting on ids that a
+                    # restarted Syncthing will not reach for a while
+                    self._recheck = True
+                if data:
+                    if self._tracks_restarts and \
+                            data[0]['id'] <= self._last_seen_id:
+                        self._sync_start_time(self._current_start_time())
+                    for event in data:
+                        # handle potentially multiple events returned in a
+                        # list, moving our event counter forward
+                        if not self._advance(event):
+                            continue
+                        yield event
+                        self._checkpoint(key)
+        finally:
+            self._checkpoint(key, force=True)
+
+    def __iter__(self):
+        """ Helper interface for :obj:`._events` """
+        # filters set before iterating are not a switch
+        self._filters_changed = False
+        for event in self._events('events', self._filters, self._limit):
+            yield event
+
+    @staticmethod
+    def _coerce(filters, limit):
+        """ Normalizes the ``filters`` and ``limit`` arguments of a stream.
+
+            Returns:
+                tuple: ``(List[str], int or None)``
+        """
         if not isinstance(limit, (int, NoneType)):
             limit = None
 
-        # coerce
         if filters is None:
             filters = []
 
@@ -848,40 +1839,225 @@ class Events(BaseAPI):
         if isinstance(filters, string_types):
             filters = filters.split(',')
 
-        # reset the state if the loop was broken with `stop`
-        if not self.blocking:
-            self.blocking = True
+        return filters, limit
 
-        # block/long-poll for updates to the events api
-        while self.blocking:
-            params = {
-                'since': self._last_seen_id,
-                'limit': limit,
-            }
+    @staticmethod
+    def _cursor_key(using_url, filters):
+        """ Identifies a stream in the cursor store, each endpoint and set of
+            filters has its own event ids.
 
-            if filters:
-                params['events'] = ','.join(map(str, filters))
+            Returns:
+                str
+        """
+        if not filters:
+            return using_url
+        return '%s?events=%s' % (using_url, ','.join(sorted(map(str, filters))))
 
-            try:
-                data = self.get(using_url, params=params, raw_exceptions=True)
-            except (Timeout, TimeoutError) as e:
-                # swallow timeout errors for long polling
-                data = None
-            except Exception as e:
-                reraise('', e)
-
-            if data:
-                for event in data:
-                    # handle potentially multiple events returned in a list
-                    self._count += 1
-                    yield event
-                # update our last_seen_id to move our event counter forward
-                self._last_seen_id = data[-1]['id']
+    def _current_start_time(self, raw_exceptions=False):
+        """ Returns the ``startTime`` of the Syncthing process, which
+            identifies the sequence event ids belong to.
 
-    def __iter__(self):
-        """ Helper interface for :obj:`._events` """
-        for event in self._events('events', self._filters, self._limit):
-            yield event
+            Returns:
+                str
+        """
+        return self.get('system/status',
+                        raw_exceptions=raw_exceptions).get('startTime')
+
+    @property
+    def _tracks_restarts(self):
+        return self._cursor_store is not None or self._backoff is not None
+
+    def _start_limit(self, limit):
+        """ Returns the ``limit`` of the first request, clamped to the
+            ``adaptive_limit`` bounds.
+        """
+        if self._adaptive_limit is not None:
+            low, high = self._adaptive_limit
+            limit = min(max(limit or high, low), high)
+        self._limit_now = limit
+        return limit
+
+    def _poll_started(self):
+        now = time.monotonic()
+        if self._polled_at is not None:
+            self._stats['process_time'] += now - self._polled_at
+        return now
+
+    def _poll_done(self, started, data, limit):
+        """ Accounts for a long-poll response, and adapts the ``limit`` of
+            the next one.
+
+            Returns:
+                int: the next ``limit``.
+        """
+        self._polled_at = time.monotonic()
+        stats = self._stats
+        stats['wait_time'] += self._polled_at - started
+        stats['requests'] += 1
+        self._failures = 0
+        if not data:
+            return limit
+
+        stats['events'] += len(data)
+        if self._last_seen_id and not self._filters_changed:
+            # ids of a stream are consecutive, unless events fell out of
+            # Syncthing's buffer or were cut by `limit`
+            stats['missed'] += max(0, data[0]['id'] - self._last_seen_id - 1)
+
+        if self._adaptive_limit is not None and limit:
+            low, high = self._adaptive_limit
+            if len(data) >= limit:
+                limit = min(limit * 2, high)
+            elif len(data) * 4 < limit:
+                limit = max(limit // 2, low)
+            self._limit_now = limit
+        return limit
+
+    def _poll_failed(self, e, started):
+        """ Handles a failed long-poll.
+
+            Returns:
+                float: seconds to wait before retrying, ``None`` for a
+                long-poll that merely timed out.
+
+            Raises:
+                SyncthingError: when the error is not retried.
+        """
+        self._polled_at = time.monotonic()
+        self._stats['wait_time'] += self._polled_at - started
+        if self._is_poll_timeout(e):
+            self._stats['timeouts'] += 1
+            return None
+
+        self._stats['errors'] += 1
+        delay = None
+        if self._backoff is not None and self._retryable(e):
+            delay = self._backoff.delay(self._failures)
+        if delay is None:
+            reraise('', e)
+        self._failures += 1
+        self._stats['retries'] += 1
+        self._recheck = True
+        logger.warning('event long-poll failed (%s), retrying in %.1fs',
+                       e, delay)
+        return delay
+
+    def _is_poll_timeout(self, e):
+        if isinstance(e, ConnectTimeout):
+            # the node is down rather than quiet
+            return self._backoff is None
+        return isinstance(e, (Timeout, TimeoutError))
+
+    @staticmethod
+    def _retryable(e):
+        if isinstance(e, HTTPConnectionError):
+            return True
+        return isinstance(e, HTTPError) and e.response is not None and \
+            e.response.status_code >= 500
+
+    def _switch_filters(self, using_url, key):
+        """ Moves the stream over to the filters given to
+            :meth:`.set_filters`.
+
+            Returns:
+                tuple: the new ``(filters, cursor key)``.
+        """
+        self._checkpoint(key, force=True)
+        self._filters_changed = False
+        filters = self._coerce(self._filters, None)[0]
+        self._last_seen_id = 0
+        self._skip_global_id = self._last_global_id
+        self._checkpointed = (0, self._count, time.monotonic())
+        return filters, self._cursor_key(using_url, filters)
+
+    def _advance(self, event):
+        """ Moves the stream past ``event``.
+
+            Returns:
+                bool: whether ``event`` is to be delivered, ``False`` when it
+                was already delivered before the filters changed.
+        """
+        self._last_seen_id = event['id']
+        global_id = event.get('globalID')
+        if global_id is not None:
+            if global_id <= self._skip_global_id:
+                return False
+            self._skip_global_id = 0
+            self._last_global_id = global_id
+        self._count += 1
+        return True
+
+    def _check_start_time(self, key, start_time):
+        """ Resumes the stream ``key`` from the cursor store the first time,
+            afterwards starts over if Syncthing restarted.
+        """
+        if self._start_time is None and self._cursor_store is not None:
+            self._resume(key, start_time)
+        else:
+            self._sync_start_time(start_time)
+        self._recheck = False
+
+    def _resume(self, key, start_time):
+        """ Restores the position of the stream ``key`` from the cursor
+            store, unless it was saved before Syncthing restarted.
+        """
+        self._start_time = start_time
+        cursor = self._cursor_store.load(key)
+        if cursor is None:
+            pass
+        elif cursor.start_time != start_time:
+            logger.info('syncthing restarted since %s was checkpointed, '
+                        'reading its events from the start', key)
+            self._last_seen_id = 0
+        else:
+            self._last_seen_id = cursor.last_seen_id
+        self._checkpointed = (self._last_seen_id, self._count, time.monotonic())
+
+    def _sync_start_time(self, start_time):
+        """ Starts over from the first event when Syncthing restarted. """
+        if start_time != self._start_time:
+            if self._start_time is not None:
+                logger.info('syncthing restarted, event ids were reset')
+                self._last_seen_id = 0
+                self._skip_global_id = self._last_global_id = 0
+            self._start_time = start_time
+
+    def _checkpoint(self, key, force=False):
+        """ Saves the position of the stream when enough events or time went
+            by since the last checkpoint, and flushes the store when
+            ``force`` is set.
+        """
+        if self._cursor_store is None:
+            return
+        last_id, last_count, last_time = self._checkpointed
+        now = time.monotonic()
+        if self._last_seen_id != last_id and (
+                force or self._count - last_count >= self._checkpoint_every or
+                now - last_time >= self._checkpoint_interval):
+            self._cursor_store.save(key, Cursor(self._last_seen_id,
+                                                self._start_time))
+            self._checkpointed = (self._last_seen_id, self._count, now)
+        if force:
+            # the stream stops or moves on: make its last position durable,
+            # including a batched save made before this one
+            self._cursor_store.flush()
+
+    def _poll_params(self, filters, limit):
+        """ Query parameters for the next long-poll request.
+
+            Returns:
+                dict
+        """
+        params = {
+            'since': self._last_seen_id,
+            'limit': limit,
+            'timeout': self.poll_timeout,
+        }
+
+        if filters:
+            params['events'] = ','.join(map(str, filters))
+
+        return params
 
 
 class Statistics(BaseAPI):
@@ -889,25 +2065,41 @@ class Statistics(BaseAPI):
 
     prefix = '/rest/stats/'
 
-    def device(self):
+    def device(self, typed=False):
         """ Returns general statistics about devices.
 
             Currently, only contains the time the device was last seen.
 
+            Args:
+                typed (bool): map device IDs to
+                    :class:`~syncthing.models.DeviceStats` records.
+
             Returns:
                 dict
         """
-        return self.get('device')
+        resp = self.get('device')
+        if typed:
+            from syncthing.models import DeviceStats
+            return DeviceStats.map(resp)
+        return resp
 
-    def folder(self):
+    def folder(self, typed=False):
         """ Returns general statistics about folders.
 
             Currently contains the last scan time and the last synced file.
 
+            Args:
+                typed (bool): map folder IDs to
+                    :class:`~syncthing.models.FolderStats` records.
+
             Returns:
                 dict
         """
-        return self.get('folder')
+        resp = self.get('folder')
+        if typed:
+            from syncthing.models import FolderStats
+            return FolderStats.map(resp)
+        return resp
 
 
 class Misc(BaseAPI):
@@ -1013,20 +2205,61 @@ class Syncthing(object):
             timeout (float)
             is_https (bool)
             ssl_cert_file (str)
+            pool_connections (int): number of per-host connection pools
+                kept by the shared :class:`.PooledSession`.
+            pool_maxsize (int): maximum keep-alive connections per host.
+            idle_timeout (float): seconds before idle pooled connections
+                are dropped.
+            cache (:class:`.ResponseCache` or bool): opt-in response cache
+                shared by all sub-APIs, ``True`` uses the default TTLs.
+            hooks (:class:`~syncthing.metrics.Hooks`): callbacks around
+                every request, e.g. to collect metrics.
+            retry (:class:`~syncthing.retry.RetryPolicy`): retries of
+                failed requests, only GETs by default; event streams retry
+                with their own ``backoff`` instead.
+            breaker (:class:`~syncthing.breaker.CircuitBreaker` or bool):
+                opt-in circuit breaker failing requests fast with
+                :class:`.CircuitOpenError` while the node is unreachable,
+                ``True`` uses the default thresholds. Event streams are not
+                subject to it.
+            single_flight (:class:`.SingleFlight` or bool): opt-in sharing
+                of one request between threads making the same GET at the
+                same time, ``True`` creates one for this client.
+            limiter (:class:`.RateLimiter` or bool): opt-in rate limits and
+                concurrency caps of the requests to this node, ``True``
+                limits only the expensive endpoints of
+                :data:`~syncthing.limits.DEFAULT_LIMITS`. Event streams are
+                not subject to it.
 
         Attributes:
             system: instance of :class:`.System`.
             database: instance of :class:`.Database`.
             stats: instance of :class:`.Statistics`.
             misc: instance of :class:`.Misc`.
+            session: the :class:`.PooledSession` shared by all of the above
+                and by every stream returned from :meth:`.events`.
+            cache: the shared :class:`.ResponseCache`, or ``None``.
+            hooks: the shared :class:`~syncthing.metrics.Hooks`, or ``None``.
+            retry: the shared :class:`~syncthing.retry.RetryPolicy`, or
+                ``None``.
+            breaker: the shared :class:`~syncthing.breaker.CircuitBreaker`,
+                or ``None``.
+            single_flight: the shared :class:`.SingleFlight`, or ``None``.
+            limiter: the shared :class:`.RateLimiter`, or ``None``.
 
         Note:
             - attribute :attr:`.db` is an alias of :attr:`.database`
             - attribute :attr:`.sys` is an alias of :attr:`.system`
+            - the instance is a context manager, leaving the block calls
+              :meth:`.close`.
     """
 
     def __init__(self, api_key, host='localhost', port=8384,
-                 timeout=DEFAULT_TIMEOUT, is_https=False, ssl_cert_file=None):
+                 timeout=DEFAULT_TIMEOUT, is_https=False, ssl_cert_file=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, cache=None, hooks=None,
+                 retry=None, breaker=None, single_flight=None, limiter=None):
 
         # save this for deferred api sub instances
         self.__api_key = api_key
@@ -1037,13 +2270,30 @@ class Syncthing(object):
         self.timeout = timeout
         self.is_https = is_https
         self.ssl_cert_file = ssl_cert_file
+        self.session = PooledSession(pool_connections=pool_connections,
+                                     pool_maxsize=pool_maxsize,
+                                     idle_timeout=idle_timeout)
+        self.cache = ResponseCache() if cache is True else cache
+        self.hooks = hooks
+        self.retry = retry
+        self.breaker = CircuitBreaker() if breaker is True else breaker
+        self.single_flight = SingleFlight() if single_flight is True \
+            else single_flight
+        self.limiter = RateLimiter() if limiter is True else limiter
 
         self.__kwargs = kwargs = {
             'host': host,
             'port': port,
             'timeout': timeout,
             'is_https': is_https,
-            'ssl_cert_file': ssl_cert_file
+            'ssl_cert_file': ssl_cert_file,
+            'session': self.session,
+            'cache': self.cache,
+            'hooks': self.hooks,
+            'retry': self.retry,
+            'breaker': self.breaker,
+            'single_flight': self.single_flight,
+            'limiter': self.limiter
         }
 
         self.system = self.sys = System(api_key, **kwargs)
@@ -1051,6 +2301,20 @@ class Syncthing(object):
         self.stats = Statistics(api_key, **kwargs)
         self.misc = Misc(api_key, **kwargs)
 
+    def close(self):
+        """ Closes every pooled connection held by this client.
+
+            Returns:
+                None
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def events(self, last_seen_id=None, filters=None, **kwargs):
         kw = dict(self.__kwargs)
         kw.update(kwargs)
@@ -0,0 +1,1000 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Asynchronous (:mod:`asyncio`) counterparts of the Syncthing REST API.
+
+    Requires the optional ``aiohttp`` dependency, ``pip install
+    syncthing[async]``.
+
+    .. code-block:: python
+
+       async with AsyncSyncthing(API_KEY) as s:
+           status, conns = await asyncio.gather(s.system.status(),
+                                                s.system.connections())
+
+           async for event in s.events(limit=10):
+               print(event)
+"""
+
+import ssl
+import time
+import asyncio
+import warnings
+
+from collections import namedtuple
+
+import aiohttp
+
+from syncthing import (
+    DEFAULT_TIMEOUT, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE,
+    DEFAULT_IDLE_TIMEOUT, BaseAPI, System, Database, Events, Statistics, Misc,
+    SyncthingError, CircuitOpenError, CompletionMatrix, ErrorEvent,
+    RateLimiter, RateLimitError, ResponseCache, SingleFlight, string_types,
+    logger, reraise, keys_to_datetime, parse_datetime)
+from syncthing.breaker import CircuitBreaker, PROBE, REJECT
+from syncthing.streaming import JSONTokenizer, BrowseWalker
+from syncthing import models
+
+__all__ = ['AsyncResponse', 'AsyncPooledSession', 'AsyncBaseAPI', 'AsyncSystem',
+           'AsyncDatabase', 'AsyncEvents', 'AsyncStatistics', 'AsyncMisc',
+           'AsyncSyncthing']
+
+# aiohttp>=3.10 tells connection timeouts from read timeouts
+_CONNECT_TIMEOUT = getattr(aiohttp, 'ConnectionTimeoutError', ())
+
+
+class AsyncResponse(namedtuple('AsyncResponse',
+                               'status, reason, url, headers, content')):
+    """ A fully read HTTP response, detached from its pooled connection. """
+
+    __slots__ = ()
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+
+class AsyncPooledSession(object):
+    """ Lazily created :class:`aiohttp.ClientSession` with a keep-alive
+        connection pool, the asynchronous twin of
+        :class:`syncthing.PooledSession`.
+
+        The underlying session is only built on first use because ``aiohttp``
+        binds it to the running event loop.
+
+        Args:
+            pool_connections (int): together with ``pool_maxsize`` bounds the
+                total number of open connections.
+            pool_maxsize (int): maximum connections to a single host.
+            idle_timeout (float): seconds an idle keep-alive connection is
+                held open.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self._session = None
+
+    @property
+    def closed(self):
+        return self._session is None or self._session.closed
+
+    def _client(self):
+        if self.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_connections * self.pool_maxsize,
+                limit_per_host=self.pool_maxsize,
+                keepalive_timeout=self.idle_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def request(self, method, url, timeout=None, raise_for_status=True,
+                      **kwargs):
+        """ Performs a request, reading the whole body before the connection
+            is handed back to the pool.
+
+            Returns:
+                :obj:`.AsyncResponse`
+        """
+        timeout = aiohttp.ClientTimeout(total=timeout)
+        async with self._client().request(method, url, timeout=timeout,
+                                          **kwargs) as resp:
+            content = await resp.read()
+            if raise_for_status:
+                resp.raise_for_status()
+        return AsyncResponse(resp.status, resp.reason, str(resp.url),
+                             resp.headers, content)
+
+    async def stream(self, method, url, timeout=None, chunk_size=64 * 1024,
+                     **kwargs):
+        """ Performs a request, yielding the body as it is received.
+
+            Returns:
+                async_generator[bytes]
+        """
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=timeout)
+        async with self._client().request(method, url, timeout=timeout,
+                                          **kwargs) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                yield chunk
+
+    async def close(self):
+        if not self.closed:
+            await self._session.close()
+        self._session = None
+
+
+class AsyncBaseAPI(BaseAPI):
+    """ :class:`syncthing.BaseAPI` whose requests are coroutines.
+
+        URL building, argument validation, response decoding and error
+        mapping are shared with the blocking implementation.
+    """
+
+    def _new_session(self):
+        return AsyncPooledSession()
+
+    def _ssl(self):
+        if not self.is_https or not self.ssl_cert_file:
+            return True
+        context = getattr(self, '_ssl_context', None)
+        if context is None:
+            context = self._ssl_context = ssl.create_default_context()
+            context.load_cert_chain(self.ssl_cert_file)
+        return context
+
+    async def close(self):
+        """ Releases the pooled connections, if this instance owns them.
+
+            Returns:
+                None
+        """
+        if self._owns_session:
+            await self.session.close()
+
+    def __enter__(self):
+        raise TypeError('use "async with" with asynchronous clients')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def get(self, endpoint, data=None, headers=None, params=None,
+                  return_response=False, raw_exceptions=False):
+        endpoint = self.prefix + endpoint
+        key = self._flight_key(endpoint, data, headers, params,
+                               return_response, raw_exceptions)
+        if key is None:
+            return await self._get(endpoint, data, headers, params,
+                                   return_response, raw_exceptions)
+        return await self.single_flight.do_async(
+            key, lambda: self._get(endpoint, data, headers, params, False,
+                                   raw_exceptions))
+
+    async def post(self, endpoint, data=None, headers=None, params=None,
+                   return_response=False, raw_exceptions=False):
+        endpoint = self.prefix + endpoint
+        try:
+            return await self._request('POST', endpoint, data, headers,
+                                       params, return_response,
+                                       raw_exceptions)
+        finally:
+            if self.cache is not None:
+                self.cache.mutated(endpoint)
+
+    async def _get(self, endpoint, data=None, headers=None, params=None,
+                   return_response=False, raw_exceptions=False):
+        """ See :meth:`syncthing.BaseAPI._get`. """
+        cache = self.cache
+        ttl = revalidate = 0
+        if cache is not None and not return_response:
+            ttl = cache.ttl_for(endpoint)
+            revalidate = cache.revalidates(endpoint)
+        if not ttl and not revalidate:
+            return await self._request('GET', endpoint, data, headers,
+                                       params, return_response,
+                                       raw_exceptions)
+
+        key = cache.key(endpoint, params, headers)
+        hit, value = cache.lookup(key)
+        if hit:
+            return value
+
+        if not revalidate:
+            value = await self._request('GET', endpoint, data, headers,
+                                        params, False, raw_exceptions)
+            if not isinstance(value, AsyncResponse):
+                cache.store(key, value, ttl)
+            return value
+
+        stale = cache.stale(key)
+        conditional = dict(headers or {})
+        if stale is not None:
+            conditional.update(cache.conditional_headers(stale[1]))
+
+        resp = await self._request('GET', endpoint, data, conditional, params,
+                                   True, raw_exceptions,
+                                   raise_for_status=True)
+        if stale is not None and resp.status == 304:
+            cache.refresh(key, ttl)
+            return stale[0]
+
+        validator = cache.validator(resp.headers, resp.content)
+        if stale is not None and validator.digest == stale[1].digest:
+            # unchanged, skip decoding and hand back the previous object
+            cache.refresh(key, ttl, validator)
+            return stale[0]
+
+        value = self._response(resp)
+        if not isinstance(value, AsyncResponse):
+            cache.store(key, value, ttl, validator)
+        return value
+
+    async def _request(self, method, endpoint, data=None, headers=None,
+                       params=None, return_response=False,
+                       raw_exceptions=False, raise_for_status=None):
+        if raise_for_status is None:
+            raise_for_status = not return_response
+        method, url, body, headers, params = self._prepare(
+            method, endpoint, data, headers, params)
+
+        retry = self.retry
+        if retry is not None and not retry.applies(method, endpoint):
+            retry = None
+        breaker, limiter = self.breaker, self.limiter
+        attempt, started = 0, time.monotonic()
+
+        while True:
+            if breaker is not None:
+                await self._admit(breaker)
+            permit = None
+            if limiter is not None:
+                permit = await self._throttle(limiter, method, endpoint)
+            try:
+                resp = await self._send(method, endpoint, url, body, headers,
+                                        params, raise_for_status, permit)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if breaker is not None:
+                    breaker.record(getattr(e, 'status', None),
+                                   self._transient(e))
+                delay = None
+                if retry is not None:
+                    delay = retry.delay(attempt, started,
+                                        getattr(e, 'status', None),
+                                        self._transient(e))
+                if delay is None:
+                    if raw_exceptions:
+                        raise e
+                    reraise('http request error', e)
+
+            else:
+                if breaker is not None:
+                    breaker.record(resp.status)
+                delay = None
+                if retry is not None:
+                    delay = retry.delay(attempt, started, resp.status)
+                if delay is None:
+                    break
+
+            logger.warning('%s %s failed, retrying in %.2fs', method,
+                           endpoint, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        if return_response:
+            return resp
+        return self._response(resp)
+
+    def _response(self, resp, raw_exceptions=False):
+        """ Returns the decoded body of an :class:`.AsyncResponse` whose
+            error status, if any, was already raised by aiohttp.
+        """
+        if resp.status != 200:
+            logger.error('%d %s (%s): %s', resp.status, resp.reason,
+                         resp.url, resp.text)
+            return resp
+
+        return self._decode(resp.headers.get('Content-Type'),
+                            resp.content)
+
+    async def _send(self, method, endpoint, url, body, headers, params,
+                    raise_for_status, permit=None):
+        """ See :meth:`syncthing.BaseAPI._send`. """
+        hooks = self.hooks
+        if hooks is not None:
+            info = hooks.request_started(method, endpoint, params, body,
+                                         permit.waited if permit else 0.0)
+
+        try:
+            resp = await self.session.request(
+                method,
+                url,
+                data=body,
+                params=params,
+                timeout=self.timeout,
+                ssl=self._ssl(),
+                headers=headers,
+                raise_for_status=raise_for_status
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if hooks is not None:
+                hooks.request_failed(info, e)
+            raise
+        finally:
+            if permit is not None:
+                permit.release()
+
+        if hooks is not None:
+            hooks.request_finished(info, resp, resp.status, len(resp.content))
+        return resp
+
+    @staticmethod
+    def _transient(e):
+        return isinstance(e, (aiohttp.ClientConnectionError,
+                              aiohttp.ClientPayloadError,
+                              asyncio.TimeoutError))
+
+    async def _admit(self, breaker):
+        """ See :meth:`syncthing.BaseAPI._admit`. """
+        decision = breaker.admit()
+        if decision == PROBE:
+            ok = False
+            try:
+                ok = await self._probe()
+            finally:
+                breaker.probed(ok)
+            if not ok:
+                decision = REJECT
+        if decision == REJECT:
+            raise CircuitOpenError(
+                '%s is unreachable, next attempt in %.1fs' %
+                (self.url, breaker.retry_in))
+
+    async def _throttle(self, limiter, method, endpoint):
+        """ See :meth:`syncthing.BaseAPI._throttle`. """
+        permit = await limiter.acquire_async(endpoint)
+        if permit is None:
+            raise RateLimitError('%s %s refused by the client-side rate '
+                                 'limit of %s' % (method, endpoint, self.url))
+        return permit
+
+    async def _probe(self):
+        """ See :meth:`syncthing.BaseAPI._probe`. """
+        endpoint = System.prefix + 'ping'
+        method, url, body, headers, params = self._prepare('GET', endpoint)
+        try:
+            resp = await self._send(method, endpoint, url, body, headers,
+                                    params, False)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+        return resp.status == 200
+
+    async def _stream(self, endpoint, params=None, chunk_size=64 * 1024):
+        """ See :meth:`syncthing.BaseAPI._stream`. """
+        method, url, body, headers, params = self._prepare(
+            'GET', endpoint, None, None, params)
+
+        breaker = self.breaker
+        if breaker is not None:
+            await self._admit(breaker)
+        permit = None
+        if self.limiter is not None:
+            permit = await self._throttle(self.limiter, method, endpoint)
+
+        hooks = self.hooks
+        if hooks is not None:
+            info = hooks.request_started(method, endpoint, params, body,
+                                         permit.waited if permit else 0.0)
+        received = 0
+
+        try:
+            async for chunk in self.session.stream(
+                    method,
+                    url,
+                    data=body,
+                    params=params,
+                    timeout=self.timeout,
+                    ssl=self._ssl(),
+                    headers=headers,
+                    chunk_size=chunk_size):
+                received += len(chunk)
+                yield chunk
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if breaker is not None:
+                breaker.record(getattr(e, 'status', None), self._transient(e))
+            if hooks is not None:
+                hooks.request_failed(info, e)
+            reraise('http request error', e)
+
+        else:
+            if breaker is not None:
+                breaker.record(200)
+            if hooks is not None:
+                hooks.request_finished(info, None, 200, received)
+
+        finally:
+            if permit is not None:
+                permit.release()
+
+
+class AsyncSystem(AsyncBaseAPI):
+    """ Asynchronous HTTP REST endpoint for System calls, see
+        :class:`syncthing.System`."""
+
+    prefix = System.prefix
+
+    async def browse(self, path=None):
+        """ See :meth:`syncthing.System.browse`. """
+        params = None
+        if path:
+            assert isinstance(path, string_types)
+            params = {'current': path}
+        return await self.get('browse', params=params)
+
+    async def config(self):
+        """ See :meth:`syncthing.System.config`. """
+        return await self.get('config')
+
+    async def set_config(self, config, and_restart=False):
+        """ See :meth:`syncthing.System.set_config`. """
+        assert isinstance(config, dict)
+        await self.post('config', data=config)
+        if and_restart:
+            await self.restart()
+
+    async def config_insync(self):
+        """ See :meth:`syncthing.System.config_insync`. """
+        status = (await self.get('config/insync')).get('configInSync', False)
+        if status is None:
+            status = False
+        return status
+
+    async def connections(self, typed=False):
+        """ See :meth:`syncthing.System.connections`. """
+        resp = await self.get('connections')
+        return models.connections(resp) if typed else resp
+
+    async def debug(self):
+        """ See :meth:`syncthing.System.debug`. """
+        return await self.get('debug')
+
+    async def disable_debug(self, *on):
+        """ See :meth:`syncthing.System.disable_debug`. """
+        await self.post('debug', params={'disable': ','.join(on)})
+
+    async def enable_debug(self, *on):
+        """ See :meth:`syncthing.System.enable_debug`. """
+        await self.post('debug', params={'enable': ','.join(on)})
+
+    async def discovery(self):
+        """ See :meth:`syncthing.System.discovery`. """
+        return await self.get('discovery')
+
+    async def add_discovery(self, device, address):
+        """ See :meth:`syncthing.System.add_discovery`. """
+        await self.post('discovery', params={'device': device,
+                                             'address': address})
+
+    async def clear(self):
+        """ See :meth:`syncthing.System.clear`. """
+        await self.post('error/clear')
+
+    async def clear_errors(self):
+        """ Alias function for :meth:`.clear`. """
+        await self.clear()
+
+    async def errors(self):
+        """ See :meth:`syncthing.System.errors`. """
+        ret_errs = list()
+        errors = (await self.get('error')).get('errors', None) or list()
+        assert isinstance(errors, list)
+        for err in errors:
+            when = parse_datetime(err.get('when', None))
+            msg = err.get('message', '')
+            ret_errs.append(ErrorEvent(when, msg))
+        return ret_errs
+
+    async def show_error(self, message):
+        """ See :meth:`syncthing.System.show_error`. """
+        assert isinstance(message, string_types)
+        await self.post('error', data=message)
+
+    async def log(self):
+        """ See :meth:`syncthing.System.log`. """
+        return await self.get('log')
+
+    async def _toggle(self, endpoint, device):
+        resp = await self.post(endpoint, params={'device': device},
+                               return_response=True)
+        error = resp.text
+        if not error:
+            error = None
+        return {'success': resp.status == 200,
+                'error': error}
+
+    async def pause(self, device):
+        """ See :meth:`syncthing.System.pause`. """
+        return await self._toggle('pause', device)
+
+    async def ping(self, with_method='GET'):
+        """ See :meth:`syncthing.System.ping`. """
+        assert with_method in ('GET', 'POST')
+        if with_method == 'GET':
+            return await self.get('ping')
+        return await self.post('ping')
+
+    async def reset(self):
+        """ See :meth:`syncthing.System.reset`. """
+        warnings.warn('This is a destructive action that cannot be undone.')
+        await self.post('reset', data={})
+
+    async def reset_folder(self, folder):
+        """ See :meth:`syncthing.System.reset_folder`. """
+        warnings.warn('This is a destructive action that cannot be undone.')
+        await self.post('reset', data={}, params={'folder': folder})
+
+    async def restart(self):
+        """ See :meth:`syncthing.System.restart`. """
+        await self.post('restart', data={})
+
+    async def resume(self, device):
+        """ See :meth:`syncthing.System.resume`. """
+        return await self._toggle('resume', device)
+
+    async def shutdown(self):
+        """ See :meth:`syncthing.System.shutdown`. """
+        await self.post('shutdown', data={})
+
+    async def status(self, typed=False):
+        """ See :meth:`syncthing.System.status`. """
+        resp = await self.get('status')
+        if typed:
+            return models.SystemStatus(resp)
+        return keys_to_datetime(resp, 'startTime')
+
+    async def upgrade(self):
+        """ See :meth:`syncthing.System.upgrade`. """
+        return await self.get('upgrade')
+
+    async def can_upgrade(self):
+        """ See :meth:`syncthing.System.can_upgrade`. """
+        return ((await self.upgrade()) or {}).get('newer', False)
+
+    async def do_upgrade(self):
+        """ See :meth:`syncthing.System.do_upgrade`. """
+        return await self.post('upgrade')
+
+    async def version(self):
+        """ See :meth:`syncthing.System.version`. """
+        return await self.get('version')
+
+
+class AsyncDatabase(AsyncBaseAPI):
+    """ Asynchronous HTTP REST endpoint for Database calls, see
+        :class:`syncthing.Database`."""
+
+    prefix = Database.prefix
+
+    async def browse(self, folder, levels=None, prefix=None):
+        """ See :meth:`syncthing.Database.browse`. """
+        assert isinstance(levels, int) or levels is None
+        assert isinstance(prefix, string_types) or prefix is None
+        return await self.get('browse', params={'folder': folder,
+                                                'levels': levels,
+                                                'prefix': prefix})
+
+    async def iter_browse(self, folder, prefix=None, levels=None,
+                          chunk_size=64 * 1024):
+        """ See :meth:`syncthing.Database.iter_browse`.
+
+            Returns:
+                async_generator[:obj:`syncthing.BrowseEntry`]
+        """
+        assert isinstance(levels, int) or levels is None
+        assert isinstance(prefix, string_types) or prefix is None
+        tokenizer = JSONTokenizer()
+        walker = BrowseWalker(prefix)
+        try:
+            async for chunk in self._stream(self.prefix + 'browse',
+                                            params={'folder': folder,
+                                                    'levels': levels,
+                                                    'prefix': prefix},
+                                            chunk_size=chunk_size):
+                for entry in walker.walk(tokenizer.feed(chunk)):
+                    yield entry
+            for entry in walker.walk(tokenizer.close()):
+                yield entry
+        except ValueError as e:
+            reraise('malformed browse response', e)
+
+    async def completion(self, device, folder):
+        """ See :meth:`syncthing.Database.completion`. """
+        return (await self.get(
+            'completion',
+            params={'folder': folder, 'device': device}
+        )).get('completion', None)
+
+    async def completion_matrix(self, devices=None, folders=None,
+                                max_workers=None):
+        """ See :meth:`syncthing.Database.completion_matrix`, ``max_workers``
+            bounds the number of requests in flight.
+        """
+        started = time.monotonic()
+        config = await self._get(System.prefix + 'config')
+        devices, folders, cells = Database._completion_cells(
+            config, devices, folders)
+        if max_workers is None:
+            max_workers = self.session.pool_maxsize
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def fetch(cell):
+            row, col = cell
+            async with semaphore:
+                try:
+                    return await self.completion(devices[row],
+                                                 folders[col]), None
+                except SyncthingError as e:
+                    return None, e
+
+        values = [[None] * len(folders) for _ in devices]
+        errors = {}
+        results = await asyncio.gather(*[fetch(cell) for cell in cells])
+        for (row, col), (value, err) in zip(cells, results):
+            values[row][col] = value
+            if err is not None:
+                errors[(devices[row], folders[col])] = err
+
+        return CompletionMatrix(devices, folders, values, errors,
+                                time.monotonic() - started)
+
+    async def file(self, folder, file_, typed=False):
+        """ See :meth:`syncthing.Database.file`. """
+        resp = await self.get('file', params={'folder': folder,
+                                              'file': file_})
+        return models.file_info(resp) if typed else resp
+
+    async def ignores(self, folder):
+        """ See :meth:`syncthing.Database.ignores`. """
+        return await self.get('ignores', params={'folder': folder})
+
+    async def set_ignores(self, folder, *patterns):
+        """ See :meth:`syncthing.Database.set_ignores`. """
+        if not patterns:
+            return {}
+        data = {'ignore': list(patterns)}
+        return await self.post('ignores', params={'folder': folder},
+                               data=data)
+
+    async def need(self, folder, page=None, perpage=None):
+        """ See :meth:`syncthing.Database.need`. """
+        assert isinstance(page, int) or page is None
+        assert isinstance(perpage, int) or perpage is None
+        return await self.get('need', params={'folder': folder,
+                                              'page': page,
+                                              'perpage': perpage})
+
+    async def iter_need(self, folder, perpage=100, prefetch=True):
+        """ See :meth:`syncthing.Database.iter_need`.
+
+            Returns:
+                async_generator[:obj:`syncthing.NeedEntry`]
+        """
+        assert isinstance(perpage, int) and perpage > 0
+        page, pending = 1, None
+        try:
+            while True:
+                if pending is not None:
+                    resp = await pending
+                else:
+                    resp = await self.need(folder, page, perpage)
+
+                entries, more = Database._need_page(resp, page, perpage)
+                pending = None
+                if more and prefetch:
+                    pending = asyncio.ensure_future(
+                        self.need(folder, page + 1, perpage))
+
+                for entry in entries:
+                    yield entry
+
+                if not more:
+                    break
+                page += 1
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+    async def override(self, folder):
+        """ See :meth:`syncthing.Database.override`. """
+        await self.post('override', params={'folder': folder})
+
+    async def prio(self, folder, file_):
+        """ See :meth:`syncthing.Database.prio`. """
+        await self.post('prio', params={'folder': folder,
+                                        'file': file_})
+
+    async def scan(self, folder, sub=None, next_=None):
+        """ See :meth:`syncthing.Database.scan`. """
+        if not sub:
+            sub = ''
+        assert isinstance(sub, string_types)
+        assert isinstance(next_, int) or next_ is None
+        return await self.post('scan', params={'folder': folder,
+                                               'sub': sub,
+                                               'next': next_})
+
+    async def status(self, folder, typed=False):
+        """ See :meth:`syncthing.Database.status`. """
+        resp = await self.get('status', params={'folder': folder})
+        return models.FolderStatus(resp) if typed else resp
+
+
+class AsyncEvents(AsyncBaseAPI, Events):
+    """ Asynchronous event stream, see :class:`syncthing.Events`.
+
+        .. code-block:: python
+
+           event_stream = syncthing.events(limit=5)
+
+           async for event in event_stream:
+               print(event)
+               if event_stream.count > 10:
+                   event_stream.stop()
+    """
+
+    def disk_events(self):
+        """ Asynchronous generator of disk related events.
+
+            Returns:
+                async_generator[dict]
+        """
+        return self._events('events/disk', None, self._limit)
+
+    async def _events(self, using_url, filters=None, limit=None):
+        """ See :meth:`syncthing.Events._events`. """
+        filters, limit = self._coerce(filters, limit)
+        key = self._cursor_key(using_url, filters)
+        limit = self._start_limit(limit)
+
+        # reset the state if the loop was broken with `stop`
+        if not self.blocking:
+            self.blocking = True
+
+        self._recheck = self._tracks_restarts
+
+        try:
+            while self.blocking:
+                if self._filters_changed:
+                    filters, key = self._switch_filters(using_url, key)
+                    if self._cursor_store is not None:
+                        self._resume(key, self._start_time)
+
+                started = self._poll_started()
+                try:
+                    if self._recheck:
+                        self._check_start_time(
+                            key, await self._current_start_time(True))
+                    params = self._poll_params(filters, limit)
+                    data = await self.get(using_url, params=params,
+                                          raw_exceptions=True)
+                except Exception as e:
+                    delay = self._poll_failed(e, started)
+                    if delay is not None:
+                        await asyncio.sleep(delay)
+                        continue
+                    data = None
+                limit = self._poll_done(started, data, limit)
+
+                if not data and self._tracks_restarts:
+                    self._recheck = True
+                if data:
+                    if self._tracks_restarts and \
+                            data[0]['id'] <= self._last_seen_id:
+                        self._sync_start_time(await self._current_start_time())
+                    for event in data:
+                        if not self._advance(event):
+                            continue
+                        yield event
+                        self._checkpoint(key)
+        finally:
+            self._checkpoint(key, force=True)
+
+    async def _current_start_time(self, raw_exceptions=False):
+        """ See :meth:`syncthing.Events._current_start_time`. """
+        resp = await self.get('system/status', raw_exceptions=raw_exceptions)
+        return resp.get('startTime')
+
+    def _is_poll_timeout(self, e):
+        if isinstance(e, _CONNECT_TIMEOUT):
+            # the node is down rather than quiet
+            return self._backoff is None
+        return isinstance(e, asyncio.TimeoutError)
+
+    @staticmethod
+    def _retryable(e):
+        if isinstance(e, aiohttp.ClientConnectionError):
+            return True
+        return isinstance(e, aiohttp.ClientResponseError) and e.status >= 500
+
+    def __aiter__(self):
+        self._filters_changed = False
+        return self._events('events', self._filters, self._limit)
+
+    def __iter__(self):
+        # Events.__iter__ would hand the async generator to a plain `for`
+        raise TypeError('%s is an asynchronous stream, iterate it with '
+                        '`async for`' % self.__class__.__name__)
+
+
+class AsyncStatistics(AsyncBaseAPI):
+    """ Asynchronous HTTP REST endpoint for Statistic calls, see
+        :class:`syncthing.Statistics`."""
+
+    prefix = Statistics.prefix
+
+    async def device(self, typed=False):
+        """ See :meth:`syncthing.Statistics.device`. """
+        resp = await self.get('device')
+        return models.DeviceStats.map(resp) if typed else resp
+
+    async def folder(self, typed=False):
+        """ See :meth:`syncthing.Statistics.folder`. """
+        resp = await self.get('folder')
+        return models.FolderStats.map(resp) if typed else resp
+
+
+class AsyncMisc(AsyncBaseAPI):
+    """ Asynchronous HTTP REST endpoint for Miscelaneous calls, see
+        :class:`syncthing.Misc`."""
+
+    prefix = Misc.prefix
+
+    async def device_id(self, id_):
+        """ See :meth:`syncthing.Misc.device_id`. """
+        return (await self.get('deviceid', params={'id': id_})).get('id')
+
+    async def language(self):
+        """ See :meth:`syncthing.Misc.language`. """
+        return await self.get('lang')
+
+    async def random_string(self, length=32):
+        """ See :meth:`syncthing.Misc.random_string`. """
+        return (await self.get(
+            'random/string',
+            params={'length': length}
+        )).get('random', None)
+
+    async def report(self):
+        """ See :meth:`syncthing.Misc.report`. """
+        return await self.get('report')
+
+
+class AsyncSyncthing(object):
+    """ Asynchronous interface for interacting with a Syncthing server
+        instance, laid out exactly like :class:`syncthing.Syncthing`.
+
+        Every sub-API shares a single :class:`.AsyncPooledSession`, so one
+        event loop can keep many concurrent requests in flight over a bounded
+        set of keep-alive connections.
+
+        Args:
+            api_key (str)
+            host (str)
+            port (int)
+            timeout (float)
+            is_https (bool)
+            ssl_cert_file (str)
+            pool_connections (int)
+            pool_maxsize (int): maximum concurrent connections to the host.
+            idle_timeout (float)
+            hooks (:class:`~syncthing.metrics.Hooks`): callbacks around
+                every request.
+            retry (:class:`~syncthing.retry.RetryPolicy`): retries of
+                failed requests.
+            cache (:class:`~syncthing.ResponseCache` or bool): opt-in
+                response cache shared by all sub-APIs, ``True`` uses the
+                default TTLs.
+            breaker (:class:`~syncthing.breaker.CircuitBreaker` or bool):
+                fails requests fast while the node is unreachable.
+            single_flight (:class:`~syncthing.SingleFlight` or bool):
+                shares one request between coroutines making the same GET
+                at the same time.
+            limiter (:class:`~syncthing.RateLimiter` or bool): rate limits
+                and concurrency caps of the requests to this node.
+
+        Attributes:
+            system: instance of :class:`.AsyncSystem`.
+            database: instance of :class:`.AsyncDatabase`.
+            stats: instance of :class:`.AsyncStatistics`.
+            misc: instance of :class:`.AsyncMisc`.
+    """
+
+    def __init__(self, api_key, host='localhost', port=8384,
+                 timeout=DEFAULT_TIMEOUT, is_https=False, ssl_cert_file=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, cache=None, hooks=None,
+                 retry=None, breaker=None, single_flight=None, limiter=None):
+
+        self.__api_key = api_key
+
+        self.api_key = api_key
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.is_https = is_https
+        self.ssl_cert_file = ssl_cert_file
+        self.session = AsyncPooledSession(pool_connections=pool_connections,
+                                          pool_maxsize=pool_maxsize,
+                                          idle_timeout=idle_timeout)
+        self.cache = ResponseCache() if cache is True else cache
+        self.hooks = hooks
+        self.retry = retry
+        self.breaker = CircuitBreaker() if breaker is True else breaker
+        self.single_flight = SingleFlight() if single_flight is True \
+            else single_flight
+        self.limiter = RateLimiter() if limiter is True else limiter
+
+        self.__kwargs = kwargs = {
+            'host': host,
+            'port': port,
+            'timeout': timeout,
+            'is_https': is_https,
+            'ssl_cert_file': ssl_cert_file,
+            'session': self.session,
+            'cache': self.cache,
+            'hooks': hooks,
+            'retry': retry,
+            'breaker': self.breaker,
+            'single_flight': self.single_flight,
+            'limiter': self.limiter
+        }
+
+        self.system = self.sys = AsyncSystem(api_key, **kwargs)
+        self.database = self.db = AsyncDatabase(api_key, **kwargs)
+        self.stats = AsyncStatistics(api_key, **kwargs)
+        self.misc = AsyncMisc(api_key, **kwargs)
+
+    async def close(self):
+        """ Closes every pooled connection held by this client.
+
+            Returns:
+                None
+        """
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def events(self, last_seen_id=None, filters=None, **kwargs):
+        kw = dict(self.__kwargs)
+        kw.update(kwargs)
+        return AsyncEvents(api_key=self.__api_key,
+                           last_seen_id=last_seen_id,
+                           filters=filters,
+                           **kw)
@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import random
+
+__all__ = ['Backoff']
+
+
+class Backoff(object):
+    """ Exponential backoff with jitter: the ``n``-th delay (from 0) is drawn
+        from ``[(1 - jitter) * d, d]`` where
+        ``d = min(maximum, initial * multiplier ** n)``.
+
+        The jitter spreads out clients that failed at the same time, so they
+        do not reconnect in lockstep.
+
+        Args:
+            initial (float): seconds of the first delay.
+            maximum (float): cap of a delay.
+            multiplier (float): growth between two delays.
+            jitter (float): ``0`` for fixed delays, ``1`` for "full jitter".
+            max_attempts (int): attempts before giving up, never when
+                ``None``.
+    """
+
+    def __init__(self, initial=0.5, maximum=30.0, multiplier=2.0, jitter=0.5,
+                 max_attempts=None):
+        self.initial = initial
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+
+    def __repr__(self):
+        return ('%s(initial=%r, maximum=%r, multiplier=%r, jitter=%r, '
+                'max_attempts=%r)' % (self.__class__.__name__, self.initial,
+                                      self.maximum, self.multiplier,
+                                      self.jitter, self.max_attempts))
+
+    def delay(self, attempt):
+        """ Returns the seconds to wait after failed attempt ``attempt``
+            (from 0), ``None`` when out of attempts.
+
+            Returns:
+                float
+        """
+        if self.max_attempts is not None and attempt >= self.max_attempts:
+            return None
+        try:
+            delay = min(self.maximum, self.initial * self.multiplier ** attempt)
+        except OverflowError:
+            delay = self.maximum
+        return delay * (1.0 - self.jitter * random.random())
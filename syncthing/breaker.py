@@ -0,0 +1,198 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Failing fast on unreachable nodes.
+
+    .. code-block:: python
+
+       s = Syncthing(API_KEY, 'alpha.lan', breaker=True)
+       try:
+           s.system.status()
+       except CircuitOpenError:
+           pass  # alpha.lan is down, no need to wait for a timeout
+       print(s.breaker.state)
+"""
+from __future__ import unicode_literals
+
+import time
+import logging
+import threading
+
+__all__ = ['CLOSED', 'OPEN', 'HALF_OPEN', 'ADMIT', 'REJECT', 'PROBE',
+           'CircuitBreaker']
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+ADMIT = 'admit'
+REJECT = 'reject'
+PROBE = 'probe'
+
+
+class CircuitBreaker(object):
+    """ Health of a Syncthing node, as seen by the requests sent to it.
+
+        The breaker starts ``'closed'`` and opens after
+        ``failure_threshold`` consecutive failures: connection errors,
+        timeouts, or responses whose status is in ``failure_statuses``.
+        While it is ``'open'`` requests are rejected without being sent.
+        ``reset_timeout`` seconds later one caller pings the node; when it
+        answers the breaker turns ``'half-open'`` and lets requests through,
+        the first success closes it and a failure opens it again.
+
+        Any other response, e.g. a ``500`` for an unknown folder, shows the
+        node is up and counts as a success.
+
+        Args:
+            failure_threshold (int): consecutive failures opening the
+                breaker.
+            reset_timeout (float): seconds the breaker stays open before the
+                node is probed.
+            failure_statuses (List[int]): HTTP statuses counted as failures.
+
+        Attributes:
+            failures (int): consecutive failures so far.
+            trips (int): times the breaker opened.
+            rejected (int): requests refused while open.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0,
+                 failure_statuses=(502, 503, 504)):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_statuses = frozenset(failure_statuses)
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._state = CLOSED
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self._state)
+
+    @property
+    def state(self):
+        """ str: ``'closed'``, ``'open'`` or ``'half-open'``. """
+        return self._state
+
+    @property
+    def retry_in(self):
+        """ float: seconds before the node is probed, ``0`` unless open. """
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout -
+                   time.monotonic())
+
+    def admit(self):
+        """ Decides the fate of a request.
+
+            Returns:
+                str: ``'admit'`` to send it, ``'reject'`` to fail it, or
+                ``'probe'`` when the caller must ping the node first and
+                report the outcome with :meth:`.probed`.
+        """
+        with self._lock:
+            if self._state != OPEN:
+                return ADMIT
+            if self._probing or self.retry_in > 0:
+                self.rejected += 1
+                return REJECT
+            self._probing = True
+            return PROBE
+
+    def probed(self, ok):
+        """ Records the outcome of a probe.
+
+            Args:
+                ok (bool): whether the node answered the ping.
+
+            Returns:
+                bool: ``ok``.
+        """
+        with self._lock:
+            self._probing = False
+            if ok:
+                self._state = HALF_OPEN
+                logger.info('node answered, breaker half-open')
+            else:
+                self.rejected += 1
+                self._opened_at = time.monotonic()
+        return ok
+
+    def record(self, status=None, transient=False):
+        """ Records the outcome of a request.
+
+            Args:
+                status (int): HTTP status of the response, if any.
+                transient (bool): whether the request failed with a
+                    connection error or a timeout.
+
+            Returns:
+                None
+        """
+        failed = transient or status in self.failure_statuses
+        if not failed and status is None:
+            # failed before reaching the node, says nothing of its health
+            return
+        with self._lock:
+            if not failed:
+                self.failures = 0
+                if self._state == HALF_OPEN:
+                    self._state = CLOSED
+                    logger.info('node recovered, breaker closed')
+                return
+            self.failures += 1
+            if self._state == HALF_OPEN or (
+                    self._state == CLOSED and
+                    self.failures >= self.failure_threshold):
+                self._open()
+
+    def reset(self):
+        """ Closes the breaker.
+
+            Returns:
+                None
+        """
+        with self._lock:
+            self._state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def stats(self):
+        """ Returns the state of the breaker and its counters.
+
+            Returns:
+                dict
+        """
+        with self._lock:
+            return {'state': self._state,
+                    'failures': self.failures,
+                    'trips': self.trips,
+                    'rejected': self.rejected,
+                    'retry_in': self.retry_in}
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.trips += 1
+        logger.warning('%d consecutive failures, breaker open for %.1fs',
+                       self.failures, self.reset_timeout)
@@ -0,0 +1,282 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" One event long-poll shared by many in-process subscribers.
+
+    .. code-block:: python
+
+       bus = EventBus(syncthing.events())
+       bus.subscribe(on_completion, types=['FolderCompletion'])
+       items = bus.subscribe(types=['ItemFinished'], maxsize=1000)
+
+       with bus:
+           for event in items:
+               print(event)
+"""
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue
+
+__all__ = ['Subscription', 'EventBus']
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(object):
+    """ A subscriber of an :class:`.EventBus`, see
+        :meth:`.EventBus.subscribe`.
+
+        Subscriptions without a callback queue their events, which are read
+        with :meth:`.get` or by iterating the subscription.
+
+        Attributes:
+            types (frozenset): event types received, all when ``None``.
+            received (int): events dispatched to the subscriber.
+            dropped (int): events lost to a full queue.
+    """
+
+    def __init__(self, bus, callback=None, types=None, maxsize=0):
+        self.bus = bus
+        self.callback = callback
+        self.types = frozenset(types) if types else None
+        self.queue = None if callback else queue.Queue(maxsize)
+        self.received = 0
+        self.dropped = 0
+        self.closed = False
+
+    def __iter__(self):
+        """ Yields queued events until the subscription is closed. """
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def get(self, timeout=None):
+        """ Returns the next queued event.
+
+            Args:
+                timeout (float): seconds to wait, forever when ``None``.
+
+            Returns:
+                dict: ``None`` when the timeout expired, or the subscription
+                is closed.
+        """
+        if self.queue is None:
+            raise TypeError('callback subscriptions have no queue')
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """ Leaves the bus, see :meth:`.EventBus.unsubscribe`. """
+        self.bus.unsubscribe(self)
+
+    def _deliver(self, event):
+        self.received += 1
+        if self.callback is not None:
+            try:
+                self.callback(event)
+            except Exception:
+                logger.exception('event subscriber %r failed', self.callback)
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+
+class EventBus(object):
+    """ Dispatches the events of a single :class:`syncthing.Events` stream
+        to many subscribers, each receiving the event types it asked for.
+
+        The stream subscribes to the union of the subscribers' types, and
+        follows it as they join and leave; a change is picked up by the
+        next long-poll. Subscribing before :meth:`.start` avoids waiting for
+        the long-poll in flight. Once the last subscriber leaves, the stream
+        keeps its filters until someone subscribes again.
+
+        Callbacks run on the bus thread, one event at a time, and must not
+        block; exceptions are logged and swallowed.
+
+        Args:
+            events (:obj:`syncthing.Events`): the stream to share, its
+                filters are managed by the bus.
+
+        Attributes:
+            dispatched (int): events read from the stream.
+            undelivered (int): events no subscriber asked for, e.g. while
+                the filters of the stream are being changed.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self.dispatched = 0
+        self.undelivered = 0
+        self._subscriptions = []
+        # event type to subscriptions, None for those receiving every type
+        self._routes = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._error = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def subscriptions(self):
+        """ List[:obj:`.Subscription`]: the current subscribers. """
+        return list(self._subscriptions)
+
+    @property
+    def error(self):
+        """ Exception: what ended the stream, ``None`` while it runs. """
+        return self._error
+
+    def subscribe(self, callback=None, types=None, maxsize=0):
+        """ Adds a subscriber.
+
+            Args:
+                callback (callable): called with every event; the events are
+                    queued on the subscription when ``None``.
+                types (List[str]): event types, all when ``None``.
+                maxsize (int): capacity of the queue, unbounded when ``0``;
+                    events arriving when it is full are dropped.
+
+            Returns:
+                :obj:`.Subscription`
+        """
+        sub = Subscription(self, callback, types, maxsize)
+        with self._lock:
+            self._subscriptions.append(sub)
+            self._update()
+        return sub
+
+    def unsubscribe(self, sub):
+        """ Removes a subscriber, waking up any reader of its queue.
+
+            Returns:
+                None
+        """
+        with self._lock:
+            if sub in self._subscriptions:
+                self._subscriptions.remove(sub)
+                self._update()
+        self._close(sub)
+
+    def start(self):
+        """ Starts polling on a daemon thread.
+
+            Returns:
+                :obj:`.EventBus`: ``self``.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='syncthing-event-bus')
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """ Stops polling and closes every subscription.
+
+            The thread finishes once the request in flight returns.
+
+            Args:
+                timeout (float): seconds to wait for the thread.
+
+            Returns:
+                bool: whether the thread finished.
+        """
+        self.events.stop()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        for sub in self.subscriptions:
+            self.unsubscribe(sub)
+        return self._thread is None or not self._thread.is_alive()
+
+    def dispatch(self, event):
+        """ Delivers ``event`` to its subscribers.
+
+            Returns:
+                int: number of subscribers it was delivered to.
+        """
+        routes = self._routes
+        subs = routes.get(event.get('type'), ()) + routes.get(None, ())
+        self.dispatched += 1
+        if not subs:
+            self.undelivered += 1
+        for sub in subs:
+            sub._deliver(event)
+        return len(subs)
+
+    def _update(self):
+        # rebuilt on every change, so dispatching reads it without a lock
+        routes = {}
+        for sub in self._subscriptions:
+            for t in (sub.types or (None,)):
+                routes[t] = routes.get(t, ()) + (sub,)
+        self._routes = routes
+
+        if not routes:
+            # no filters would mean every event type, keep polling for the
+            # types of the last subscribers instead
+            return
+        filters = [] if None in routes else sorted(routes)
+        if filters != self.events.filters:
+            self.events.set_filters(filters)
+
+    def _run(self):
+        try:
+            for event in self.events:
+                self.dispatch(event)
+        except Exception as e:
+            logger.warning('event bus stopped: %s', e)
+            self._error = e
+        finally:
+            for sub in self.subscriptions:
+                self._close(sub)
+
+    @staticmethod
+    def _close(sub):
+        if sub.closed:
+            return
+        sub.closed = True
+        if sub.queue is None:
+            return
+        # wakes up the reader, `get` returns None; room is made for it in a
+        # full queue
+        while True:
+            try:
+                sub.queue.put_nowait(None)
+                return
+            except queue.Full:
+                try:
+                    sub.queue.get_nowait()
+                    sub.dropped += 1
+                except queue.Empty:
+                    pass
@@ -0,0 +1,240 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+__all__ = ['DEFAULT_TTLS', 'DEFAULT_INVALIDATIONS', 'DEFAULT_REVALIDATE',
+           'Validator', 'ResponseCache']
+
+DEFAULT_TTLS = {
+    '/rest/system/config': 5.0,
+    '/rest/system/discovery': 5.0,
+    '/rest/system/version': 60.0,
+    '/rest/stats/device': 5.0,
+    '/rest/stats/folder': 5.0,
+}
+"""dict: seconds a successful GET of each read-mostly endpoint stays fresh."""
+
+DEFAULT_REVALIDATE = ('/rest/system/config', '/rest/db/browse')
+"""tuple: endpoints with large bodies whose stale responses are revalidated
+instead of downloaded and decoded again."""
+
+DEFAULT_INVALIDATIONS = {
+    '/rest/system/config': ('/rest/system/config',),
+    '/rest/system/debug': ('/rest/system/debug',),
+    '/rest/system/discovery': ('/rest/system/discovery',),
+    '/rest/system/error': ('/rest/system/error',),
+    '/rest/system/error/clear': ('/rest/system/error',),
+    '/rest/system/ping': (),
+    '/rest/db/ignores': ('/rest/db/ignores',),
+}
+"""dict: endpoint prefixes dropped from the cache by a POST to an endpoint.
+A POST to an endpoint missing from this table (``restart``, ``scan``,
+``reset`` ...) empties the whole cache."""
+
+Validator = namedtuple('Validator', 'etag, last_modified, digest')
+"""tuple[str,str,bytes]: what identifies the version of a cached response;
+the ``ETag`` and ``Last-Modified`` headers when sent, and a hash of the body.
+"""
+
+
+class ResponseCache(object):
+    """ Size-bounded LRU cache of decoded GET responses with per-endpoint
+        time-to-live, shared by all sub-APIs of a :class:`.Syncthing` client.
+
+        Only endpoints with a positive TTL are cached. Cached values are shared
+        between callers and must be treated as read-only.
+
+        Responses of the ``revalidate`` endpoints are kept past their TTL
+        along with a :obj:`.Validator`. The next request for them is made
+        conditional (``If-None-Match`` / ``If-Modified-Since``) and, when
+        Syncthing answers ``304 Not Modified`` or the body hashes the same,
+        the previously decoded object is returned without parsing the body.
+
+        Args:
+            ttls (dict): full endpoint path (e.g. ``/rest/system/config``) to
+                seconds; defaults to :data:`.DEFAULT_TTLS`.
+            default_ttl (float): TTL of endpoints missing from ``ttls``,
+                ``0`` disables caching them.
+            maxsize (int): maximum number of cached responses.
+            invalidations (dict): overrides :data:`.DEFAULT_INVALIDATIONS`.
+            revalidate (tuple): overrides :data:`.DEFAULT_REVALIDATE`.
+
+        Attributes:
+            hits (int): lookups answered from the cache.
+            misses (int): lookups that went over HTTP.
+            revalidations (int): misses answered with an unchanged body.
+            evictions (int): entries dropped to respect ``maxsize``.
+    """
+
+    def __init__(self, ttls=None, default_ttl=0, maxsize=128,
+                 invalidations=None, revalidate=None):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.maxsize = maxsize
+        self.invalidations = dict(DEFAULT_INVALIDATIONS
+                                  if invalidations is None else invalidations)
+        self.revalidate = frozenset(DEFAULT_REVALIDATE
+                                    if revalidate is None else revalidate)
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, endpoint):
+        """ Returns the TTL in seconds of ``endpoint``, ``0`` if uncached. """
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def revalidates(self, endpoint):
+        """ Returns whether stale responses of ``endpoint`` are revalidated. """
+        return endpoint in self.revalidate
+
+    @staticmethod
+    def key(endpoint, params=None, headers=None):
+        """ Builds the cache key of a request.
+
+            Returns:
+                tuple
+        """
+        params = tuple(sorted((k, str(v)) for k, v in (params or {}).items()
+                              if v is not None))
+        headers = tuple(sorted((headers or {}).items()))
+        return endpoint, params, headers
+
+    def lookup(self, key):
+        """ Returns ``(True, value)`` for a fresh entry, otherwise
+            ``(False, None)``; counts the hit or the miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def stale(self, key):
+        """ Returns ``(value, validator)`` of an entry regardless of its age,
+            ``None`` when missing or stored without a validator.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] is None:
+                return None
+            return entry[1], entry[2]
+
+    def store(self, key, value, ttl, validator=None):
+        """ Caches ``value`` for ``ttl`` seconds, evicting the least recently
+            used entries beyond ``maxsize``.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value, validator)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def refresh(self, key, ttl, validator=None):
+        """ Marks an entry as confirmed unchanged, fresh for another ``ttl``
+            seconds, optionally replacing its validator.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (time.monotonic() + ttl, entry[1],
+                                      validator or entry[2])
+                self._entries.move_to_end(key)
+            self.revalidations += 1
+
+    @staticmethod
+    def validator(headers, content):
+        """ Builds the :obj:`.Validator` of a response.
+
+            Args:
+                headers (dict): response headers.
+                content (bytes): response body.
+
+            Returns:
+                :obj:`.Validator`
+        """
+        return Validator(headers.get('ETag'), headers.get('Last-Modified'),
+                         hashlib.sha1(content).digest())
+
+    @staticmethod
+    def conditional_headers(validator):
+        """ Returns the request headers revalidating ``validator``.
+
+            Returns:
+                dict
+        """
+        headers = {}
+        if validator.etag:
+            headers['If-None-Match'] = validator.etag
+        if validator.last_modified:
+            headers['If-Modified-Since'] = validator.last_modified
+        return headers
+
+    def invalidate(self, prefix=None):
+        """ Drops every entry whose endpoint starts with ``prefix``, or all
+            of them when ``prefix`` is ``None``.
+
+            Returns:
+                int: number of dropped entries.
+        """
+        with self._lock:
+            if prefix is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            stale = [k for k in self._entries if k[0].startswith(prefix)]
+            for k in stale:
+                del self._entries[k]
+            return len(stale)
+
+    def mutated(self, endpoint):
+        """ Invalidates what a POST to ``endpoint`` may have changed, see
+            :data:`.DEFAULT_INVALIDATIONS`.
+        """
+        prefixes = self.invalidations.get(endpoint)
+        if prefixes is None:
+            self.invalidate()
+            return
+        for prefix in prefixes:
+            self.invalidate(prefix)
+
+    def stats(self):
+        """ Returns the cache counters.
+
+            Returns:
+                dict
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'evictions': self.evictions,
+                'size': len(self._entries)}
@@ -0,0 +1,195 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Collapsing of high-churn event streams into their latest state.
+
+    By default the events about one file collapse into the latest, whatever
+    their type: ``ItemStarted`` then ``ItemFinished`` of ``(folder, item)``
+    leaves the ``ItemFinished``. Pass ``key=event_key`` to keep one event
+    per type instead.
+
+    .. code-block:: python
+
+       for batch in coalesce(syncthing.events(), window=2.0):
+           for (folder, item), event, count, first_id in batch:
+               handle(event)
+"""
+from __future__ import unicode_literals
+
+import time
+from collections import OrderedDict, namedtuple
+
+from syncthing.pump import event_key
+
+__all__ = ['Coalesced', 'EventCoalescer', 'coalesce', 'item_key',
+           'event_key']
+
+Coalesced = namedtuple('Coalesced', 'key, event, count, first_id')
+"""tuple: the latest ``event`` of a ``key``, standing for ``count`` events
+since the one with id ``first_id``."""
+
+
+def item_key(event):
+    """ Default coalescing key: the ``(folder, item)`` an event is about.
+        Events without an item fall back to
+        :func:`syncthing.pump.event_key`, so they only collapse with events
+        of the same type.
+
+        Returns:
+            tuple
+    """
+    data = event.get('data')
+    if isinstance(data, dict) and data.get('item') is not None:
+        return data.get('folder'), data.get('item')
+    return event_key(event)
+
+
+class EventCoalescer(object):
+    """ Collapses the events sharing a key, keeping the latest one, until
+        the window closes: ``window`` seconds after its first event, or when
+        it holds ``max_items`` distinct keys.
+
+        Events for which ``key`` returns ``None`` are never collapsed.
+
+        Args:
+            window (float): seconds a window stays open.
+            max_items (int): distinct keys a window holds.
+            key (callable): key of an event, :func:`.item_key` by default.
+
+        Attributes:
+            received (int): events added.
+            emitted (int): events handed over after coalescing.
+    """
+
+    def __init__(self, window=1.0, max_items=1000, key=None):
+        self.window = window
+        self.max_items = max_items
+        self.key = key or item_key
+        self.received = 0
+        self.emitted = 0
+        # key -> [event, count, first id], ordered by latest update
+        self._pending = OrderedDict()
+        self._opened = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def merged(self):
+        """ int: events dropped in favour of a later one with the same key. """
+        return self.received - self.emitted - len(self._pending)
+
+    def remaining(self):
+        """ Returns the seconds before the window closes, ``None`` when it is
+            empty.
+
+            Returns:
+                float
+        """
+        if self._opened is None:
+            return None
+        return max(0.0, self._opened + self.window - time.monotonic())
+
+    def add(self, event):
+        """ Adds an event to the window.
+
+            Returns:
+                List[:obj:`.Coalesced`]: the window when ``event`` closed it,
+                otherwise ``None``.
+        """
+        self.received += 1
+        key = self.key(event)
+        if key is None:
+            key = object()
+        entry = self._pending.get(key)
+        if entry is None:
+            if self._opened is None:
+                self._opened = time.monotonic()
+            self._pending[key] = [event, 1, event.get('id')]
+        else:
+            entry[0] = event
+            entry[1] += 1
+            self._pending.move_to_end(key)
+
+        if len(self._pending) >= self.max_items or self.remaining() == 0:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """ Closes the window.
+
+            Returns:
+                List[:obj:`.Coalesced`]: in order of their latest event.
+        """
+        batch = [Coalesced(k, event, count, first_id)
+                 for k, (event, count, first_id) in self._pending.items()]
+        self._pending.clear()
+        self._opened = None
+        self.emitted += len(batch)
+        return batch
+
+    def stats(self):
+        """ Returns the coalescer counters.
+
+            Returns:
+                dict
+        """
+        return {'received': self.received,
+                'emitted': self.emitted,
+                'merged': self.merged,
+                'pending': len(self._pending)}
+
+
+def coalesce(events, window=1.0, max_items=1000, key=None):
+    """ Coalesces an event stream into batches, see :class:`.EventCoalescer`.
+
+        A generator such as :class:`syncthing.Events` can only close a window
+        when its next event arrives. An :class:`syncthing.pump.EventPump` is
+        read with timeouts instead, so windows close on time even when the
+        stream goes quiet.
+
+        Args:
+            events (iterable[dict] or :obj:`syncthing.pump.EventPump`)
+            window (float)
+            max_items (int)
+            key (callable)
+
+        Returns:
+            generator[List[:obj:`.Coalesced`]]
+    """
+    coalescer = EventCoalescer(window, max_items, key)
+    get_batch = getattr(events, 'get_batch', None)
+
+    if get_batch is None:
+        for event in events:
+            batch = coalescer.add(event)
+            if batch:
+                yield batch
+    else:
+        while True:
+            received = get_batch(timeout=coalescer.remaining())
+            for event in received:
+                batch = coalescer.add(event)
+                if batch:
+                    yield batch
+            if coalescer.remaining() == 0:
+                yield coalescer.flush()
+            if not received and not events.running and not events.depth:
+                break
+
+    if len(coalescer):
+        yield coalescer.flush()
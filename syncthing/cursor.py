@@ -0,0 +1,176 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Persistent positions of :class:`syncthing.Events` streams.
+
+    .. code-block:: python
+
+       store = FileCursorStore('/var/lib/myapp/events.cursor')
+       for event in syncthing.events(cursor_store=store):
+           handle(event)
+"""
+from __future__ import unicode_literals
+
+import os
+import abc
+import json
+import time
+import tempfile
+import threading
+from collections import namedtuple
+
+__all__ = ['Cursor', 'CursorStore', 'MemoryCursorStore', 'FileCursorStore']
+
+Cursor = namedtuple('Cursor', 'last_seen_id, start_time')
+"""tuple[int,str]: the id of the last event handed to the consumer, and the
+``startTime`` of the Syncthing process that numbered it. Event ids restart
+from 1 with every Syncthing process, so a cursor is only valid for the
+process it was saved from."""
+
+
+class CursorStore(abc.ABC):
+    """ Where event streams checkpoint their :obj:`.Cursor`, one per stream
+        key (the endpoint and its event filters).
+
+        Subclasses implement :meth:`.load` and :meth:`.save`; a store that
+        defers writing saved cursors out also overrides :meth:`.flush`,
+        which streams call when they stop.
+    """
+
+    @abc.abstractmethod
+    def load(self, key):
+        """ Returns the saved :obj:`.Cursor` of ``key``, or ``None``. """
+
+    @abc.abstractmethod
+    def save(self, key, cursor):
+        """ Saves the :obj:`.Cursor` of ``key``. """
+
+    def flush(self):
+        """ Makes every saved cursor durable. """
+
+    def close(self):
+        """ Flushes the store. """
+        self.flush()
+
+
+class MemoryCursorStore(CursorStore):
+    """ Keeps cursors in memory, e.g. to share the position of a stream
+        between successive :class:`syncthing.Events` instances of a process.
+    """
+
+    def __init__(self):
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        with self._lock:
+            return self._cursors.get(key)
+
+    def save(self, key, cursor):
+        with self._lock:
+            self._cursors[key] = Cursor(*cursor)
+
+
+class FileCursorStore(CursorStore):
+    """ Keeps cursors in a small JSON file.
+
+        Every save replaces the file atomically (write to a temporary file,
+        then rename), so it never holds a partial document. ``fsync`` is what
+        makes a save survive a power loss, and it is expensive; it is batched
+        to at most one every ``fsync_interval`` seconds, and forced by
+        :meth:`.flush` and :meth:`.close`, which :class:`syncthing.Events`
+        calls when the stream stops. An unreadable file is treated as
+        empty: the stream then starts over from Syncthing's event buffer
+        rather than skip events.
+
+        Args:
+            path (str): cursor file, created on first save.
+            fsync_interval (float): seconds between two ``fsync``; ``0``
+                syncs every save.
+    """
+
+    def __init__(self, path, fsync_interval=1.0):
+        self.path = os.path.abspath(path)
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._cursors = self._read()
+        self._synced_at = time.monotonic()
+        self._unsynced = False
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                doc = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if not isinstance(doc, dict):
+            return {}
+        return {k: Cursor(*v) for k, v in doc.items()
+                if isinstance(v, list) and len(v) == 2}
+
+    def load(self, key):
+        with self._lock:
+            return self._cursors.get(key)
+
+    def save(self, key, cursor):
+        with self._lock:
+            self._cursors[key] = Cursor(*cursor)
+            due = time.monotonic() - self._synced_at >= self.fsync_interval
+            self._write(fsync=due)
+
+    def flush(self):
+        with self._lock:
+            if self._unsynced:
+                self._write(fsync=True)
+
+    def _write(self, fsync):
+        directory, name = os.path.split(self.path)
+        fd, tmp = tempfile.mkstemp(prefix='.%s.' % name, suffix='.tmp',
+                                   dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({k: list(v) for k, v in self._cursors.items()}, f,
+                          sort_keys=True)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+        if fsync:
+            self._fsync_directory(directory)
+            self._synced_at = time.monotonic()
+        self._unsynced = not fsync
+
+    @staticmethod
+    def _fsync_directory(directory):
+        # makes the rename itself durable, not supported everywhere (Windows)
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
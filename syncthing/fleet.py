@@ -0,0 +1,208 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Concurrent fan-out of the same call across many Syncthing nodes.
+
+    .. code-block:: python
+
+       fleet = SyncthingFleet({
+           'alpha': Syncthing(KEY_A, 'alpha.lan'),
+           'beta': {'api_key': KEY_B, 'host': 'beta.lan'},
+       }, max_workers=16, deadline=15.0)
+
+       for name, result in fleet.system.status().items():
+           if result.error is None:
+               print(name, result.value['uptime'])
+"""
+from __future__ import unicode_literals
+
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from syncthing import Syncthing, SyncthingError, _deadline
+
+__all__ = ['NodeResult', 'FleetResults', 'SyncthingFleet']
+
+NodeResult = namedtuple('NodeResult', 'value, error, elapsed')
+"""tuple[object,Exception,float]: the outcome of a call on one node, exactly
+one of ``value`` or ``error`` is meaningful. ``elapsed`` is in seconds. """
+
+DEFAULT_MAX_WORKERS = 32
+
+
+class FleetResults(dict):
+    """ ``dict`` of node name to :obj:`.NodeResult`. """
+
+    @property
+    def ok(self):
+        """ dict: node name to returned value, for the nodes that succeeded. """
+        return {k: v.value for k, v in self.items() if v.error is None}
+
+    @property
+    def failed(self):
+        """ dict: node name to raised exception, for the nodes that failed. """
+        return {k: v.error for k, v in self.items() if v.error is not None}
+
+
+class _FleetCall(object):
+    """ Attribute path on every node of a fleet, calling it fans out. """
+
+    def __init__(self, fleet, path):
+        self._fleet = fleet
+        self._path = path
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _FleetCall(self._fleet, self._path + (name,))
+
+    def __call__(self, *args, **kwargs):
+        path = self._path
+
+        def invoke(client):
+            target = client
+            for name in path:
+                target = getattr(target, name)
+            return target(*args, **kwargs)
+
+        return self._fleet.call(invoke)
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, '.'.join(self._path))
+
+
+class SyncthingFleet(object):
+    """ Runs the same call against many :class:`syncthing.Syncthing` nodes
+        concurrently on a bounded pool of worker threads.
+
+        Any attribute path of :class:`syncthing.Syncthing` can be called on
+        the fleet, e.g. ``fleet.system.status()`` or
+        ``fleet.db.completion(device, folder)``, and returns a
+        :class:`.FleetResults`; exceptions raised by a node are collected
+        instead of propagated.
+
+        Args:
+            nodes (dict or list): node name to a :class:`syncthing.Syncthing`
+                instance or to the keyword arguments used to build one. A
+                plain list of instances is named by ``host:port``.
+            max_workers (int): size of the worker pool, defaults to the
+                number of nodes capped at 32.
+            deadline (float): seconds the whole fan-out may take; nodes that
+                have not answered by then report a :class:`.SyncthingError`.
+                ``None`` waits for every node. The requests a call sends
+                have their timeout cut to what is left of the deadline, and
+                are not retried past it, so a dead node frees its worker
+                soon after; time ``fn`` spends outside of requests still
+                holds a worker until ``fn`` returns.
+    """
+
+    def __init__(self, nodes, max_workers=None, deadline=None):
+        if not isinstance(nodes, dict):
+            nodes = {'%s:%s' % (n.host, n.port): n for n in nodes}
+
+        self.nodes = {}
+        for name, node in nodes.items():
+            if isinstance(node, dict):
+                node = Syncthing(**node)
+            self.nodes[name] = node
+
+        if max_workers is None:
+            max_workers = max(1, min(DEFAULT_MAX_WORKERS, len(self.nodes)))
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _FleetCall(self, (name,))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def call(self, fn, deadline=None):
+        """ Calls ``fn(node)`` for every node concurrently.
+
+            Args:
+                fn (callable): receives a :class:`syncthing.Syncthing`.
+                deadline (float): overrides the fleet-wide deadline.
+
+            Returns:
+                :class:`.FleetResults`
+        """
+        if deadline is None:
+            deadline = self.deadline
+
+        started = time.monotonic()
+
+        def timed(node):
+            begin = time.monotonic()
+            if deadline is not None:
+                _deadline.at = started + deadline
+            try:
+                return NodeResult(fn(node), None, time.monotonic() - begin)
+            except Exception as e:
+                return NodeResult(None, e, time.monotonic() - begin)
+            finally:
+                _deadline.at = None
+
+        futures = {name: self._executor.submit(timed, node)
+                   for name, node in self.nodes.items()}
+        wait(futures.values(), timeout=deadline)
+
+        results = FleetResults()
+        for name, future in futures.items():
+            if future.done():
+                results[name] = future.result()
+            else:
+                future.cancel()
+                err = SyncthingError('deadline of %.2fs exceeded' % deadline)
+                results[name] = NodeResult(None, err,
+                                           time.monotonic() - started)
+        return results
+
+    def health(self):
+        """ Returns the circuit breaker of every node, without sending any
+            request. A node built with ``breaker=True`` whose breaker is
+            ``'open'`` fails calls immediately with a
+            :class:`syncthing.CircuitOpenError` instead of waiting for its
+            timeout.
+
+            Returns:
+                dict: node name to
+                :meth:`~syncthing.breaker.CircuitBreaker.stats`, ``None`` for
+                the nodes without a breaker.
+        """
+        return {name: node.breaker.stats() if node.breaker else None
+                for name, node in self.nodes.items()}
+
+    def close(self):
+        """ Stops the worker pool and closes every node's connections.
+
+            Returns:
+                None
+        """
+        self._executor.shutdown(wait=False)
+        for node in self.nodes.values():
+            node.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
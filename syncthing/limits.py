@@ -0,0 +1,395 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Client-side rate limiting and concurrency caps.
+
+    .. code-block:: python
+
+       limiter = RateLimiter({'/rest/db/': {'rate': 20, 'max_in_flight': 4}},
+                             max_wait=5.0)
+       s = Syncthing(API_KEY, limiter=limiter)
+       s.db.scan('my-folder')
+       print(limiter.stats()['/rest/db/scan']['wait'])
+"""
+from __future__ import unicode_literals
+
+import time
+import asyncio
+import threading
+from collections import deque
+
+from syncthing.metrics import LatencyHistogram
+
+__all__ = ['DEFAULT_LIMITS', 'TokenBucket', 'Limit', 'Permit', 'RateLimiter']
+
+DEFAULT_LIMITS = {
+    '/rest/db/status': {'rate': 5.0, 'burst': 10, 'max_in_flight': 2},
+    '/rest/db/scan': {'rate': 1.0, 'burst': 5, 'max_in_flight': 1},
+    '/rest/db/browse': {'max_in_flight': 2},
+}
+"""dict: limits of the endpoints expensive for Syncthing: a folder status
+walks the whole index, a scan hashes changed files and a browse builds the
+folder tree."""
+
+
+class TokenBucket(object):
+    """ Allows ``rate`` requests per second on average, and bursts of up to
+        ``burst`` requests.
+
+        Args:
+            rate (float): tokens added per second.
+            burst (int): capacity, ``max(1, rate)`` by default.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """ Takes a token, possibly ahead of time.
+
+            Args:
+                max_wait (float): longest acceptable wait, unbounded when
+                    ``None``.
+
+            Returns:
+                float: seconds to wait before using the token, ``None``
+                without taking one when that would exceed ``max_wait``.
+        """
+        with self._lock:
+            self._refill()
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            # goes negative while requests are queued
+            self._tokens -= 1
+            return wait
+
+    def refund(self):
+        """ Gives back a token taken by :meth:`.reserve` for a request that
+            was not sent after all.
+
+            Returns:
+                None
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens +
+                           (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class _Slots(object):
+    """ Semaphore waited for by threads and coroutines alike, so one
+        :class:`.RateLimiter` can serve blocking and asynchronous clients.
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        # (loop, future) of the waiting coroutines
+        self._futures = deque()
+
+    def acquire(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < self.value,
+                                       timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    async def acquire_async(self, timeout=None):
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self.in_flight < self.value:
+                self.in_flight += 1
+                return True
+            if timeout is not None and timeout <= 0:
+                return False
+            waiter = (loop, loop.create_future())
+            self._futures.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+            return True
+        except asyncio.TimeoutError:
+            with self._cond:
+                if waiter in self._futures:
+                    self._futures.remove(waiter)
+            # otherwise the slot was handed over, `_hand_over` releases it
+            return False
+        except asyncio.CancelledError:
+            with self._cond:
+                if waiter in self._futures:
+                    self._futures.remove(waiter)
+            raise
+
+    def release(self):
+        with self._cond:
+            if self._futures:
+                # the slot goes straight to a coroutine, still in flight
+                loop, future = self._futures.popleft()
+                loop.call_soon_threadsafe(self._hand_over, future)
+            else:
+                self.in_flight -= 1
+                self._cond.notify()
+
+    def _hand_over(self, future):
+        if future.done():
+            # its waiter gave up meanwhile
+            self.release()
+        else:
+            future.set_result(True)
+
+
+class Limit(object):
+    """ Limits of the requests to one endpoint, or one class of endpoints.
+
+        Args:
+            rate (float): requests per second, unlimited when ``None``.
+            burst (int): requests above ``rate`` allowed at once.
+            max_in_flight (int): requests awaiting their response at once,
+                unlimited when ``None``.
+
+        Attributes:
+            acquired (int): requests let through.
+            rejected (int): requests refused rather than delayed.
+            wait (:obj:`syncthing.metrics.LatencyHistogram`): time the
+                requests let through waited.
+    """
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.slots = _Slots(max_in_flight) if max_in_flight else None
+        self.acquired = 0
+        self.rejected = 0
+        self.wait = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '%s(rate=%r, burst=%r, max_in_flight=%r)' % (
+            self.__class__.__name__, self.rate, self.burst,
+            self.max_in_flight)
+
+    @property
+    def in_flight(self):
+        """ int: requests let through and not released yet. """
+        return self.slots.in_flight if self.slots is not None else 0
+
+    def _count(self, permit):
+        with self._lock:
+            if permit is None:
+                self.rejected += 1
+            else:
+                self.acquired += 1
+                self.wait.record(permit.waited)
+        return permit
+
+    def stats(self):
+        """ Returns the counters and the wait summary.
+
+            Returns:
+                dict
+        """
+        with self._lock:
+            return {'acquired': self.acquired,
+                    'rejected': self.rejected,
+                    'in_flight': self.in_flight,
+                    'wait': self.wait.summary()}
+
+
+class Permit(object):
+    """ Leave to send a request, to :meth:`.release` once it is answered.
+
+        Attributes:
+            limit (:obj:`.Limit`): ``None`` for an unlimited endpoint.
+            waited (float): seconds spent waiting for it.
+    """
+
+    __slots__ = ('limit', 'waited')
+
+    def __init__(self, limit, waited=0.0):
+        self.limit = limit
+        self.waited = waited
+
+    def release(self):
+        """ Frees the in-flight slot taken by the request.
+
+            Returns:
+                None
+        """
+        if self.limit is not None and self.limit.slots is not None:
+            self.limit.slots.release()
+            self.limit = None
+
+
+class RateLimiter(object):
+    """ Rate limits and concurrency caps of the requests a client sends to a
+        node; give each client (each host) its own.
+
+        ``limits`` maps a full endpoint path, or a prefix ending with ``/``
+        standing for a class of endpoints, to a :class:`.Limit` or the
+        keyword arguments of one. An endpoint follows its own limit, else
+        the one of its longest matching prefix, else ``default``. They are
+        added to :data:`.DEFAULT_LIMITS`, ``None`` lifts a default limit.
+
+        When a request cannot be sent right away, it waits for its turn;
+        unless ``block`` is false, or its turn is more than ``max_wait``
+        seconds away, in which case the client raises a
+        :class:`syncthing.RateLimitError`.
+
+        Args:
+            limits (dict)
+            default (:obj:`.Limit` or dict): limit of the other endpoints,
+                unlimited when ``None``.
+            block (bool): whether requests wait for their turn.
+            max_wait (float): longest wait, unbounded when ``None``.
+    """
+
+    def __init__(self, limits=None, default=None, block=True, max_wait=None):
+        merged = dict(DEFAULT_LIMITS)
+        merged.update(limits or {})
+        self.limits = {key: self._limit(spec) for key, spec in merged.items()
+                       if spec is not None}
+        self.default = self._limit(default) if default is not None else None
+        self.block = block
+        self.max_wait = max_wait
+        self._prefixes = sorted((k for k in self.limits if k.endswith('/')),
+                                key=len, reverse=True)
+        self._resolved = {}
+
+    @staticmethod
+    def _limit(spec):
+        return spec if isinstance(spec, Limit) else Limit(**spec)
+
+    def limit_for(self, endpoint):
+        """ Returns the limit an endpoint follows.
+
+            Returns:
+                :obj:`.Limit`: ``None`` when unlimited.
+        """
+        try:
+            return self._resolved[endpoint]
+        except KeyError:
+            pass
+        limit = self.limits.get(endpoint)
+        if limit is None:
+            for prefix in self._prefixes:
+                if endpoint.startswith(prefix):
+                    limit = self.limits[prefix]
+                    break
+            else:
+                limit = self.default
+        self._resolved[endpoint] = limit
+        return limit
+
+    def _max_wait(self):
+        return self.max_wait if self.block else 0.0
+
+    def acquire(self, endpoint):
+        """ Waits for the turn of a request.
+
+            Returns:
+                :obj:`.Permit`: ``None`` when the request is refused.
+        """
+        limit = self.limit_for(endpoint)
+        if limit is None:
+            return Permit(None)
+        max_wait = self._max_wait()
+        started = time.monotonic()
+
+        delay = None
+        if limit.bucket is not None:
+            delay = limit.bucket.reserve(max_wait)
+            if delay is None:
+                return limit._count(None)
+        granted = False
+        try:
+            if delay:
+                time.sleep(delay)
+            if limit.slots is not None:
+                timeout = None
+                if max_wait is not None:
+                    timeout = max(0.0, max_wait - (time.monotonic() - started))
+                granted = limit.slots.acquire(timeout)
+            else:
+                granted = True
+        finally:
+            if not granted and delay is not None:
+                # refused requests don't spend the rate budget
+                limit.bucket.refund()
+        if not granted:
+            return limit._count(None)
+        return limit._count(Permit(limit, time.monotonic() - started))
+
+    async def acquire_async(self, endpoint):
+        """ Coroutine version of :meth:`.acquire`.
+
+            Returns:
+                :obj:`.Permit`
+        """
+        limit = self.limit_for(endpoint)
+        if limit is None:
+            return Permit(None)
+        max_wait = self._max_wait()
+        started = time.monotonic()
+
+        delay = None
+        if limit.bucket is not None:
+            delay = limit.bucket.reserve(max_wait)
+            if delay is None:
+                return limit._count(None)
+        granted = False
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            if limit.slots is not None:
+                timeout = None
+                if max_wait is not None:
+                    timeout = max(0.0, max_wait - (time.monotonic() - started))
+                granted = await limit.slots.acquire_async(timeout)
+            else:
+                granted = True
+        finally:
+            if not granted and delay is not None:
+                limit.bucket.refund()
+        if not granted:
+            return limit._count(None)
+        return limit._count(Permit(limit, time.monotonic() - started))
+
+    def stats(self):
+        """ Returns :meth:`Limit.stats` of every limit used so far, by the
+            endpoint or prefix it was configured for (``'*'`` for the
+            default).
+
+            Returns:
+                dict
+        """
+        return {key: limit.stats()
+                for key, limit in list(self.limits.items()) +
+                [('*', self.default)]
+                if limit is not None and limit.acquired + limit.rejected}
@@ -0,0 +1,459 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Instrumentation of the HTTP requests a client sends.
+
+    .. code-block:: python
+
+       metrics = MetricsCollector()
+       s = Syncthing(API_KEY, hooks=Hooks(metrics))
+       s.system.status()
+
+       print(metrics.snapshot()[('GET', '/rest/system/status')]['latency'])
+       print(metrics.prometheus())
+"""
+from __future__ import unicode_literals
+
+import math
+import time
+import logging
+import threading
+from collections import Counter
+
+__all__ = ['RequestInfo', 'Hooks', 'LatencyHistogram', 'MetricsCollector',
+           'PROMETHEUS_BUCKETS']
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                      1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+"""tuple: upper bounds, in seconds, of the exported latency buckets."""
+
+
+class RequestInfo(object):
+    """ A request as seen by the hooks.
+
+        Attributes:
+            method (str): ``'GET'``, ``'POST'``, ...
+            endpoint (str): full path, e.g. ``'/rest/db/status'``.
+            params (dict): query parameters.
+            bytes_sent (int): size of the request body.
+            started (float): :func:`time.perf_counter` at the start.
+            elapsed (float): seconds until the response or the error.
+            queued (float): seconds the request waited for its turn under
+                the client's :class:`~syncthing.limits.RateLimiter`, before
+                ``started``.
+            status (int): HTTP status, ``None`` without a response.
+            bytes_received (int): size of the response body.
+            context (dict): free for the hooks to keep per-request state.
+    """
+
+    __slots__ = ('method', 'endpoint', 'params', 'bytes_sent', 'started',
+                 'elapsed', 'queued', 'status', 'bytes_received', 'context')
+
+    def __init__(self, method, endpoint, params=None, bytes_sent=0,
+                 queued=0.0):
+        self.method = method
+        self.endpoint = endpoint
+        self.params = params
+        self.bytes_sent = bytes_sent
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.queued = queued
+        self.status = None
+        self.bytes_received = 0
+        self.context = {}
+
+    def __repr__(self):
+        return '<RequestInfo %s %s status=%r elapsed=%r>' % (
+            self.method, self.endpoint, self.status, self.elapsed)
+
+
+class Hooks(object):
+    """ Callbacks run around every HTTP request of a client, see the
+        ``hooks`` argument of :class:`syncthing.Syncthing`.
+
+        * ``pre_request(info)``: before the request is sent.
+        * ``post_response(info, response)``: once a response was received,
+          whatever its status.
+        * ``on_error(info, exception)``: when no response was received, or
+          a streamed response failed.
+
+        Callbacks run on the thread (or event loop) sending the request and
+        must be quick; exceptions are logged and swallowed.
+
+        Args:
+            observers: objects implementing any of the three callbacks as
+                methods, e.g. a :class:`.MetricsCollector`.
+    """
+
+    def __init__(self, *observers):
+        self._pre_request = []
+        self._post_response = []
+        self._on_error = []
+        for observer in observers:
+            self.add(observer)
+
+    def add(self, observer):
+        """ Registers the callbacks an object implements.
+
+            Returns:
+                None
+        """
+        self.register(getattr(observer, 'pre_request', None),
+                      getattr(observer, 'post_response', None),
+                      getattr(observer, 'on_error', None))
+
+    def remove(self, observer):
+        """ Unregisters the callbacks of an object added with :meth:`.add`.
+
+            Returns:
+                None
+        """
+        for name in ('pre_request', 'post_response', 'on_error'):
+            callback = getattr(observer, name, None)
+            callbacks = getattr(self, '_' + name)
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def register(self, pre_request=None, post_response=None, on_error=None):
+        """ Registers plain callables.
+
+            Returns:
+                None
+        """
+        for callbacks, callback in ((self._pre_request, pre_request),
+                                    (self._post_response, post_response),
+                                    (self._on_error, on_error)):
+            if callback is not None:
+                callbacks.append(callback)
+
+    def request_started(self, method, endpoint, params=None, body=None,
+                        queued=0.0):
+        """ Called by the client before sending a request.
+
+            Returns:
+                :obj:`.RequestInfo`
+        """
+        info = RequestInfo(method, endpoint, params, len(body or ''), queued)
+        for callback in self._pre_request:
+            self._call(callback, info)
+        return info
+
+    def request_finished(self, info, response, status, bytes_received):
+        """ Called by the client once a response was received.
+
+            Returns:
+                None
+        """
+        info.elapsed = time.perf_counter() - info.started
+        info.status = status
+        info.bytes_received = bytes_received
+        for callback in self._post_response:
+            self._call(callback, info, response)
+
+    def request_failed(self, info, exc):
+        """ Called by the client when a request failed.
+
+            Returns:
+                None
+        """
+        info.elapsed = time.perf_counter() - info.started
+        response = getattr(exc, 'response', None)
+        info.status = getattr(response, 'status_code',
+                              getattr(exc, 'status', None))
+        for callback in self._on_error:
+            self._call(callback, info, exc)
+
+    @staticmethod
+    def _call(callback, *args):
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception('request hook %r failed', callback)
+
+
+class LatencyHistogram(object):
+    """ HDR-style histogram of durations: microsecond buckets for short
+        durations, then log-linear ones so every value is kept within
+        ``10 ** -significant_digits`` of its magnitude. Memory grows with
+        the spread of the values, not with their number.
+
+        Args:
+            significant_digits (int): decimal digits of precision.
+
+        Attributes:
+            count (int): values recorded.
+            total (float): sum of the values, in seconds.
+            min (float)
+            max (float)
+    """
+
+    def __init__(self, significant_digits=2):
+        self._bits = int(math.ceil(math.log(10 ** significant_digits, 2)))
+        # (shift, mantissa) -> count
+        self._counts = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        """ Records a duration.
+
+            Returns:
+                None
+        """
+        micros = max(0, int(seconds * 1e6))
+        shift = max(0, micros.bit_length() - self._bits - 1)
+        self._counts[(shift, micros >> shift)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self):
+        """ float: the average, ``None`` when empty. """
+        return self.total / self.count if self.count else None
+
+    @staticmethod
+    def _highest(bucket):
+        # highest value, in microseconds, equivalent to the bucket
+        shift, mantissa = bucket
+        return ((mantissa + 1) << shift) - 1
+
+    def percentile(self, q):
+        """ Returns the value below which a fraction ``q`` of the durations
+            fall.
+
+            Args:
+                q (float): from ``0`` to ``1``, e.g. ``0.99``.
+
+            Returns:
+                float: seconds, ``None`` when empty.
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(math.ceil(q * self.count)))
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= rank:
+                return min(self._highest(bucket) / 1e6, self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        """ Counts the durations at or below each bound.
+
+            Args:
+                bounds (List[float]): increasing, in seconds.
+
+            Returns:
+                List[int]
+        """
+        counts = [0] * len(bounds)
+        for bucket, n in self._counts.items():
+            value = self._highest(bucket) / 1e6
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    counts[i] += n
+                    break
+        total = 0
+        for i, n in enumerate(counts):
+            total += n
+            counts[i] = total
+        return counts
+
+    def summary(self):
+        """ Returns the count, mean, extremes and usual percentiles.
+
+            Returns:
+                dict
+        """
+        return {'count': self.count,
+                'mean': self.mean,
+                'min': self.min,
+                'max': self.max,
+                'p50': self.percentile(0.5),
+                'p90': self.percentile(0.9),
+                'p99': self.percentile(0.99),
+                'p999': self.percentile(0.999)}
+
+
+class _EndpointMetrics(object):
+
+    __slots__ = ('requests', 'errors', 'statuses', 'bytes_sent',
+                 'bytes_received', 'latency', 'queued')
+
+    def __init__(self, significant_digits):
+        self.requests = 0
+        self.errors = 0
+        self.statuses = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = LatencyHistogram(significant_digits)
+        self.queued = LatencyHistogram(significant_digits)
+
+
+class MetricsCollector(object):
+    """ Hook observer keeping per ``(method, endpoint)`` counters, byte
+        counts and latency histograms; one collector can observe several
+        clients.
+
+        A request counts as an error when it got no response or a status of
+        400 or more.
+
+        Args:
+            significant_digits (int): precision of the histograms.
+            buckets (List[float]): latency buckets of :meth:`.prometheus`.
+            namespace (str): prefix of the exported metric names.
+    """
+
+    def __init__(self, significant_digits=2, buckets=PROMETHEUS_BUCKETS,
+                 namespace='syncthing_client'):
+        self.significant_digits = significant_digits
+        self.buckets = tuple(buckets)
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def post_response(self, info, response):
+        """ :class:`.Hooks` callback. """
+        self._record(info, info.status >= 400)
+
+    def on_error(self, info, exc):
+        """ :class:`.Hooks` callback. """
+        self._record(info, True)
+
+    def _record(self, info, failed):
+        key = (info.method, info.endpoint)
+        with self._lock:
+            metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = self._endpoints[key] = _EndpointMetrics(
+                    self.significant_digits)
+            metrics.requests += 1
+            metrics.errors += failed
+            metrics.statuses[info.status] += 1
+            metrics.bytes_sent += info.bytes_sent
+            metrics.bytes_received += info.bytes_received
+            metrics.latency.record(info.elapsed)
+            metrics.queued.record(info.queued)
+
+    def reset(self):
+        """ Forgets everything recorded so far.
+
+            Returns:
+                None
+        """
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self):
+        """ Returns the metrics recorded so far.
+
+            Returns:
+                dict: ``{(method, endpoint): {'requests', 'errors',
+                'statuses', 'bytes_sent', 'bytes_received', 'latency',
+                'queued'}}``, ``latency`` and ``queued`` (the wait for the
+                rate limiter) being :meth:`LatencyHistogram.summary` in
+                seconds and ``statuses`` keyed by HTTP status, ``None`` for
+                requests without a response.
+        """
+        with self._lock:
+            return {key: {'requests': m.requests,
+                          'errors': m.errors,
+                          'statuses': dict(m.statuses),
+                          'bytes_sent': m.bytes_sent,
+                          'bytes_received': m.bytes_received,
+                          'latency': m.latency.summary(),
+                          'queued': m.queued.summary()}
+                    for key, m in self._endpoints.items()}
+
+    def prometheus(self):
+        """ Returns the metrics in the Prometheus text exposition format.
+
+            Returns:
+                str
+        """
+        ns = self.namespace
+        lines = []
+
+        def family(name, kind, help_):
+            lines.append('# HELP %s_%s %s' % (ns, name, help_))
+            lines.append('# TYPE %s_%s %s' % (ns, name, kind))
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            family('requests_total', 'counter',
+                   'Requests sent to Syncthing, by response status.')
+            for (method, endpoint), m in endpoints:
+                for status, n in sorted(m.statuses.items(),
+                                        key=lambda i: str(i[0])):
+                    lines.append('%s_requests_total{%s,status="%s"} %d' % (
+                        ns, _labels(method, endpoint),
+                        'none' if status is None else status, n))
+
+            family('errors_total', 'counter',
+                   'Requests without a response, or with a 4xx/5xx one.')
+            for (method, endpoint), m in endpoints:
+                lines.append('%s_errors_total{%s} %d' % (
+                    ns, _labels(method, endpoint), m.errors))
+
+            for name, attr, help_ in (
+                    ('request_bytes_total', 'bytes_sent',
+                     'Bytes of request bodies.'),
+                    ('response_bytes_total', 'bytes_received',
+                     'Bytes of response bodies.')):
+                family(name, 'counter', help_)
+                for (method, endpoint), m in endpoints:
+                    lines.append('%s_%s{%s} %d' % (
+                        ns, name, _labels(method, endpoint),
+                        getattr(m, attr)))
+
+            for name, attr, help_ in (
+                    ('request_duration_seconds', 'latency',
+                     'Time until the response, or the error.'),
+                    ('limiter_wait_seconds', 'queued',
+                     'Time waited for the client-side rate limiter.')):
+                family(name, 'histogram', help_)
+                for (method, endpoint), m in endpoints:
+                    labels = _labels(method, endpoint)
+                    histogram = getattr(m, attr)
+                    for bound, n in zip(self.buckets + (float('inf'),),
+                                        histogram.cumulative(self.buckets) +
+                                        [histogram.count]):
+                        lines.append('%s_%s_bucket{%s,le="%s"} %d' % (
+                            ns, name, labels, '+Inf' if math.isinf(bound)
+                            else repr(bound), n))
+                    lines.append('%s_%s_sum{%s} %r' % (
+                        ns, name, labels, histogram.total))
+                    lines.append('%s_%s_count{%s} %d' % (
+                        ns, name, labels, histogram.count))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(method, endpoint):
+    return 'method="%s",endpoint="%s"' % (_escape(method), _escape(endpoint))
@@ -0,0 +1,292 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Compact, ``__slots__`` based result records.
+
+    The API methods accepting ``typed=True`` return these instead of the
+    decoded JSON ``dict``. Each record stores its values in slots, which costs
+    a fraction of the memory of a ``dict``, converts its timestamps to
+    :class:`~datetime.datetime` on access, and rebuilds the original
+    document through :attr:`.Model.raw`.
+
+    .. code-block:: python
+
+       status = s.system.status(typed=True)
+       status.my_id, status.start_time
+       status['myID']   # item access by JSON key, like the dict form
+"""
+from __future__ import unicode_literals
+
+from syncthing import parse_datetime, string_types
+
+__all__ = ['Model', 'SystemStatus', 'Connection', 'FolderStatus',
+           'DeviceStats', 'FolderStats', 'FileInfo']
+
+# fills the slot of a key the document didn't have, shared by every record
+_MISSING = object()
+
+
+class _Field(object):
+    """ Descriptor of a field, ``None`` when its key was missing. """
+
+    __slots__ = ('slot',)
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        return None if value is _MISSING else value
+
+
+class _DateTimeField(_Field):
+    """ Descriptor of a timestamp field, parsed from its RFC 3339 string. """
+
+    __slots__ = ()
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if value is _MISSING:
+            return None
+        if isinstance(value, string_types):
+            # the slot keeps the exact string for `raw`, nanoseconds and all
+            return parse_datetime(value)
+        return value
+
+
+class Model(object):
+    """ Base class of the result records, see :func:`.model`. """
+
+    __slots__ = ('_extra',)
+
+    # (attribute, JSON key) pairs, (slot, JSON key) pairs, JSON key -> slot
+    _fields = ()
+    _slots = ()
+    _slot_of = {}
+
+    def __init__(self, raw):
+        get = raw.get
+        for slot, key in self._slots:
+            setattr(self, slot, get(key, _MISSING))
+        extra = None
+        if len(raw) > len(self._slots) or not all(map(
+                self._slot_of.__contains__, raw)):
+            extra = {k: v for k, v in raw.items() if k not in self._slot_of}
+        self._extra = extra or None
+
+    @classmethod
+    def map(cls, mapping):
+        """ Converts every value of ``mapping``, e.g. the per-device
+            dictionary returned by :meth:`syncthing.Statistics.device`.
+
+            Returns:
+                dict
+        """
+        if mapping is None:
+            return None
+        return {k: cls(v) for k, v in mapping.items()}
+
+    @property
+    def raw(self):
+        """ dict: the JSON document this record was built from. """
+        doc = {}
+        for slot, key in self._slots:
+            value = getattr(self, slot)
+            if value is not _MISSING:
+                doc[key] = value
+        if self._extra:
+            doc.update(self._extra)
+        return doc
+
+    def __getitem__(self, key):
+        slot = self._slot_of.get(key)
+        if slot is not None:
+            value = getattr(self, slot)
+            if value is not _MISSING:
+                return value
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if not isinstance(other, Model):
+            return NotImplemented
+        return type(self) is type(other) and self.raw == other.raw
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(
+            '%s=%r' % (attr, getattr(self, attr)) for attr, _ in self._fields))
+
+    def __getstate__(self):
+        return self.raw
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+
+def model(name, fields, datetimes=(), doc=None):
+    """ Builds a :class:`.Model` subclass, in the spirit of
+        :func:`collections.namedtuple`.
+
+        Args:
+            name (str): class name.
+            fields (List[tuple]): ``(attribute, JSON key)`` pairs.
+            datetimes (tuple): attributes holding RFC 3339 timestamps.
+            doc (str): class docstring.
+
+        Returns:
+            type
+    """
+    datetimes = frozenset(datetimes)
+    slots = []
+    namespace = {}
+    for attr, key in fields:
+        slot = '_' + attr
+        slots.append((slot, key))
+        field = _DateTimeField if attr in datetimes else _Field
+        namespace[attr] = field(slot)
+    namespace.update(__slots__=tuple(slot for slot, _ in slots),
+                     __doc__=doc,
+                     _fields=tuple(fields),
+                     _slots=tuple(slots),
+                     _slot_of={key: slot for slot, key in slots})
+    return type(str(name), (Model,), namespace)
+
+SystemStatus = model('SystemStatus', [
+    ('my_id', 'myID'),
+    ('start_time', 'startTime'),
+    ('uptime', 'uptime'),
+    ('alloc', 'alloc'),
+    ('sys', 'sys'),
+    ('goroutines', 'goroutines'),
+    ('cpu_percent', 'cpuPercent'),
+    ('path_separator', 'pathSeparator'),
+    ('tilde', 'tilde'),
+    ('discovery_enabled', 'discoveryEnabled'),
+    ('discovery_methods', 'discoveryMethods'),
+    ('discovery_errors', 'discoveryErrors'),
+    ('connection_service_status', 'connectionServiceStatus'),
+    ('ur_version_max', 'urVersionMax'),
+], datetimes=('start_time',),
+    doc='Record of :meth:`syncthing.System.status`.')
+
+Connection = model('Connection', [
+    ('at', 'at'),
+    ('address', 'address'),
+    ('client_version', 'clientVersion'),
+    ('connected', 'connected'),
+    ('paused', 'paused'),
+    ('type', 'type'),
+    ('crypto', 'crypto'),
+    ('in_bytes_total', 'inBytesTotal'),
+    ('out_bytes_total', 'outBytesTotal'),
+], datetimes=('at',),
+    doc='One device (or the total) of :meth:`syncthing.System.connections`.')
+
+FolderStatus = model('FolderStatus', [
+    ('state', 'state'),
+    ('state_changed', 'stateChanged'),
+    ('global_bytes', 'globalBytes'),
+    ('global_deleted', 'globalDeleted'),
+    ('global_files', 'globalFiles'),
+    ('global_directories', 'globalDirectories'),
+    ('global_symlinks', 'globalSymlinks'),
+    ('local_bytes', 'localBytes'),
+    ('local_deleted', 'localDeleted'),
+    ('local_files', 'localFiles'),
+    ('local_directories', 'localDirectories'),
+    ('local_symlinks', 'localSymlinks'),
+    ('in_sync_bytes', 'inSyncBytes'),
+    ('in_sync_files', 'inSyncFiles'),
+    ('need_bytes', 'needBytes'),
+    ('need_files', 'needFiles'),
+    ('need_deletes', 'needDeletes'),
+    ('need_directories', 'needDirectories'),
+    ('need_symlinks', 'needSymlinks'),
+    ('ignore_patterns', 'ignorePatterns'),
+    ('invalid', 'invalid'),
+    ('pull_errors', 'pullErrors'),
+    ('sequence', 'sequence'),
+    ('version', 'version'),
+], datetimes=('state_changed',),
+    doc='Record of :meth:`syncthing.Database.status`.')
+
+DeviceStats = model('DeviceStats', [
+    ('last_seen', 'lastSeen'),
+    ('last_connection_duration', 'lastConnectionDurationS'),
+], datetimes=('last_seen',),
+    doc='One device of :meth:`syncthing.Statistics.device`.')
+
+FolderStats = model('FolderStats', [
+    ('last_scan', 'lastScan'),
+    ('last_file', 'lastFile'),
+], datetimes=('last_scan',),
+    doc='One folder of :meth:`syncthing.Statistics.folder`.')
+
+FileInfo = model('FileInfo', [
+    ('name', 'name'),
+    ('type', 'type'),
+    ('size', 'size'),
+    ('modified', 'modified'),
+    ('deleted', 'deleted'),
+    ('invalid', 'invalid'),
+    ('no_permissions', 'noPermissions'),
+    ('permissions', 'permissions'),
+    ('num_blocks', 'numBlocks'),
+    ('sequence', 'sequence'),
+    ('version', 'version'),
+], datetimes=('modified',),
+    doc='The ``global`` or ``local`` entry of :meth:`syncthing.Database.file`.')
+
+
+def connections(doc):
+    """ Converts a :meth:`syncthing.System.connections` response, keeping
+        its ``connections`` / ``total`` layout.
+
+        Returns:
+            dict
+    """
+    return {'connections': Connection.map(doc.get('connections')),
+            'total': Connection(doc.get('total') or {})}
+
+
+def file_info(doc):
+    """ Converts a :meth:`syncthing.Database.file` response, keeping its
+        ``availability`` / ``global`` / ``local`` layout.
+
+        Returns:
+            dict
+    """
+    return {'availability': doc.get('availability'),
+            'global': FileInfo(doc.get('global') or {}),
+            'local': FileInfo(doc.get('local') or {})}
@@ -0,0 +1,280 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Background long-polling of event streams.
+
+    .. code-block:: python
+
+       with EventPump(syncthing.events(), maxsize=5000,
+                      policy='drop-oldest') as pump:
+           for batch in pump:
+               handle(batch)
+"""
+from __future__ import unicode_literals
+
+import time
+import logging
+import threading
+from collections import deque
+
+__all__ = ['BLOCK', 'DROP_OLDEST', 'COALESCE', 'EventPump', 'event_key']
+
+logger = logging.getLogger(__name__)
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop-oldest'
+COALESCE = 'coalesce'
+
+
+def event_key(event):
+    """ Default coalescing key of an event: its type, and the folder, item
+        and device it is about when it carries them.
+
+        Returns:
+            tuple
+    """
+    data = event.get('data')
+    if not isinstance(data, dict):
+        return event.get('type'), None, None, None
+    return (event.get('type'), data.get('folder'), data.get('item'),
+            data.get('device') or data.get('id'))
+
+
+class EventPump(object):
+    """ Long-polls an event stream on a background thread and queues its
+        events, so the next request to Syncthing is in flight while the
+        consumer still processes the previous batch.
+
+        When the queue is full, ``policy`` decides what happens to the next
+        event:
+
+        * ``'block'``: the pump waits for the consumer, and stops polling.
+        * ``'drop-oldest'``: the oldest queued event is discarded.
+        * ``'coalesce'``: the queued event with the same ``key`` is replaced
+          by the new one, the oldest event is discarded when there is none.
+
+        Args:
+            events (:obj:`syncthing.Events`): the stream to pump; a generator
+                such as ``disk_events()`` works too, but cannot be
+                interrupted before its next event arrives.
+            maxsize (int): capacity of the queue.
+            policy (str): ``'block'``, ``'drop-oldest'`` or ``'coalesce'``.
+            batch_size (int): most events handed over at once.
+            key (callable): coalescing key of an event, :func:`.event_key` by
+                default. Keys must be hashable.
+
+        Attributes:
+            received (int): events read from the stream.
+            delivered (int): events handed to the consumer.
+            dropped (int): events discarded by ``'drop-oldest'`` or
+                ``'coalesce'``.
+            coalesced (int): events replaced by a newer one with the same key.
+            max_depth (int): highest queue depth seen.
+    """
+
+    def __init__(self, events, maxsize=1000, policy=BLOCK, batch_size=100,
+                 key=None):
+        if policy not in (BLOCK, DROP_OLDEST, COALESCE):
+            raise ValueError('unknown policy %r' % (policy,))
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.events = events
+        self.maxsize = maxsize
+        self.policy = policy
+        self.batch_size = batch_size
+        self.key = key or event_key
+
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+        # [enqueued at, event, coalescing key or None]
+        self._queue = deque()
+        # coalescing key -> its newest queued entry, under 'coalesce'
+        self._index = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._done = False
+        self._error = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __iter__(self):
+        """ Yields batches of events until the pump is stopped and drained. """
+        while True:
+            batch = self.get_batch()
+            if not batch:
+                return
+            yield batch
+
+    @property
+    def depth(self):
+        """ int: number of queued events. """
+        return len(self._queue)
+
+    @property
+    def lag(self):
+        """ float: seconds the oldest queued event has been waiting. """
+        with self._cond:
+            if not self._queue:
+                return 0.0
+            return time.monotonic() - self._queue[0][0]
+
+    @property
+    def running(self):
+        """ bool: whether the background thread is still polling. """
+        return self._thread is not None and not self._done
+
+    def start(self):
+        """ Starts polling on a daemon thread.
+
+            Returns:
+                :obj:`.EventPump`: ``self``.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='syncthing-event-pump')
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """ Stops polling. Queued events can still be read.
+
+            The thread finishes once the request in flight returns, which
+            for a long-poll can take as long as the stream's timeout.
+
+            Args:
+                timeout (float): seconds to wait for the thread.
+
+            Returns:
+                bool: whether the thread finished.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        stop = getattr(self.events, 'stop', None)
+        if stop is not None:
+            stop()
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def get_batch(self, max_items=None, timeout=None):
+        """ Takes up to ``max_items`` (``batch_size`` by default) queued
+            events, waiting for at least one.
+
+            Args:
+                max_items (int)
+                timeout (float): seconds to wait, forever when ``None``.
+
+            Returns:
+                List[dict]: empty when the timeout expired, or when the pump
+                is stopped and drained.
+
+            Raises:
+                SyncthingError: the error that ended the stream, once the
+                    events queued before it were read.
+        """
+        max_items = max_items or self.batch_size
+        with self._cond:
+            if not self._queue and not self._done:
+                if timeout is None:
+                    while not self._queue and not self._done:
+                        self._cond.wait()
+                else:
+                    self._cond.wait_for(lambda: self._queue or self._done,
+                                        timeout)
+            if not self._queue and self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            n = min(max_items, len(self._queue))
+            if self._index:
+                batch = [self._popleft()[1] for _ in range(n)]
+            else:
+                batch = [self._queue.popleft()[1] for _ in range(n)]
+            self.delivered += n
+            self._cond.notify_all()
+            return batch
+
+    def stats(self):
+        """ Returns the pump counters, along with its current depth and lag.
+
+            Returns:
+                dict
+        """
+        return {'received': self.received,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'depth': self.depth,
+                'max_depth': self.max_depth,
+                'lag': self.lag}
+
+    def _run(self):
+        try:
+            for event in self.events:
+                self._put(event)
+                if self._stopping:
+                    break
+        except Exception as e:
+            logger.warning('event pump stopped: %s', e)
+            self._error = e
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def _put(self, event):
+        key = self.key(event) if self.policy == COALESCE else None
+        with self._cond:
+            self.received += 1
+            queue = self._queue
+            if len(queue) >= self.maxsize:
+                if self.policy == BLOCK:
+                    while len(queue) >= self.maxsize and not self._stopping:
+                        self._cond.wait()
+                elif self.policy == COALESCE and key in self._index:
+                    # keep the wait time of the event being replaced
+                    self._index[key][1] = event
+                    self.coalesced += 1
+                    self.dropped += 1
+                    return
+                else:
+                    self._popleft()
+                    self.dropped += 1
+            entry = [time.monotonic(), event, key]
+            queue.append(entry)
+            if key is not None:
+                self._index[key] = entry
+            self.max_depth = max(self.max_depth, len(queue))
+            self._cond.notify_all()
+
+    def _popleft(self):
+        entry = self._queue.popleft()
+        # a newer duplicate may have taken over the key
+        if entry[2] is not None and self._index.get(entry[2]) is entry:
+            del self._index[entry[2]]
+        return entry
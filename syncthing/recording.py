@@ -0,0 +1,249 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Capture of event streams to gzip compressed JSON Lines, and their
+    replay.
+
+    .. code-block:: python
+
+       with EventRecorder('capture/events') as recorder:
+           for event in recorder.tee(syncthing.events()):
+               handle(event)
+
+       for event in EventReplayer('capture/events', speed=10):
+           handle(event)
+"""
+from __future__ import unicode_literals
+
+import os
+import re
+import glob
+import gzip
+import json
+import time
+import logging
+
+__all__ = ['EventRecorder', 'EventReplayer']
+
+logger = logging.getLogger(__name__)
+
+# the numbered part of a capture file name, after its prefix
+_CAPTURE_SUFFIX = re.compile(r'\.(\d+)\.jsonl\.gz$')
+
+
+class EventRecorder(object):
+    """ Writes events to ``<prefix>.<n>.jsonl.gz`` files, one JSON array
+        ``[received_at, event]`` per line, starting a new file every
+        ``max_bytes`` of uncompressed JSON.
+
+        Lines are buffered and compressed ``buffer_size`` bytes at a time;
+        :meth:`.flush` and :meth:`.close` write what is pending.
+
+        Args:
+            prefix (str): path of the files, without their suffix.
+            max_bytes (int): uncompressed size of a file, unbounded when
+                ``None``.
+            buffer_size (int): bytes buffered before a write.
+            compresslevel (int): gzip level, 1 (fastest) to 9 (smallest).
+
+        Attributes:
+            paths (List[str]): the files written so far.
+            count (int): events recorded.
+    """
+
+    def __init__(self, prefix, max_bytes=64 * 1024 * 1024,
+                 buffer_size=256 * 1024, compresslevel=6):
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.buffer_size = buffer_size
+        self.compresslevel = compresslevel
+        self.paths = []
+        self.count = 0
+        self._file = None
+        self._written = 0
+        self._buffer = []
+        self._buffered = 0
+        self._index = self._next_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _next_index(self):
+        # continues after the files of a previous capture
+        files = _capture_files(self.prefix)
+        return files[-1][0] + 1 if files else 0
+
+    def tee(self, events):
+        """ Records the events of a stream as they are consumed.
+
+            Args:
+                events (iterable[dict]): e.g. a :class:`syncthing.Events`
+                    or its ``disk_events()``.
+
+            Returns:
+                generator[dict]: ``events``, unchanged.
+        """
+        try:
+            for event in events:
+                self.write(event)
+                yield event
+        finally:
+            self.flush()
+
+    def write(self, event):
+        """ Records one event.
+
+            Returns:
+                None
+        """
+        line = json.dumps([time.time(), event], separators=(',', ':'),
+                          default=str) + '\n'
+        line = line.encode('utf-8')
+        pending = self._written + self._buffered
+        if self.max_bytes and pending and \
+                pending + len(line) > self.max_bytes:
+            self._rotate()
+        self._buffer.append(line)
+        self._buffered += len(line)
+        self.count += 1
+        if self._buffered >= self.buffer_size:
+            self._write_buffer()
+
+    def flush(self):
+        """ Compresses and writes the buffered events.
+
+            Returns:
+                None
+        """
+        self._write_buffer()
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        """ Flushes and closes the current file.
+
+            Returns:
+                None
+        """
+        self._write_buffer()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_buffer(self):
+        if not self._buffer:
+            return
+        if self._file is None:
+            path = '%s.%05d.jsonl.gz' % (self.prefix, self._index)
+            directory = os.path.dirname(path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._file = gzip.open(path, 'wb', self.compresslevel)
+            self._written = 0
+            self.paths.append(path)
+        self._file.write(b''.join(self._buffer))
+        self._written += self._buffered
+        self._buffer = []
+        self._buffered = 0
+
+    def _rotate(self):
+        self.close()
+        self._index += 1
+
+
+class EventReplayer(object):
+    """ Replays recorded events, streaming the files so a capture of any
+        size is read in constant memory.
+
+        Args:
+            source (str or List[str]): the ``prefix`` given to the
+                :class:`.EventRecorder`, or capture files.
+            speed (float): ``1`` replays at the recorded pace, ``10`` ten
+                times faster; as fast as possible when ``None``.
+
+        Attributes:
+            count (int): events replayed.
+    """
+
+    def __init__(self, source, speed=None):
+        if isinstance(source, (list, tuple)):
+            self.paths = list(source)
+        elif os.path.isfile(source):
+            self.paths = [source]
+        else:
+            self.paths = [path for _, path in _capture_files(source)]
+        self.speed = speed
+        self.count = 0
+        self.blocking = True
+
+    def __iter__(self):
+        self.blocking = True
+        started = first = None
+        for received, event in self.records():
+            if not self.blocking:
+                return
+            if self.speed:
+                if first is None:
+                    started, first = time.monotonic(), received
+                delay = started + (received - first) / self.speed - \
+                    time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.count += 1
+            yield event
+
+    def stop(self):
+        """ Ends the replay before the next event.
+
+            Returns:
+                None
+        """
+        self.blocking = False
+
+    def records(self):
+        """ Reads the capture without pacing.
+
+            Returns:
+                generator[tuple]: ``(received_at, event)``, ``received_at``
+                in seconds since the epoch.
+        """
+        for path in self.paths:
+            with gzip.open(path, 'rb') as f:
+                try:
+                    for line in f:
+                        if line.strip():
+                            received, event = json.loads(line.decode('utf-8'))
+                            yield received, event
+                except (EOFError, ValueError) as e:
+                    # the recorder did not close the file, e.g. it crashed
+                    logger.warning('truncated capture %s: %s', path, e)
+
+
+def _capture_files(prefix):
+    """ Returns the ``(index, path)`` of the files of a capture, in order;
+        other files sharing the prefix (``events.1.bak.jsonl.gz``) are left
+        out.
+    """
+    files = []
+    for path in glob.glob('%s.*.jsonl.gz' % glob.escape(prefix)):
+        m = _CAPTURE_SUFFIX.match(path, len(prefix))
+        if m is not None:
+            files.append((int(m.group(1)), path))
+    return sorted(files)
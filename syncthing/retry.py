@@ -0,0 +1,134 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Retrying of failed requests.
+
+    .. code-block:: python
+
+       retry = RetryPolicy(max_attempts=4, deadline=20.0,
+                           endpoints=['/rest/db/scan'])
+       s = Syncthing(API_KEY, retry=retry)
+       s.db.scan('my-folder')
+       print(retry.stats())
+"""
+from __future__ import unicode_literals
+
+import time
+import logging
+import threading
+
+from syncthing.backoff import Backoff
+
+__all__ = ['RetryPolicy']
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy(object):
+    """ When, and after how long, a client retries a failed request.
+
+        Requests are retried after a connection error, a timeout, or a
+        response whose status is in ``retry_on``. Only the ``methods``
+        considered idempotent are retried, plus the ``endpoints`` opted in
+        explicitly: a ``POST`` such as ``/rest/db/scan`` or
+        ``/rest/system/restart`` may have been carried out even though its
+        response was lost.
+
+        Args:
+            max_attempts (int): attempts of a request, the first included.
+            backoff (:obj:`syncthing.backoff.Backoff`): delays between
+                attempts, 0.1s doubling up to 5s with jitter by default.
+            retry_on (List[int]): HTTP statuses retried.
+            deadline (float): seconds after the first attempt past which no
+                attempt is started, unbounded when ``None``.
+            methods (List[str]): HTTP methods retried on any endpoint.
+            endpoints (List[str]): full paths, e.g. ``'/rest/db/scan'``,
+                retried whatever their method.
+
+        Attributes:
+            retries (int): attempts made after a failure.
+            give_ups (int): requests that still failed when retries ran out
+                (attempts or deadline).
+            recoveries (int): requests that succeeded after a retry.
+    """
+
+    def __init__(self, max_attempts=3, backoff=None, retry_on=(502, 503, 504),
+                 deadline=None, methods=('GET',), endpoints=()):
+        self.max_attempts = max_attempts
+        self.backoff = backoff or Backoff(initial=0.1, maximum=5.0)
+        self.retry_on = frozenset(retry_on)
+        self.deadline = deadline
+        self.methods = frozenset(m.upper() for m in methods)
+        self.endpoints = frozenset(endpoints)
+        self.retries = 0
+        self.give_ups = 0
+        self.recoveries = 0
+        self._lock = threading.Lock()
+
+    def applies(self, method, endpoint):
+        """ Returns whether requests to ``endpoint`` are retried.
+
+            Returns:
+                bool
+        """
+        return method in self.methods or endpoint in self.endpoints
+
+    def delay(self, attempt, started, status=None, transient=False):
+        """ Returns the seconds to wait before retrying, and counts the
+            outcome of the attempt.
+
+            Args:
+                attempt (int): failed attempts so far, from 0.
+                started (float): :func:`time.monotonic` at the first attempt.
+                status (int): HTTP status of the response, if any.
+                transient (bool): whether the request failed with a
+                    connection error or a timeout.
+
+            Returns:
+                float: ``None`` when the attempt is final, because it
+                succeeded, its failure is not retried, or retries ran out.
+        """
+        if not transient and status not in self.retry_on:
+            if attempt:
+                with self._lock:
+                    self.recoveries += status is not None and status < 400
+            return None
+
+        delay = None
+        if attempt + 1 < self.max_attempts:
+            delay = self.backoff.delay(attempt)
+        if delay is not None and self.deadline is not None and \
+                time.monotonic() + delay - started > self.deadline:
+            delay = None
+
+        with self._lock:
+            if delay is None:
+                self.give_ups += 1
+            else:
+                self.retries += 1
+        return delay
+
+    def stats(self):
+        """ Returns the counters.
+
+            Returns:
+                dict
+        """
+        with self._lock:
+            return {'retries': self.retries,
+                    'give_ups': self.give_ups,
+                    'recoveries': self.recoveries}
@@ -0,0 +1,319 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Batching of folder rescans.
+
+    .. code-block:: python
+
+       with ScanScheduler(syncthing.db, window=2.0) as scheduler:
+           for folder, path in watcher:
+               scheduler.schedule(folder, path)
+       print(scheduler.stats()['saved'])
+"""
+from __future__ import unicode_literals
+
+import time
+import logging
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from syncthing import SyncthingError
+
+__all__ = ['ScanScheduler', 'merge_subs']
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(sub):
+    parts = [p for p in (sub or '').replace('\\', '/').split('/')
+             if p and p != '.']
+    return '/'.join(parts)
+
+
+def _parent(sub):
+    return sub.rpartition('/')[0]
+
+
+def _outermost(subs):
+    # sorted by component, a directory comes right before its children
+    kept = []
+    for sub in sorted(subs, key=lambda s: s.split('/')):
+        if kept and (sub == kept[-1] or sub.startswith(kept[-1] + '/')):
+            continue
+        kept.append(sub)
+    return kept
+
+
+def merge_subs(subs, threshold=8, max_subs=64):
+    """ Reduces paths to rescan to the fewest that cover them all.
+
+        A path inside another one is dropped, as Syncthing scans the
+        children of the path it is given. When ``threshold`` paths share a
+        parent directory, they are replaced by the parent: one request
+        scanning its other entries too is cheaper than ``threshold``
+        requests. When more than ``max_subs`` paths remain, the whole folder
+        is scanned.
+
+        Args:
+            subs (iterable[str]): paths relative to the folder root, ``''``
+                or ``None`` for the whole folder.
+            threshold (int): siblings merged into their parent.
+            max_subs (int): most paths scanned one by one.
+
+        Returns:
+            List[str]: ``['']`` for the whole folder.
+
+        >>> merge_subs(['a/b', 'a', 'c/d', 'c/d'])
+        ['a', 'c/d']
+        >>> merge_subs(['a/1', 'a/2', 'a/3', 'b'], threshold=3)
+        ['a', 'b']
+    """
+    subs = {_normalize(s) for s in subs}
+    if '' in subs:
+        return ['']
+
+    kept = _outermost(subs)
+    while True:
+        siblings = Counter(_parent(s) for s in kept)
+        parents = {p for p, n in siblings.items() if n >= threshold}
+        if not parents:
+            break
+        if '' in parents:
+            return ['']
+        # a new parent may cover deeper paths than its merged children
+        kept = _outermost([s for s in kept if _parent(s) not in parents] +
+                          list(parents))
+
+    if len(kept) > max_subs:
+        return ['']
+    return kept
+
+
+class ScanScheduler(object):
+    """ Buffers rescan requests, e.g. from a filesystem watcher, and sends
+        the fewest :meth:`syncthing.Database.scan` calls covering them.
+
+        Requests are collected until ``window`` seconds pass without a new
+        one, or ``max_delay`` seconds after the first. Each folder's paths
+        are then deduplicated and merged with :func:`.merge_subs`, and
+        scanned with the largest ``next_`` requested for the folder.
+        Folders are scanned in parallel, the paths of a folder one after
+        the other.
+
+        A failed scan is logged and counted, the scheduler carries on.
+
+        Args:
+            db (:obj:`syncthing.Database` or :obj:`syncthing.Syncthing`)
+            window (float): seconds of quiet closing a batch.
+            max_delay (float): seconds a request waits at most, ``10 *
+                window`` by default.
+            threshold (int): see :func:`.merge_subs`.
+            max_subs (int): see :func:`.merge_subs`.
+            max_workers (int): folders scanned at once.
+
+        Attributes:
+            requested (int): calls to :meth:`.schedule`.
+            sent (int): scan requests sent to Syncthing.
+            failed (int): scan requests that failed.
+            deduped (int): requests for a path already pending.
+            merged (int): pending paths covered by another one.
+    """
+
+    def __init__(self, db, window=1.0, max_delay=None, threshold=8,
+                 max_subs=64, max_workers=4):
+        self.db = getattr(db, 'database', db)
+        self.window = window
+        self.max_delay = 10 * window if max_delay is None else max_delay
+        self.threshold = threshold
+        self.max_subs = max_subs
+        self.max_workers = max_workers
+
+        self.requested = 0
+        self.sent = 0
+        self.failed = 0
+        self.deduped = 0
+        self.merged = 0
+
+        # folder -> [set of subs, largest next_]
+        self._pending = {}
+        self._pending_requests = 0
+        self._first = self._last = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._folder_locks = defaultdict(threading.Lock)
+        self._futures = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def saved(self):
+        """ int: requests spared to Syncthing, pending ones excluded. """
+        return self.requested - self.pending - self.sent
+
+    @property
+    def pending(self):
+        """ int: requests waiting for their batch to close. """
+        with self._cond:
+            return self._pending_requests
+
+    def schedule(self, folder, sub=None, next_=None):
+        """ Requests a rescan of a folder, or of a path within it.
+
+            Args:
+                folder (str): Folder ID.
+                sub (str): path relative to the folder root, the whole
+                    folder when omitted.
+                next_ (int): see :meth:`syncthing.Database.scan`.
+
+            Returns:
+                None
+        """
+        assert isinstance(next_, int) or next_ is None
+        sub = _normalize(sub)
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                raise SyncthingError('scan scheduler is closed')
+            self.requested += 1
+            entry = self._pending.get(folder)
+            if entry is None:
+                entry = self._pending[folder] = [set(), None]
+            if sub in entry[0]:
+                self.deduped += 1
+            entry[0].add(sub)
+            if next_ is not None:
+                entry[1] = max(entry[1] or 0, next_)
+            self._pending_requests += 1
+            if self._first is None:
+                self._first = now
+            self._last = now
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='syncthing-scan-scheduler')
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, block=True):
+        """ Closes the current batch now.
+
+            Args:
+                block (bool): whether to wait for every scan sent so far to
+                    complete.
+
+            Returns:
+                None
+        """
+        with self._cond:
+            batch = self._take()
+        self._dispatch(batch)
+        if block:
+            with self._cond:
+                futures = list(self._futures)
+            wait(futures)
+
+    def close(self):
+        """ Sends the pending requests, waits for the scans and stops.
+
+            Returns:
+                None
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        self._executor.shutdown()
+
+    def stats(self):
+        """ Returns the scheduler counters.
+
+            Returns:
+                dict
+        """
+        with self._cond:
+            pending = self._pending_requests
+            return {'requested': self.requested,
+                    'sent': self.sent,
+                    'failed': self.failed,
+                    'deduped': self.deduped,
+                    'merged': self.merged,
+                    'pending': pending,
+                    'saved': self.requested - pending - self.sent}
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+            if batch is None:
+                return
+            self._dispatch(batch)
+
+    def _next_batch(self):
+        # left to `close` once closed
+        while not self._closed:
+            if not self._pending:
+                self._cond.wait()
+                continue
+            remaining = min(self._last + self.window,
+                            self._first + self.max_delay) - time.monotonic()
+            if remaining <= 0:
+                return self._take()
+            self._cond.wait(remaining)
+        return None
+
+    def _take(self):
+        batch, self._pending = self._pending, {}
+        self._first = self._last = None
+        self._pending_requests = 0
+        return batch
+
+    def _dispatch(self, batch):
+        for folder, (subs, next_) in batch.items():
+            paths = merge_subs(subs, self.threshold, self.max_subs)
+            with self._cond:
+                self.merged += len(subs) - len(paths)
+                lock = self._folder_locks[folder]
+                future = self._executor.submit(self._scan, folder, paths,
+                                               next_, lock)
+                self._futures.add(future)
+            future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._cond:
+            self._futures.discard(future)
+
+    def _scan(self, folder, paths, next_, lock):
+        # one scan at a time per folder, including across batches
+        with lock:
+            for sub in paths:
+                with self._cond:
+                    self.sent += 1
+                try:
+                    self.db.scan(folder, sub or None, next_)
+                except SyncthingError as e:
+                    with self._cond:
+                        self.failed += 1
+                    logger.warning('scan of %s %r failed: %s', folder, sub, e)
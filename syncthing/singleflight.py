@@ -0,0 +1,138 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Deduplication of identical concurrent requests.
+
+    .. code-block:: python
+
+       s = Syncthing(API_KEY, single_flight=True)
+       # ten threads, one request to Syncthing
+       with ThreadPoolExecutor(10) as pool:
+           statuses = list(pool.map(s.db.status, ['my-folder'] * 10))
+       print(s.single_flight.stats())
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import threading
+
+__all__ = ['SingleFlight']
+
+
+class _Call(object):
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """ Runs a call at most once at a time per key: callers arriving while
+        it is in flight wait for it and receive its result, or its
+        exception, instead of starting their own.
+
+        Nothing is kept once the call returns, the next caller starts a new
+        one; see :class:`syncthing.ResponseCache` to reuse results for a
+        while.
+
+        Note:
+            Callers sharing a call receive the same object, which must not
+            be modified in place.
+
+        Attributes:
+            calls (int): calls started.
+            shared (int): callers served by another caller's call.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._calls) + len(self._tasks)
+
+    def do(self, key, fn):
+        """ Returns ``fn()``, or the result of the call of ``key`` in
+            flight.
+
+            Args:
+                key (hashable)
+                fn (callable)
+
+            Returns:
+                object
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    async def do_async(self, key, fn):
+        """ Coroutine version of :meth:`.do`, ``fn`` returning an awaitable.
+
+            A caller cancelled while waiting does not cancel the call the
+            others wait for.
+
+            Returns:
+                object
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.calls += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """ Returns the counters, and the number of calls in flight.
+
+            Returns:
+                dict
+        """
+        with self._lock:
+            return {'calls': self.calls,
+                    'shared': self.shared,
+                    'in_flight': len(self)}
@@ -0,0 +1,373 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" Incremental JSON parsing of large response bodies.
+
+    Bodies are consumed chunk by chunk and turned into a flat stream of
+    ``(event, value)`` tuples, the same events as ``ijson.basic_parse``
+    (which is used instead when installed): ``start_map``, ``map_key``,
+    ``end_map``, ``start_array``, ``end_array``, ``string``, ``number``,
+    ``boolean`` and ``null``. Memory use is bounded by the size of a chunk
+    rather than by the size of the document.
+"""
+from __future__ import unicode_literals
+
+import re
+import codecs
+from collections import namedtuple
+from json.decoder import scanstring
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+__all__ = ['BrowseEntry', 'JSONTokenizer', 'BrowseWalker', 'json_events',
+           'browse_entries']
+
+BrowseEntry = namedtuple('BrowseEntry', 'path, mtime, size')
+"""tuple[str,str,int]: a file of the global model, ``path`` is relative to
+the folder root and ``mtime`` is Syncthing's RFC 3339 timestamp."""
+
+_SKIP = re.compile(r'[ \t\n\r]*')
+_KEY_END = re.compile(r'[ \t\n\r]*:')
+_TAIL = re.compile(r'[-+.0-9eEtrufalsn]*')
+_NUMBER = re.compile(r'-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?')
+_LITERALS = {'t': ('true', True), 'f': ('false', False), 'n': ('null', None)}
+
+# what JSONTokenizer accepts next: a value, a value or ']' (after '['), a
+# key, a key or '}' (after '{'), the ':' after a key, a ',' or the closing
+# bracket after an item, and nothing once the document is complete
+(_VALUE, _VALUE_OR_END, _KEY, _KEY_OR_END, _COLON, _COMMA,
+ _DONE) = range(7)
+_VALUES = (_VALUE, _VALUE_OR_END)
+_KEYS = (_KEY, _KEY_OR_END)
+_STRINGS = _VALUES + _KEYS
+_MAP_ENDS = (_KEY_OR_END, _COMMA)
+_ARRAY_ENDS = (_VALUE_OR_END, _COMMA)
+
+
+def _unexpected(buf, pos):
+    return ValueError('invalid JSON: unexpected %r at %r' %
+                      (buf[pos], buf[pos:pos + 10]))
+
+
+class _ChunkReader(object):
+    """ Minimal file-like wrapper so ``ijson`` can pull from an iterator of
+        byte chunks. """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def read(self, size=-1):
+        if size == 0:
+            # ijson probes the stream type with an empty read
+            return b''
+        return next(self._chunks, b'')
+
+
+def json_events(chunks):
+    """ Parses an iterable of ``bytes`` chunks holding one UTF-8 JSON
+        document into a stream of parser events.
+
+        Args:
+            chunks (iterable[bytes])
+
+        Returns:
+            generator[tuple]: ``(event, value)``
+
+        Raises:
+            ValueError: on malformed or truncated JSON.
+    """
+    if ijson is not None:
+        return _ijson_events(chunks)
+    return _json_events(chunks)
+
+
+def _ijson_events(chunks):
+    try:
+        for event in ijson.basic_parse(_ChunkReader(chunks), use_float=True):
+            yield event
+    except ijson.JSONError as e:
+        # not a ValueError subclass, unlike the errors of JSONTokenizer
+        raise ValueError('invalid JSON: %s' % e)
+
+
+def _json_events(chunks):
+    tokenizer = JSONTokenizer()
+    for chunk in chunks:
+        for event in tokenizer.feed(chunk):
+            yield event
+    for event in tokenizer.close():
+        yield event
+
+
+def browse_entries(events, prefix=None):
+    """ Turns the parser events of a ``/rest/db/browse`` response into the
+        files it lists, see :class:`.BrowseWalker`.
+
+        Args:
+            events (iterable[tuple]): see :func:`.json_events`.
+            prefix (str): prepended to every path.
+
+        Returns:
+            generator[:obj:`.BrowseEntry`]
+    """
+    return BrowseWalker(prefix).walk(events)
+
+
+class JSONTokenizer(object):
+    """ Push-style JSON tokenizer, the pure Python engine behind
+        :func:`.json_events`. Bytes are fed as they arrive and every complete
+        token is emitted; state is kept between calls so it can be driven
+        from blocking and from ``asyncio`` code alike.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        # one entry per open container, True for maps
+        self._stack = []
+        self._state = _VALUE
+
+    def feed(self, chunk):
+        """ Parses the tokens completed by ``chunk``.
+
+            Returns:
+                generator[tuple]: ``(event, value)``
+        """
+        self._buf = self._buf[self._pos:] + self._decoder.decode(chunk)
+        self._pos = 0
+        return self._events(final=False)
+
+    def close(self):
+        """ Parses whatever is left once the document has been received.
+
+            Returns:
+                generator[tuple]: ``(event, value)``
+
+            Raises:
+                ValueError: when the document is truncated.
+        """
+        self._buf = self._buf[self._pos:] + self._decoder.decode(b'',
+                                                                 final=True)
+        self._pos = 0
+        for event in self._events(final=True):
+            yield event
+        if self._state != _DONE:
+            raise ValueError('truncated JSON document')
+
+    def _events(self, final):
+        buf, pos, stack, state = self._buf, self._pos, self._stack, self._state
+
+        while True:
+            pos = _SKIP.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+
+            c = buf[pos]
+
+            if state == _COMMA:
+                if c == ',':
+                    pos += 1
+                    state = _KEY if stack[-1] else _VALUE
+                    continue
+                if c not in '}]':
+                    raise _unexpected(buf, pos)
+
+            elif state == _COLON:
+                if c != ':':
+                    raise _unexpected(buf, pos)
+                pos += 1
+                state = _VALUE
+                continue
+
+            # a token running up to the end of the buffer may continue in the
+            # next chunk, it is only consumed once more data (or EOF) is there
+            if not final and c in '-0123456789tfn' and \
+                    _TAIL.match(buf, pos).end() >= len(buf):
+                break
+
+            if c == '"':
+                if state not in _STRINGS:
+                    raise _unexpected(buf, pos)
+                try:
+                    value, end = scanstring(buf, pos + 1)
+                except ValueError:
+                    if final:
+                        raise
+                    break
+                pos = end
+                if state in _KEYS:
+                    event = 'map_key'
+                    # the ':' is usually right there, saving a loop
+                    m = _KEY_END.match(buf, pos)
+                    if m is None:
+                        state = _COLON
+                    else:
+                        pos = m.end()
+                        state = _VALUE
+                else:
+                    event = 'string'
+                    state = _COMMA if stack else _DONE
+                self._pos, self._state = pos, state
+                yield event, value
+
+            elif c == '}':
+                if state not in _MAP_ENDS or not stack or \
+                        stack[-1] is not True:
+                    raise _unexpected(buf, pos)
+                pos += 1
+                stack.pop()
+                state = _COMMA if stack else _DONE
+                self._pos, self._state = pos, state
+                yield 'end_map', None
+
+            elif c == ']':
+                if state not in _ARRAY_ENDS or not stack or \
+                        stack[-1] is not False:
+                    raise _unexpected(buf, pos)
+                pos += 1
+                stack.pop()
+                state = _COMMA if stack else _DONE
+                self._pos, self._state = pos, state
+                yield 'end_array', None
+
+            elif state not in _VALUES:
+                raise _unexpected(buf, pos)
+
+            elif c == '{':
+                pos += 1
+                stack.append(True)
+                state = _KEY_OR_END
+                self._pos, self._state = pos, state
+                yield 'start_map', None
+
+            elif c == '[':
+                pos += 1
+                stack.append(False)
+                state = _VALUE_OR_END
+                self._pos, self._state = pos, state
+                yield 'start_array', None
+
+            elif c in _LITERALS:
+                text, value = _LITERALS[c]
+                if not buf.startswith(text, pos):
+                    raise ValueError('invalid JSON at %r' % buf[pos:pos + 10])
+                pos += len(text)
+                state = _COMMA if stack else _DONE
+                self._pos, self._state = pos, state
+                yield ('null' if value is None else 'boolean'), value
+
+            else:
+                m = _NUMBER.match(buf, pos)
+                if m is None:
+                    raise ValueError('invalid JSON at %r' % buf[pos:pos + 10])
+                pos = m.end()
+                state = _COMMA if stack else _DONE
+                self._pos, self._state = pos, state
+                if m.group(1) or m.group(2):
+                    yield 'number', float(m.group())
+                else:
+                    yield 'number', int(m.group())
+
+        self._pos, self._state = pos, state
+
+class BrowseWalker(object):
+    """ Turns the parser events of a ``/rest/db/browse`` response into the
+        files it lists, without building the tree in memory. Events can be
+        walked in several batches, the position in the tree is kept between
+        calls.
+
+        Both layouts are understood: the nested ``{name: {...}}`` directories
+        holding ``[mtime, size]`` files of Syncthing v0.14, and the list of
+        ``{name, modTime, size, type, children}`` objects returned by newer
+        releases.
+
+        Args:
+            prefix (str): prepended to every path.
+    """
+
+    def __init__(self, prefix=None):
+        self._path = [prefix.strip('/')] if prefix else []
+        # kind of every open container: 'dir' and 'file' for the v0.14
+        # layout, 'list' and 'obj' for the newer one
+        self._stack = []
+        # per open 'obj': its scalar fields, and whether its name is on path
+        self._objects = []
+        self._fields = None
+        self._key = None
+
+    def walk(self, events):
+        """ Returns:
+                generator[:obj:`.BrowseEntry`]: the files completed by
+                ``events``.
+        """
+        path, stack, objects = self._path, self._stack, self._objects
+
+        for event, value in events:
+            top = stack[-1] if stack else None
+
+            if event == 'map_key':
+                self._key = value
+                if top == 'obj' and value == 'children':
+                    obj = objects[-1]
+                    path.append(obj[0].get('name', ''))
+                    obj[1] = True
+
+            elif event == 'start_map':
+                if top == 'list':
+                    stack.append('obj')
+                    objects.append([{}, False])
+                else:
+                    if top == 'dir':
+                        path.append(self._key)
+                    stack.append('dir')
+
+            elif event == 'end_map':
+                kind = stack.pop()
+                if kind == 'obj':
+                    obj, pushed = objects.pop()
+                    if pushed:
+                        path.pop()
+                    if 'DIRECTORY' not in str(obj.get('type', '')):
+                        yield BrowseEntry(
+                            '/'.join(path + [obj.get('name', '')]),
+                            obj.get('modTime'), obj.get('size'))
+                elif stack and stack[-1] == 'dir':
+                    path.pop()
+
+            elif event == 'start_array':
+                if top == 'dir':
+                    stack.append('file')
+                    self._fields = []
+                else:
+                    stack.append('list')
+
+            elif event == 'end_array':
+                if stack.pop() == 'file':
+                    fields = self._fields
+                    yield BrowseEntry('/'.join(path + [self._key]),
+                                      fields[0] if fields else None,
+                                      fields[1] if len(fields) > 1 else None)
+
+            elif top == 'file':
+                self._fields.append(value)
+
+            elif top == 'obj':
+                objects[-1][0][self._key] = value
@@ -0,0 +1,956 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+""" An in-process stand-in for the Syncthing REST API, to test and benchmark
+    the client without a running Syncthing.
+
+    .. code-block:: python
+
+       with FakeSyncthing(files=10000, latency=0.005) as fake:
+           s = fake.client()
+           fake.fail('/rest/system/status', status=503, times=2)
+           fake.emit('ItemFinished', {'folder': 'default', 'item': 'a'})
+           for entry in s.db.iter_browse('default'):
+               print(entry)
+"""
+from __future__ import unicode_literals
+
+import os
+import json
+import time
+import atexit
+import base64
+import random
+import string
+import hashlib
+import logging
+import threading
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+__all__ = ['FakeSyncthing', 'env_client', 'normalize_device_id']
+
+logger = logging.getLogger(__name__)
+
+VERSION = 'v1.0.0'
+FOLDERS = ('default', '2vw2z-xwpvk')
+DIRECTORIES = ('', 'docs', 'docs/archive', 'media', 'media/photos', 'src')
+DISK_EVENTS = ('LocalChangeDetected', 'RemoteChangeDetected')
+
+_B32 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567'
+_SUBSTITUTIONS = {ord('0'): 'O', ord('1'): 'I', ord('8'): 'B'}
+
+
+def _luhn32(s):
+    """ Luhn mod 32 check character of a base32 string. """
+    factor, total = 1, 0
+    for c in s:
+        addend = factor * _B32.index(c)
+        factor = 1 if factor == 2 else 2
+        total += addend // 32 + addend % 32
+    return _B32[(32 - total % 32) % 32]
+
+
+def normalize_device_id(id_):
+    """ Formats a device ID the way Syncthing's ``/rest/svc/deviceid`` does:
+        52 or 56 base32 characters, with or without separators and check
+        characters, in any case and with ``0``, ``1`` and ``8`` standing
+        for ``O``, ``I`` and ``B``.
+
+        Args:
+            id_ (str)
+
+        Returns:
+            str: ``''`` for an empty ID.
+
+        Raises:
+            ValueError: when ``id_`` is not a device ID.
+    """
+    s = id_.strip().upper().replace('-', '').replace(' ', '')
+    if not s:
+        return ''
+    s = s.translate(_SUBSTITUTIONS)
+    if any(c not in _B32 for c in s):
+        raise ValueError('device ID invalid: illegal character')
+    if len(s) == 56:
+        groups = [s[i:i + 14] for i in range(0, 56, 14)]
+        if any(_luhn32(g[:13]) != g[13] for g in groups):
+            raise ValueError('device ID invalid: check digit incorrect')
+        s = ''.join(g[:13] for g in groups)
+    elif len(s) != 52:
+        raise ValueError('device ID invalid: incorrect length')
+    s = ''.join(s[i:i + 13] + _luhn32(s[i:i + 13]) for i in range(0, 52, 13))
+    return '-'.join(s[i:i + 7] for i in range(0, 56, 7))
+
+
+def _device_id(seed):
+    digest = hashlib.sha256(seed.encode('utf-8')).digest()
+    return normalize_device_id(
+        base64.b32encode(digest).decode('ascii').rstrip('='))
+
+
+def _timestamp(t):
+    """ RFC 3339 timestamp with nanoseconds, as Syncthing writes them. """
+    dt = datetime.fromtimestamp(t, timezone.utc)
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.%f') + '000Z'
+
+
+class _HTTPError(Exception):
+
+    def __init__(self, status, text):
+        super(_HTTPError, self).__init__(text)
+        self.status = status
+        self.text = text
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, without TCP_NODELAY every
+    # response waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.fake._handle(self)
+
+    do_POST = do_PUT = do_DELETE = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeSyncthing(object):
+    """ Serves a synthetic Syncthing over HTTP on a background thread.
+
+        Implements the ``/rest/system``, ``/rest/db``, ``/rest/stats`` and
+        ``/rest/svc`` endpoints used by :class:`syncthing.Syncthing`, and
+        long-polling of ``/rest/events`` and ``/rest/events/disk``. The
+        state is kept in memory: scans move ``lastScan`` forward, errors can
+        be shown and cleared, devices paused, and a restart resets the event
+        ids like a new Syncthing process would.
+
+        Event ids are shared by every event mask, as if Syncthing numbered a
+        single subscription.
+
+        Args:
+            api_key (str): required ``X-API-Key``, any key is accepted when
+                ``None``.
+            host (str)
+            port (int): ``0`` picks a free port.
+            devices (int): devices of the cluster, including this one.
+            folders (int or List[str]): folder IDs, or a number of folders
+                to generate; every folder is shared with every device.
+            files (int): files per folder, spread over a few directories.
+            need (int): files each folder still needs.
+            latency (float): seconds added to every response.
+            error_rate (float): probability of answering a request with a
+                ``500``.
+            event_buffer (int): events kept for ``/rest/events``.
+            seed (int): seed of the synthetic data and of ``error_rate``.
+
+        Attributes:
+            calls (:obj:`collections.Counter`): requests served, by
+                ``(method, path)``.
+    """
+
+    def __init__(self, api_key=None, host='127.0.0.1', port=0, devices=3,
+                 folders=FOLDERS, files=100, need=5, latency=0.0,
+                 error_rate=0.0, event_buffer=1000, seed=0):
+        self.api_key = api_key
+        self.host = host
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = Counter()
+
+        self._random = random.Random(seed)
+        self._cond = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.fake = self
+        self._thread = None
+        self._failures = {}
+        self._cache = {}
+
+        now = time.time()
+        self._started = now
+        self.devices = [_device_id('fake-%d-%d' % (seed, i))
+                        for i in range(devices)]
+        self.my_id = self.devices[0]
+        if isinstance(folders, int):
+            folders = ['folder-%04d' % i for i in range(folders)]
+        self.folders = list(folders)
+
+        self._files = {}
+        self._need = {}
+        self._last_scan = {}
+        self._ignores = {}
+        self._completion = {}
+        for f in self.folders:
+            self._files[f] = self._make_files(f, files, now)
+            self._need[f] = ['need/file-%05d.dat' % i for i in range(need)]
+            self._last_scan[f] = now
+            self._ignores[f] = []
+            for d in self.devices[1:]:
+                self._completion[(d, f)] = self._random.choice(
+                    (100, 100, 100, self._random.randint(0, 99)))
+
+        self._config = self._make_config()
+        self._config_in_sync = True
+        self._paused = set()
+        self._debug = set()
+        self._discovery = {d: ['tcp://192.0.2.%d:22000' % (i + 1)]
+                           for i, d in enumerate(self.devices[1:])}
+        self._errors = []
+        self._log = [{'when': _timestamp(now),
+                      'message': 'Ready to synchronize'}]
+        self._events = deque(maxlen=event_buffer)
+        self._event_id = 0
+        self._closed = False
+
+        self._routes = {
+            ('GET', 'system/browse'): self._system_browse,
+            ('GET', 'system/config'): self._system_config,
+            ('POST', 'system/config'): self._system_set_config,
+            ('GET', 'system/config/insync'): self._system_config_insync,
+            ('GET', 'system/connections'): self._system_connections,
+            ('GET', 'system/debug'): self._system_debug,
+            ('POST', 'system/debug'): self._system_set_debug,
+            ('GET', 'system/discovery'): self._system_discovery,
+            ('POST', 'system/discovery'): self._system_add_discovery,
+            ('GET', 'system/error'): self._system_errors,
+            ('POST', 'system/error'): self._system_show_error,
+            ('POST', 'system/error/clear'): self._system_clear_errors,
+            ('GET', 'system/log'): self._system_log,
+            ('POST', 'system/pause'): self._system_pause,
+            ('POST', 'system/resume'): self._system_resume,
+            ('GET', 'system/ping'): self._system_ping,
+            ('POST', 'system/ping'): self._system_ping,
+            ('POST', 'system/reset'): self._system_reset,
+            ('POST', 'system/restart'): self._system_restart,
+            ('POST', 'system/shutdown'): self._system_shutdown,
+            ('GET', 'system/status'): self._system_status,
+            ('GET', 'system/upgrade'): self._system_upgrade,
+            ('POST', 'system/upgrade'): self._system_do_upgrade,
+            ('GET', 'system/version'): self._system_version,
+            ('GET', 'db/browse'): self._db_browse,
+            ('GET', 'db/completion'): self._db_completion,
+            ('GET', 'db/file'): self._db_file,
+            ('GET', 'db/ignores'): self._db_ignores,
+            ('POST', 'db/ignores'): self._db_set_ignores,
+            ('GET', 'db/need'): self._db_need,
+            ('POST', 'db/override'): self._db_override,
+            ('POST', 'db/prio'): self._db_prio,
+            ('POST', 'db/scan'): self._db_scan,
+            ('GET', 'db/status'): self._db_status,
+            ('GET', 'stats/device'): self._stats_device,
+            ('GET', 'stats/folder'): self._stats_folder,
+            ('GET', 'svc/deviceid'): self._svc_device_id,
+            ('GET', 'svc/lang'): self._svc_lang,
+            ('GET', 'svc/random/string'): self._svc_random_string,
+            ('GET', 'svc/report'): self._svc_report,
+            ('GET', 'events'): self._events_all,
+            ('GET', 'events/disk'): self._events_disk,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def port(self):
+        """ int: the port the server listens on. """
+        return self._server.server_address[1]
+
+    @property
+    def url(self):
+        """ str: base URL of the server. """
+        return 'http://%s:%d' % (self.host, self.port)
+
+    def client(self, **kwargs):
+        """ Returns a :class:`syncthing.Syncthing` talking to this server,
+            ``kwargs`` are passed on.
+
+            Returns:
+                :obj:`syncthing.Syncthing`
+        """
+        from syncthing import Syncthing
+        kwargs.setdefault('api_key', self.api_key or '')
+        kwargs.setdefault('host', self.host)
+        kwargs.setdefault('port', self.port)
+        return Syncthing(**kwargs)
+
+    def start(self):
+        """ Starts serving on a daemon thread.
+
+            Returns:
+                :obj:`.FakeSyncthing`: ``self``.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever,
+                                            name='fake-syncthing')
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """ Stops serving, ending the long-polls in flight.
+
+            Returns:
+                None
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def emit(self, type_, data=None):
+        """ Publishes an event to ``/rest/events``.
+
+            Args:
+                type_ (str): e.g. ``'ItemFinished'``.
+                data (dict)
+
+            Returns:
+                dict: the event.
+        """
+        with self._cond:
+            self._event_id += 1
+            event = {'id': self._event_id,
+                     'globalID': self._event_id,
+                     'time': _timestamp(time.time()),
+                     'type': type_,
+                     'data': data}
+            self._events.append(event)
+            self._cond.notify_all()
+        return event
+
+    def fail(self, path, status=500, times=1, text='injected failure'):
+        """ Makes the next requests to ``path`` fail.
+
+            Args:
+                path (str): e.g. ``'/rest/system/status'``.
+                status (int): HTTP status of the failure, the connection is
+                    closed without a response when ``None``.
+                times (int): requests to fail.
+                text (str): body of the failure.
+
+            Returns:
+                None
+        """
+        with self._cond:
+            self._failures.setdefault(path, deque()).extend(
+                [(status, text)] * times)
+
+    def restart(self):
+        """ Simulates a Syncthing restart: a new ``startTime``, and event
+            ids starting over.
+
+            Returns:
+                None
+        """
+        with self._cond:
+            self._started = max(time.time(), self._started + 1e-6)
+            self._events.clear()
+            self._event_id = 0
+            self._config_in_sync = True
+        self.emit('Starting', {'home': '/var/syncthing'})
+        self.emit('StartupComplete', {'myID': self.my_id})
+
+    # -- plumbing
+
+    def _handle(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        url = urlsplit(handler.path)
+        path = url.path
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        method = handler.command
+        self.calls[(method, path)] += 1
+
+        try:
+            if not path.startswith('/rest/'):
+                if path != '/':
+                    raise _HTTPError(404, '404 page not found')
+                value = '<html><body>Syncthing</body></html>'
+            else:
+                if self.api_key is not None and \
+                        handler.headers.get('X-API-Key') != self.api_key:
+                    raise _HTTPError(403, 'Forbidden')
+                if self.latency:
+                    time.sleep(self.latency)
+                if self._inject(handler, path):
+                    return
+                route = self._routes.get((method, path[len('/rest/'):]))
+                if route is None:
+                    raise _HTTPError(404, '404 page not found')
+                value = route(query, body, handler.headers)
+        except _HTTPError as e:
+            self._send(handler, e.status, e.text + '\n')
+        except Exception as e:
+            logger.exception('fake syncthing failed on %s', handler.path)
+            self._send(handler, 500, '%s\n' % e)
+        else:
+            self._send(handler, 200, value)
+
+    def _inject(self, handler, path):
+        with self._cond:
+            failures = self._failures.get(path)
+            if failures:
+                status, text = failures.popleft()
+            elif self.error_rate and self._random.random() < self.error_rate:
+                status, text = 500, 'injected failure'
+            else:
+                return False
+        if status is None:
+            handler.close_connection = True
+        else:
+            self._send(handler, status, text + '\n')
+        return True
+
+    @staticmethod
+    def _send(handler, status, value):
+        if isinstance(value, bytes):
+            body, content_type = value, 'application/json; charset=utf-8'
+        elif isinstance(value, str):
+            body = value.encode('utf-8')
+            content_type = 'text/html; charset=utf-8' if \
+                value.startswith('<html>') else 'text/plain; charset=utf-8'
+        else:
+            body = json.dumps(value).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _cached(self, key, build):
+        # large, rarely changing documents are encoded once
+        body = self._cache.get(key)
+        if body is None:
+            body = self._cache[key] = json.dumps(build()).encode('utf-8')
+        return body
+
+    def _folder(self, query):
+        folder = query.get('folder')
+        if folder not in self._files:
+            raise _HTTPError(500, 'folder "%s" does not exist' % folder)
+        return folder
+
+    def _device(self, query):
+        device = query.get('device')
+        try:
+            device = normalize_device_id(device or '')
+        except ValueError as e:
+            raise _HTTPError(500, str(e))
+        if device not in self.devices:
+            raise _HTTPError(500, 'device "%s" not found' % device)
+        return device
+
+    # -- synthetic data
+
+    def _make_files(self, folder, count, now):
+        files = {}
+        for i in range(count):
+            directory = DIRECTORIES[i % len(DIRECTORIES)]
+            name = 'file-%05d.dat' % i
+            path = '%s/%s' % (directory, name) if directory else name
+            files[path] = {
+                'name': path,
+                'type': 'FILE_INFO_TYPE_FILE',
+                'size': self._random.randint(0, 1 << 20),
+                'modified': _timestamp(now - self._random.randint(0, 10 ** 7)),
+                'deleted': False,
+                'invalid': False,
+                'noPermissions': False,
+                'permissions': '0644',
+                'numBlocks': 1,
+                'sequence': i + 1,
+                'version': ['%s:1' % self.devices[0][:7]],
+            }
+        return files
+
+    def _make_config(self):
+        return {
+            'version': 28,
+            'folders': [{'id': f,
+                         'label': f,
+                         'path': '/var/syncthing/%s' % f,
+                         'type': 'sendreceive',
+                         'rescanIntervalS': 3600,
+                         'fsWatcherEnabled': True,
+                         'devices': [{'deviceID': d} for d in self.devices]}
+                        for f in self.folders],
+            'devices': [{'deviceID': d,
+                         'name': 'device-%d' % i,
+                         'addresses': ['dynamic'],
+                         'compression': 'metadata',
+                         'introducer': False,
+                         'paused': False}
+                        for i, d in enumerate(self.devices)],
+            'gui': {'enabled': True, 'address': '127.0.0.1:8384'},
+            'options': {'listenAddresses': ['default'],
+                        'globalAnnounceEnabled': True,
+                        'urAccepted': -1},
+        }
+
+    def _browse_tree(self, folder, prefix, levels):
+        prefix = prefix.strip('/')
+        # directories are dicts, files are 1-tuples holding their info
+        tree = {}
+        for path, info in self._files[folder].items():
+            if prefix:
+                if not path.startswith(prefix + '/'):
+                    continue
+                path = path[len(prefix) + 1:]
+            parts = path.split('/')
+            node = tree
+            for name in parts[:-1]:
+                node = node.setdefault(name, {})
+            node[parts[-1]] = (info,)
+        return self._browse_level(tree, levels)
+
+    def _browse_level(self, tree, levels):
+        entries = []
+        for name in sorted(tree):
+            node = tree[name]
+            if isinstance(node, dict):
+                entry = {'name': name,
+                         'type': 'FILE_INFO_TYPE_DIRECTORY',
+                         'modTime': _timestamp(self._started),
+                         'size': 128}
+                # levels=0 lists the direct children only, -1 everything
+                if levels != 0:
+                    entry['children'] = self._browse_level(node, levels - 1)
+            else:
+                info = node[0]
+                entry = {'name': name,
+                         'type': info['type'],
+                         'modTime': info['modified'],
+                         'size': info['size']}
+            entries.append(entry)
+        return entries
+
+    def _need_info(self, folder, name):
+        return {'name': name,
+                'type': 'FILE_INFO_TYPE_FILE',
+                'size': 1024,
+                'modified': _timestamp(self._started),
+                'deleted': False,
+                'invalid': False,
+                'noPermissions': False,
+                'permissions': '0644',
+                'numBlocks': 1,
+                'sequence': 0,
+                'version': ['%s:1' % self.devices[-1][:7]]}
+
+    # -- /rest/system
+
+    def _system_browse(self, query, body, headers):
+        current = query.get('current', '')
+        return sorted(f['path'] + '/' for f in self._config['folders']
+                      if f['path'].startswith(current))
+
+    def _system_config(self, query, body, headers):
+        return self._cached('config', lambda: self._config)
+
+    def _system_set_config(self, query, body, headers):
+        config = json.loads(body.decode('utf-8'))
+        with self._cond:
+            self._config = config
+            self._config_in_sync = False
+            self._cache.pop('config', None)
+        self.emit('ConfigSaved', config)
+        return ''
+
+    def _system_config_insync(self, query, body, headers):
+        return {'configInSync': self._config_in_sync}
+
+    def _system_connections(self, query, body, headers):
+        now = _timestamp(time.time())
+        connections = {}
+        for i, d in enumerate(self.devices[1:]):
+            connections[d] = {'at': now,
+                              'address': '192.0.2.%d:22000' % (i + 1),
+                              'clientVersion': VERSION,
+                              'connected': d not in self._paused,
+                              'paused': d in self._paused,
+                              'type': 'tcp-client',
+                              'crypto': 'TLS1.3-TLS_AES_128_GCM_SHA256',
+                              'inBytesTotal': 1000 * (i + 1),
+                              'outBytesTotal': 2000 * (i + 1)}
+        return {'connections': connections,
+                'total': {'at': now,
+                          'inBytesTotal': sum(c['inBytesTotal']
+                                              for c in connections.values()),
+                          'outBytesTotal': sum(c['outBytesTotal']
+                                               for c in connections.values())}}
+
+    def _system_debug(self, query, body, headers):
+        facilities = {'beacon': 'Multicast and broadcast discovery',
+                      'db': 'The database layer',
+                      'events': 'Event generation and logging',
+                      'model': 'The root hub',
+                      'scanner': 'File change detection and hashing'}
+        return {'enabled': sorted(self._debug) or None,
+                'facilities': facilities}
+
+    def _system_set_debug(self, query, body, headers):
+        with self._cond:
+            self._debug.update(f for f in query.get('enable', '').split(',')
+                               if f)
+            self._debug.difference_update(query.get('disable', '').split(','))
+        return ''
+
+    def _system_discovery(self, query, body, headers):
+        return self._discovery
+
+    def _system_add_discovery(self, query, body, headers):
+        device = self._device(query)
+        with self._cond:
+            self._discovery.setdefault(device, []).append(query['addr'])
+        return ''
+
+    def _system_errors(self, query, body, headers):
+        return {'errors': list(self._errors) or None}
+
+    def _system_show_error(self, query, body, headers):
+        with self._cond:
+            self._errors.append({'when': _timestamp(time.time()),
+                                 'message': body.decode('utf-8')})
+        return ''
+
+    def _system_clear_errors(self, query, body, headers):
+        with self._cond:
+            del self._errors[:]
+        return ''
+
+    def _system_log(self, query, body, headers):
+        return {'messages': list(self._log)}
+
+    def _set_paused(self, query, paused):
+        devices = [self._device(query)] if query.get('device') else \
+            self.devices[1:]
+        with self._cond:
+            for d in devices:
+                if paused:
+                    self._paused.add(d)
+                else:
+                    self._paused.discard(d)
+        for d in devices:
+            self.emit('DevicePaused' if paused else 'DeviceResumed',
+                      {'device': d})
+        return ''
+
+    def _system_pause(self, query, body, headers):
+        return self._set_paused(query, True)
+
+    def _system_resume(self, query, body, headers):
+        return self._set_paused(query, False)
+
+    def _system_ping(self, query, body, headers):
+        return {'ping': 'pong'}
+
+    def _system_reset(self, query, body, headers):
+        if query.get('folder'):
+            self._folder(query)
+        return {'ok': 'resetting database'}
+
+    def _system_restart(self, query, body, headers):
+        # answered first, like Syncthing does before going down
+        threading.Timer(0.01, self.restart).start()
+        return {'ok': 'restarting'}
+
+    def _system_shutdown(self, query, body, headers):
+        return {'ok': 'shutting down'}
+
+    def _system_status(self, query, body, headers):
+        return {'myID': self.my_id,
+                'startTime': _timestamp(self._started),
+                'uptime': int(time.time() - self._started),
+                'alloc': 32 << 20,
+                'sys': 64 << 20,
+                'goroutines': 64,
+                'cpuPercent': 0.5,
+                'pathSeparator': '/',
+                'tilde': '/var/syncthing',
+                'discoveryEnabled': True,
+                'discoveryMethods': 4,
+                'discoveryErrors': {},
+                'connectionServiceStatus': {},
+                'urVersionMax': 3}
+
+    def _system_upgrade(self, query, body, headers):
+        return {'latest': VERSION, 'majorNewer': False, 'newer': False,
+                'running': VERSION}
+
+    def _system_do_upgrade(self, query, body, headers):
+        raise _HTTPError(500, 'upgrade unsupported')
+
+    def _system_version(self, query, body, headers):
+        return {'arch': 'amd64',
+                'longVersion': 'syncthing %s "Fake" (python fake) '
+                               'fake@python-syncthing' % VERSION,
+                'os': 'linux',
+                'version': VERSION}
+
+    # -- /rest/db
+
+    def _db_browse(self, query, body, headers):
+        folder = self._folder(query)
+        prefix = query.get('prefix', '')
+        levels = int(query.get('levels', -1))
+        return self._cached(('browse', folder, prefix, levels),
+                            lambda: self._browse_tree(folder, prefix, levels))
+
+    def _db_completion(self, query, body, headers):
+        folder = self._folder(query)
+        device = self._device(query)
+        completion = self._completion.get((device, folder), 100)
+        total = sum(f['size'] for f in self._files[folder].values())
+        return {'completion': completion,
+                'globalBytes': total,
+                'needBytes': total * (100 - completion) // 100,
+                'needDeletes': 0,
+                'needItems': 0 if completion == 100 else 1}
+
+    def _db_file(self, query, body, headers):
+        folder = self._folder(query)
+        info = self._files[folder].get(query.get('file'))
+        if info is None:
+            raise _HTTPError(404, 'no such object in the index')
+        return {'availability': [{'id': d, 'fromTemporary': False}
+                                 for d in self.devices[1:]],
+                'global': info,
+                'local': info}
+
+    def _db_ignores(self, query, body, headers):
+        ignores = self._ignores[self._folder(query)]
+        return {'ignore': list(ignores) or None,
+                'expanded': list(ignores) or None}
+
+    def _db_set_ignores(self, query, body, headers):
+        folder = self._folder(query)
+        doc = json.loads(body.decode('utf-8') or '{}')
+        with self._cond:
+            self._ignores[folder] = list(doc.get('ignore') or [])
+        return self._db_ignores(query, body, headers)
+
+    def _db_need(self, query, body, headers):
+        folder = self._folder(query)
+        page = int(query.get('page', 1))
+        perpage = int(query.get('perpage', 65536))
+        need = self._need[folder]
+        # the first file is in progress, the next few queued
+        categories = ['progress'] + ['queued'] * 4
+        start = (page - 1) * perpage
+        resp = {'progress': [], 'queued': [], 'rest': [],
+                'page': page, 'perpage': perpage}
+        for i, name in enumerate(need[start:start + perpage], start):
+            category = categories[i] if i < len(categories) else 'rest'
+            resp[category].append(self._need_info(folder, name))
+        return resp
+
+    def _db_override(self, query, body, headers):
+        self._folder(query)
+        return ''
+
+    def _db_prio(self, query, body, headers):
+        folder = self._folder(query)
+        name = query.get('file')
+        with self._cond:
+            need = self._need[folder]
+            if name in need:
+                need.remove(name)
+                need.insert(0, name)
+        return self._db_need({'folder': folder}, body, headers)
+
+    def _db_scan(self, query, body, headers):
+        folder = self._folder(query)
+        with self._cond:
+            # strictly later, even within the clock's resolution
+            self._last_scan[folder] = max(time.time(),
+                                          self._last_scan[folder] + 1e-6)
+        self.emit('StateChanged',
+                  {'folder': folder, 'from': 'idle', 'to': 'scanning'})
+        self.emit('StateChanged',
+                  {'folder': folder, 'from': 'scanning', 'to': 'idle'})
+        return ''
+
+    def _db_status(self, query, body, headers):
+        folder = self._folder(query)
+        files = self._files[folder]
+        total = sum(f['size'] for f in files.values())
+        need = len(self._need[folder])
+        dirs = len(set(p.rsplit('/', 1)[0] for p in files if '/' in p))
+        return {'state': 'idle',
+                'stateChanged': _timestamp(self._last_scan[folder]),
+                'globalBytes': total + need * 1024,
+                'globalDeleted': 0,
+                'globalFiles': len(files) + need,
+                'globalDirectories': dirs,
+                'globalSymlinks': 0,
+                'localBytes': total,
+                'localDeleted': 0,
+                'localFiles': len(files),
+                'localDirectories': dirs,
+                'localSymlinks': 0,
+                'inSyncBytes': total,
+                'inSyncFiles': len(files),
+                'needBytes': need * 1024,
+                'needFiles': need,
+                'needDeletes': 0,
+                'needDirectories': 0,
+                'needSymlinks': 0,
+                'ignorePatterns': bool(self._ignores[folder]),
+                'invalid': '',
+                'pullErrors': 0,
+                'sequence': len(files),
+                'version': len(files)}
+
+    # -- /rest/stats
+
+    def _stats_device(self, query, body, headers):
+        now = _timestamp(time.time())
+        return {d: {'lastSeen': now if d not in self._paused else
+                    _timestamp(self._started),
+                    'lastConnectionDurationS': 3600.0}
+                for d in self.devices}
+
+    def _stats_folder(self, query, body, headers):
+        stats = {}
+        for f in self.folders:
+            last = max(self._files[f].values(),
+                       key=lambda i: i['modified'], default=None)
+            stats[f] = {'lastFile': {'at': last['modified'] if last else
+                                     _timestamp(0),
+                                     'filename': last['name'] if last else '',
+                                     'deleted': False},
+                        'lastScan': _timestamp(self._last_scan[f])}
+        return stats
+
+    # -- /rest/svc
+
+    def _svc_device_id(self, query, body, headers):
+        try:
+            return {'id': normalize_device_id(query.get('id', ''))}
+        except ValueError as e:
+            return {'error': str(e)}
+
+    def _svc_lang(self, query, body, headers):
+        accept = headers.get('Accept-Language') or ''
+        return [part.split(';')[0].strip().lower()
+                for part in accept.split(',')]
+
+    def _svc_random_string(self, query, body, headers):
+        try:
+            length = int(query.get('length', 32))
+        except ValueError:
+            length = 32
+        if length <= 0:
+            length = 32
+        chars = string.ascii_letters + string.digits
+        rng = random.SystemRandom()
+        return {'random': ''.join(rng.choice(chars) for _ in range(length))}
+
+    def _svc_report(self, query, body, headers):
+        files = sum(len(f) for f in self._files.values())
+        return {'version': 3,
+                'longVersion': self._system_version(query, body,
+                                                    headers)['longVersion'],
+                'uniqueID': self.my_id[:8].lower(),
+                'platform': 'linux-amd64',
+                'numFolders': len(self.folders),
+                'numDevices': len(self.devices),
+                'totFiles': files,
+                'folderMaxFiles': max([len(f) for f in self._files.values()]
+                                      or [0]),
+                'totMiB': sum(i['size'] for f in self._files.values()
+                              for i in f.values()) >> 20,
+                'uptime': int(time.time() - self._started)}
+
+    # -- /rest/events
+
+    def _poll(self, query, types=None):
+        since = int(query.get('since', 0))
+        limit = int(query.get('limit', 0))
+        timeout = float(query.get('timeout', 60))
+        if types is None and query.get('events'):
+            types = set(query['events'].split(','))
+
+        def ready():
+            return [e for e in self._events if e['id'] > since and
+                    (types is None or e['type'] in types)]
+
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            events = ready()
+            while not events and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+                events = ready()
+        if limit > 0:
+            events = events[-limit:]
+        return events
+
+    def _events_all(self, query, body, headers):
+        return self._poll(query)
+
+    def _events_disk(self, query, body, headers):
+        return self._poll(query, set(DISK_EVENTS))
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def env_client():
+    """ Returns a client for the Syncthing named by the environment, as the
+        test suite and the doctests use it: ``SYNCTHING_API_KEY``,
+        ``SYNCTHING_HOST``, ``SYNCTHING_PORT``, ``SYNCTHING_HTTPS`` and
+        ``SYNCTHING_CERT_FILE``.
+
+        When neither the key, the host nor the port is set, the client talks
+        to a :class:`.FakeSyncthing` started once for the process.
+
+        Returns:
+            :obj:`syncthing.Syncthing`
+    """
+    global _shared
+    from syncthing import Syncthing
+
+    if not any(os.getenv(v) for v in ('SYNCTHING_API_KEY', 'SYNCTHING_HOST',
+                                      'SYNCTHING_PORT')):
+        with _shared_lock:
+            if _shared is None:
+                _shared = FakeSyncthing().start()
+                atexit.register(_shared.stop)
+        return _shared.client(timeout=10.0)
+
+    KEY = os.getenv('SYNCTHING_API_KEY')
+    HOST = os.getenv('SYNCTHING_HOST', '127.0.0.1')
+    PORT = os.getenv('SYNCTHING_PORT', 8384)
+    IS_HTTPS = bool(int(os.getenv('SYNCTHING_HTTPS', '0')))
+    SSL_CERT_FILE = os.getenv('SYNCTHING_CERT_FILE')
+    return Syncthing(KEY, HOST, PORT, 10.0, IS_HTTPS, SSL_CERT_FILE)
@@ -0,0 +1,134 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import asyncio
+import inspect
+import unittest
+
+from syncthing import System, Database, Statistics, Misc, SyncthingError
+from syncthing.testing import FakeSyncthing
+
+try:
+    from syncthing.aio import (AsyncSyncthing, AsyncSystem, AsyncDatabase,
+                               AsyncStatistics, AsyncMisc, AsyncEvents)
+except ImportError:
+    AsyncSyncthing = None
+
+
+def public_methods(cls):
+    return {name for name, _ in inspect.getmembers(cls, inspect.isfunction)
+            if not name.startswith('_')}
+
+
+@unittest.skipIf(AsyncSyncthing is None, 'aiohttp is not installed')
+class TestAsyncSyncthing(unittest.TestCase):
+
+    def test_mirrors_sync_api(self):
+        pairs = [(System, AsyncSystem), (Database, AsyncDatabase),
+                 (Statistics, AsyncStatistics), (Misc, AsyncMisc)]
+        for sync, async_ in pairs:
+            self.assertEqual(sync.prefix, async_.prefix)
+            self.assertLessEqual(public_methods(sync), public_methods(async_))
+            for name in public_methods(async_):
+                method = getattr(async_, name)
+                self.assertTrue(inspect.iscoroutinefunction(method) or
+                                inspect.isasyncgenfunction(method),
+                                '%s.%s is blocking' % (async_.__name__, name))
+
+    def test_attributes(self):
+        s = AsyncSyncthing('')
+        self.assertIsInstance(s.system, AsyncSystem)
+        self.assertIs(s.db, s.database)
+        self.assertIsInstance(s.events(), AsyncEvents)
+        sessions = {id(api.session) for api in
+                    (s.system, s.database, s.stats, s.misc, s.events())}
+        self.assertEqual(sessions, {id(s.session)})
+
+
+@unittest.skipIf(AsyncSyncthing is None, 'aiohttp is not installed')
+class TestAsyncClient(unittest.TestCase):
+    """ Drives the asynchronous client against a FakeSyncthing. """
+
+    def setUp(self):
+        self.fake = FakeSyncthing().start()
+
+    def tearDown(self):
+        self.fake.stop()
+
+    def run_client(self, main, **kwargs):
+        async def run():
+            async with AsyncSyncthing('', port=self.fake.port,
+                                      **kwargs) as s:
+                return await main(s)
+        return asyncio.run(run())
+
+    def test_get(self):
+        async def main(s):
+            return await s.system.status(), await s.db.status('default')
+
+        status, folder = self.run_client(main)
+        self.assertEqual(status['myID'], self.fake.my_id)
+        self.assertIn('globalFiles', folder)
+        self.assertEqual(self.fake.calls[('GET', '/rest/system/status')], 1)
+
+    def test_errors(self):
+        self.fake.fail('/rest/system/status', status=500)
+        # aiohttp retries a dropped connection once by itself
+        self.fake.fail('/rest/system/version', status=None, times=2)
+
+        async def main(s):
+            errors = []
+            for call in (s.system.status, s.system.version):
+                try:
+                    await call()
+                except SyncthingError as e:
+                    errors.append(e)
+            return errors, await s.system.status()
+
+        errors, status = self.run_client(main)
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(status['myID'], self.fake.my_id)
+
+    def test_events(self):
+        self.fake.emit('ItemStarted', {'folder': 'default', 'item': 'a'})
+        self.fake.emit('ItemFinished', {'folder': 'default', 'item': 'a'})
+
+        async def main(s):
+            events = s.events(filters=['ItemStarted', 'ItemFinished'])
+            seen = []
+            async for event in events:
+                seen.append(event)
+                if len(seen) == 2:
+                    # answered from within the long-poll in flight
+                    asyncio.get_running_loop().call_later(
+                        0.1, self.fake.emit, 'ItemStarted',
+                        {'folder': 'default', 'item': 'b'})
+                elif len(seen) == 3:
+                    break
+            return events, seen
+
+        events, seen = self.run_client(main)
+        self.assertEqual([e['type'] for e in seen],
+                         ['ItemStarted', 'ItemFinished', 'ItemStarted'])
+        self.assertEqual(seen[2]['data']['item'], 'b')
+        self.assertEqual(events.last_seen_id, seen[2]['id'])
+
+    def test_not_iterable(self):
+        events = AsyncSyncthing('').events()
+        with self.assertRaisesRegex(TypeError, 'async for'):
+            iter(events)
@@ -0,0 +1,127 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import time
+import asyncio
+import unittest
+
+from syncthing import CircuitBreaker, CircuitOpenError, SyncthingError
+from syncthing.breaker import ADMIT, PROBE, REJECT
+from syncthing.testing import FakeSyncthing
+
+try:
+    from syncthing.aio import AsyncSyncthing
+except ImportError:
+    AsyncSyncthing = None
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_states(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record(503)
+        breaker.record(200)
+        breaker.record(transient=True)
+        # a 500 or an error before reaching the node is no sign of trouble
+        breaker.record(500)
+        breaker.record()
+        breaker.record(transient=True)
+        self.assertEqual(breaker.state, 'closed')
+
+        breaker.record(504)
+        breaker.record(transient=True)
+        self.assertEqual(breaker.state, 'open')
+        self.assertEqual(breaker.admit(), REJECT)
+        self.assertGreater(breaker.retry_in, 0)
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.admit(), PROBE)
+        # a single caller probes
+        self.assertEqual(breaker.admit(), REJECT)
+        self.assertFalse(breaker.probed(False))
+        self.assertEqual(breaker.state, 'open')
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.admit(), PROBE)
+        breaker.probed(True)
+        self.assertEqual(breaker.state, 'half-open')
+        self.assertEqual(breaker.admit(), ADMIT)
+        breaker.record(503)
+        self.assertEqual(breaker.state, 'open')
+
+        time.sleep(0.06)
+        breaker.admit()
+        breaker.probed(True)
+        breaker.record(200)
+        self.assertEqual(breaker.stats(),
+                         {'state': 'closed', 'failures': 0, 'trips': 2,
+                          'rejected': 3, 'retry_in': 0.0})
+
+
+class TestBreakerClient(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeSyncthing().start()
+
+    def tearDown(self):
+        self.fake.stop()
+
+    def test_fail_fast(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        calls = self.fake.calls
+        with self.fake.client(breaker=breaker) as s:
+            self.assertIs(s.db.breaker, breaker)
+            self.fake.fail('/rest/system/status', status=None, times=2)
+            for _ in range(2):
+                with self.assertRaises(SyncthingError):
+                    s.system.status()
+
+            with self.assertRaises(CircuitOpenError):
+                s.db.status('default')
+            self.assertEqual(calls[('GET', '/rest/db/status')], 0)
+
+            time.sleep(0.06)
+            self.fake.fail('/rest/system/ping', status=503)
+            with self.assertRaises(CircuitOpenError):
+                s.system.status()
+            self.assertEqual(calls[('GET', '/rest/system/ping')], 1)
+
+            time.sleep(0.06)
+            self.assertEqual(s.system.status()['myID'], self.fake.my_id)
+            self.assertEqual(calls[('GET', '/rest/system/ping')], 2)
+            self.assertEqual(breaker.state, 'closed')
+
+            # event streams are not subject to the breaker
+            self.assertIsNone(s.events().breaker)
+
+    @unittest.skipIf(AsyncSyncthing is None, 'aiohttp is not installed')
+    def test_async(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+        async def main():
+            async with AsyncSyncthing('', port=self.fake.port,
+                                      breaker=breaker) as s:
+                self.fake.fail('/rest/system/status', status=503)
+                with self.assertRaises(SyncthingError):
+                    await s.system.status()
+                with self.assertRaises(CircuitOpenError):
+                    await s.system.status()
+
+        asyncio.run(main())
+        self.assertEqual(self.fake.calls[('GET', '/rest/system/status')], 1)
@@ -0,0 +1,119 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import unittest
+
+from syncthing import Events
+from syncthing.bus import EventBus
+
+EVENTS = [
+    {'id': 1, 'globalID': 1, 'type': 'ItemFinished'},
+    {'id': 2, 'globalID': 2, 'type': 'DeviceConnected'},
+    {'id': 3, 'globalID': 3, 'type': 'FolderCompletion'},
+    {'id': 4, 'globalID': 4, 'type': 'ItemFinished'},
+]
+
+
+class MaskedEvents(Events):
+    """ Serves EVENTS like Syncthing does: every set of filters numbers its
+        events separately. """
+
+    def __init__(self, **kwargs):
+        super(MaskedEvents, self).__init__('', **kwargs)
+        self.polls = []
+        self.on_poll = None
+
+    def get(self, endpoint, params=None, **kwargs):
+        types = params.get('events')
+        self.polls.append((types, params['since']))
+        if self.on_poll:
+            self.on_poll(len(self.polls))
+        masked = [e for e in EVENTS
+                  if not types or e['type'] in types.split(',')]
+        data = [dict(e, id=i) for i, e in enumerate(masked, 1)
+                if i > params['since']]
+        if not data:
+            self.stop()
+        return data[:1]
+
+
+class TestEventBus(unittest.TestCase):
+
+    def test_routing(self):
+        events = MaskedEvents()
+        bus = EventBus(events)
+        completions = []
+        bus.subscribe(completions.append, types=['FolderCompletion'])
+        items = bus.subscribe(types=['ItemFinished'])
+        self.assertEqual(events.filters, ['FolderCompletion', 'ItemFinished'])
+
+        with bus:
+            bus._thread.join(5)
+            ids = [e['globalID'] for e in items]
+
+        self.assertEqual(ids, [1, 4])
+        self.assertEqual([e['globalID'] for e in completions], [3])
+        self.assertEqual(events.polls[0], ('FolderCompletion,ItemFinished', 0))
+        self.assertEqual(bus.undelivered, 0)
+
+    def test_join_at_runtime(self):
+        events = MaskedEvents()
+        bus = EventBus(events)
+        items, everything = [], []
+        bus.subscribe(items.append, types=['ItemFinished'])
+
+        def on_poll(n):
+            if n == 2:
+                bus.subscribe(everything.append)
+        events.on_poll = on_poll
+
+        with bus:
+            bus._thread.join(5)
+
+        # the second poll is still masked, its event reaches the new
+        # subscriber; the third one switches to all events and skips those
+        # already delivered
+        self.assertEqual(events.polls[:3], [('ItemFinished', 0),
+                                            ('ItemFinished', 1),
+                                            (None, 0)])
+        self.assertEqual([e['globalID'] for e in items], [1, 4])
+        self.assertEqual([e['globalID'] for e in everything], [4])
+
+    def test_leave(self):
+        bus = EventBus(MaskedEvents())
+        a = bus.subscribe(types=['ItemFinished'], maxsize=1)
+        b = bus.subscribe(types=['DeviceConnected'])
+        self.assertEqual(bus.events.filters, ['DeviceConnected', 'ItemFinished'])
+        a.close()
+        self.assertEqual(bus.events.filters, ['DeviceConnected'])
+        self.assertIsNone(a.get(timeout=0))
+        self.assertEqual(bus.dispatch(EVENTS[0]), 0)
+        self.assertEqual(bus.dispatch(EVENTS[1]), 1)
+        self.assertEqual(b.get(timeout=0), EVENTS[1])
+
+    def test_last_leave(self):
+        bus = EventBus(MaskedEvents())
+        sub = bus.subscribe(types=['DeviceConnected'])
+        bus.unsubscribe(sub)
+        # not the firehose of every event type with nobody listening
+        self.assertEqual(bus.events.filters, ['DeviceConnected'])
+        self.assertEqual(bus.dispatch(EVENTS[1]), 0)
+        self.assertEqual(bus.undelivered, 1)
+
+        bus.subscribe(types=['ItemFinished'])
+        self.assertEqual(bus.events.filters, ['ItemFinished'])
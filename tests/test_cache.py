@@ -0,0 +1,130 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import time
+import asyncio
+import unittest
+
+from syncthing import Syncthing, ResponseCache
+from syncthing.testing import FakeSyncthing
+
+try:
+    from syncthing.aio import AsyncSyncthing
+except ImportError:
+    AsyncSyncthing = None
+
+CONFIG = '/rest/system/config'
+VERSION = '/rest/system/version'
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_ttls(self):
+        cache = ResponseCache(ttls={CONFIG: 1.0}, default_ttl=0)
+        self.assertEqual(cache.ttl_for(CONFIG), 1.0)
+        self.assertEqual(cache.ttl_for('/rest/system/status'), 0)
+
+    def test_lookup_and_expiry(self):
+        cache = ResponseCache()
+        key = cache.key(CONFIG)
+        self.assertEqual(cache.lookup(key), (False, None))
+        cache.store(key, {'version': 1}, 0.05)
+        self.assertEqual(cache.lookup(key), (True, {'version': 1}))
+        time.sleep(0.06)
+        self.assertEqual(cache.lookup(key), (False, None))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_key_ignores_unset_params(self):
+        a = ResponseCache.key('/rest/db/status', {'folder': 'a', 'x': None})
+        b = ResponseCache.key('/rest/db/status', {'folder': 'a'})
+        self.assertEqual(a, b)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        for i in range(3):
+            cache.store(cache.key(CONFIG, {'i': i}), i, 10)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertFalse(cache.lookup(cache.key(CONFIG, {'i': 0}))[0])
+
+    def test_invalidation(self):
+        cache = ResponseCache()
+        cache.store(cache.key(CONFIG), 1, 10)
+        cache.store(cache.key(VERSION), 2, 10)
+
+        cache.mutated('/rest/system/ping')
+        self.assertEqual(len(cache), 2)
+
+        cache.mutated(CONFIG)
+        self.assertEqual(len(cache), 1)
+
+        cache.mutated('/rest/system/restart')
+        self.assertEqual(len(cache), 0)
+
+    def test_validators(self):
+        cache = ResponseCache(ttls={})
+        self.assertTrue(cache.revalidates(CONFIG))
+        self.assertEqual(cache.ttl_for(CONFIG), 0)
+
+        v = cache.validator({'ETag': '"abc"'}, b'{}')
+        self.assertEqual(cache.validator({}, b'{}').digest, v.digest)
+        self.assertEqual(cache.conditional_headers(v),
+                         {'If-None-Match': '"abc"'})
+
+        key = cache.key(CONFIG)
+        self.assertIsNone(cache.stale(key))
+        cache.store(key, {'version': 1}, 0, v)
+        self.assertFalse(cache.lookup(key)[0])
+        self.assertEqual(cache.stale(key), ({'version': 1}, v))
+
+        cache.refresh(key, 10)
+        self.assertEqual(cache.lookup(key), (True, {'version': 1}))
+        self.assertEqual(cache.revalidations, 1)
+
+    def test_shared_by_client(self):
+        s = Syncthing('', cache=True)
+        self.assertIsInstance(s.cache, ResponseCache)
+        self.assertIs(s.system.cache, s.cache)
+        self.assertIs(s.events().cache, s.cache)
+        self.assertIsNone(Syncthing('').system.cache)
+
+    @unittest.skipIf(AsyncSyncthing is None, 'aiohttp is not installed')
+    def test_async_client(self):
+        cache = ResponseCache(ttls={CONFIG: 10.0})
+
+        async def main(fake):
+            async with AsyncSyncthing('', port=fake.port, cache=cache) as s:
+                self.assertIs(s.system.cache, cache)
+                config = await s.system.config()
+                self.assertIs(await s.system.config(), config)
+                self.assertEqual(fake.calls[('GET', CONFIG)], 1)
+
+                await s.system.set_config(config)
+                await s.system.config()
+                self.assertEqual(fake.calls[('GET', CONFIG)], 2)
+
+                # revalidated rather than decoded again once stale
+                cache.ttls[CONFIG] = 0
+                cache.mutated(CONFIG)
+                config = await s.system.config()
+                self.assertIs(await s.system.config(), config)
+                self.assertEqual(fake.calls[('GET', CONFIG)], 4)
+
+        with FakeSyncthing() as fake:
+            asyncio.run(main(fake))
+        self.assertGreaterEqual(cache.hits, 1)
@@ -0,0 +1,95 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import time
+import unittest
+
+from syncthing.coalesce import EventCoalescer, coalesce, event_key, item_key
+from syncthing.pump import EventPump
+
+
+def item(i, name, type_='ItemFinished'):
+    return {'id': i, 'type': type_,
+            'data': {'folder': 'default', 'item': name}}
+
+
+class TestEventCoalescer(unittest.TestCase):
+
+    def test_collapse(self):
+        c = EventCoalescer(window=60, max_items=10)
+        for i, name in enumerate('abacab', 1):
+            self.assertIsNone(c.add(item(i, name)))
+        batch = c.flush()
+        self.assertEqual([(b.event['id'], b.count, b.first_id) for b in batch],
+                         [(4, 1, 4), (5, 3, 1), (6, 2, 2)])
+        self.assertEqual(c.stats(), {'received': 6, 'emitted': 3,
+                                     'merged': 3, 'pending': 0})
+
+    def test_size_window(self):
+        c = EventCoalescer(window=60, max_items=2)
+        self.assertIsNone(c.add(item(1, 'a')))
+        self.assertIsNone(c.add(item(2, 'a')))
+        batch = c.add(item(3, 'b'))
+        self.assertEqual([b.count for b in batch], [2, 1])
+        self.assertEqual(len(c), 0)
+
+    def test_time_window(self):
+        c = EventCoalescer(window=0.05)
+        self.assertIsNone(c.remaining())
+        c.add(item(1, 'a'))
+        time.sleep(0.06)
+        self.assertEqual(len(c.add(item(2, 'b'))), 2)
+
+    def test_item_key(self):
+        c = EventCoalescer(window=60)
+        c.add(item(1, 'a', 'ItemStarted'))
+        c.add(item(2, 'b', 'ItemStarted'))
+        c.add(item(3, 'a', 'ItemFinished'))
+        c.add({'id': 4, 'type': 'StateChanged', 'data': {'folder': 'default'}})
+        c.add({'id': 5, 'type': 'FolderSummary',
+               'data': {'folder': 'default'}})
+        batch = c.flush()
+        self.assertEqual([(b.key, b.event['id'], b.count) for b in batch[:2]],
+                         [(('default', 'b'), 2, 1), (('default', 'a'), 3, 2)])
+        # no item: one per type
+        self.assertEqual([b.event['id'] for b in batch[2:]], [4, 5])
+        self.assertEqual(item_key({'type': 'Ping'}), event_key({'type': 'Ping'}))
+
+        # per type and item
+        c = EventCoalescer(window=60, key=event_key)
+        c.add(item(1, 'a', 'ItemStarted'))
+        c.add(item(2, 'a', 'ItemFinished'))
+        self.assertEqual(len(c.flush()), 2)
+
+    def test_uncoalesced_keys(self):
+        c = EventCoalescer(key=lambda e: None)
+        c.add(item(1, 'a'))
+        c.add(item(2, 'a'))
+        self.assertEqual(len(c.flush()), 2)
+
+    def test_generator(self):
+        events = [item(i, 'ab'[i % 2]) for i in range(10)]
+        batches = list(coalesce(events, window=60, max_items=100))
+        self.assertEqual(len(batches), 1)
+        self.assertEqual([b.count for b in batches[0]], [5, 5])
+
+    def test_pump(self):
+        events = [item(i, 'ab'[i % 2]) for i in range(10)]
+        with EventPump(events) as pump:
+            batches = list(coalesce(pump, window=0.01))
+        self.assertEqual(sum(b.count for batch in batches for b in batch), 10)
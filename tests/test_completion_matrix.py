@@ -0,0 +1,163 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import asyncio
+import threading
+import unittest
+
+from syncthing import CompletionMatrix, Database, SyncthingError
+from syncthing.cache import ResponseCache
+
+try:
+    from syncthing.aio import AsyncDatabase
+except ImportError:
+    AsyncDatabase = None
+
+CONFIG = {
+    'folders': [
+        {'id': 'photos', 'devices': [{'deviceID': 'B'}, {'deviceID': 'A'}]},
+        {'id': 'docs', 'devices': [{'deviceID': 'B'}, {'deviceID': 'C'}]},
+        {'id': 'empty'},
+    ]
+}
+
+
+class _Database(Database):
+    """ Answers the configuration and completions without a server. """
+
+    def __init__(self, failing=(), barrier=None, cache=None):
+        super(_Database, self).__init__('', cache=cache)
+        self.failing = failing
+        self.barrier = barrier
+        self.configs = 0
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def _request(self, method, endpoint, *args, **kwargs):
+        assert (method, endpoint) == ('GET', '/rest/system/config'), endpoint
+        self.configs += 1
+        return CONFIG
+
+    def completion(self, device, folder):
+        with self.lock:
+            self.requested.append((device, folder))
+        if self.barrier is not None:
+            # raises BrokenBarrierError unless the cells run concurrently
+            self.barrier.wait()
+        if (device, folder) in self.failing:
+            raise SyncthingError('%s %s failed' % (device, folder))
+        return len(device + folder) * 10.0
+
+
+class TestCompletionMatrix(unittest.TestCase):
+
+    def test_cells(self):
+        devices, folders, cells = Database._completion_cells(CONFIG)
+        self.assertEqual(devices, ['A', 'B', 'C'])
+        self.assertEqual(folders, ['docs', 'empty', 'photos'])
+        self.assertEqual(cells, [(0, 2), (1, 0), (1, 2), (2, 0)])
+
+        devices, folders, cells = Database._completion_cells(
+            CONFIG, devices=['C', 'X'], folders=['docs'])
+        self.assertEqual((devices, folders, cells), (['C', 'X'], ['docs'],
+                                                     [(0, 0)]))
+
+    def test_fan_out(self):
+        db = _Database(barrier=threading.Barrier(4, timeout=5))
+        matrix = db.completion_matrix(max_workers=4)
+        self.assertIsInstance(matrix, CompletionMatrix)
+        # only the shared cells are requested, once each
+        self.assertEqual(sorted(db.requested), [
+            ('A', 'photos'), ('B', 'docs'), ('B', 'photos'), ('C', 'docs')])
+        self.assertEqual(matrix.values, [[None, None, 70.0],
+                                         [50.0, None, 70.0],
+                                         [50.0, None, None]])
+        self.assertEqual(matrix.errors, {})
+        self.assertEqual(matrix.as_dict(), {'A': {'photos': 70.0},
+                                            'B': {'docs': 50.0,
+                                                  'photos': 70.0},
+                                            'C': {'docs': 50.0}})
+        self.assertIsNone(matrix.get('A', 'docs'))
+        self.assertIsNone(matrix.get('Z', 'docs'))
+
+    def test_errors(self):
+        db = _Database(failing=[('B', 'docs')])
+        matrix = db.completion_matrix(devices=['B'])
+        self.assertEqual(matrix.devices, ['B'])
+        self.assertEqual(matrix.values, [[None, None, 70.0]])
+        self.assertEqual(list(matrix.errors), [('B', 'docs')])
+        self.assertIsInstance(matrix.errors[('B', 'docs')], SyncthingError)
+
+    def test_empty(self):
+        matrix = _Database().completion_matrix(folders=['empty'])
+        self.assertEqual(matrix.values, [[None], [None], [None]])
+
+    def test_cached_config(self):
+        # a plain TTL, the stub can't answer conditional requests
+        db = _Database(cache=ResponseCache(revalidate=()))
+        first, second = db.completion_matrix(), db.completion_matrix()
+        self.assertEqual(first.values, second.values)
+        self.assertEqual(db.configs, 1)
+        self.assertEqual(len(db.requested), 8)
+
+    @unittest.skipIf(AsyncDatabase is None, 'aiohttp is not installed')
+    def test_async_cached_config(self):
+        configs = []
+
+        class _AsyncDatabase(AsyncDatabase):
+
+            async def _request(self, method, endpoint, *args, **kwargs):
+                configs.append(endpoint)
+                return CONFIG
+
+            async def completion(self, device, folder):
+                return 100.0
+
+        async def run():
+            db = _AsyncDatabase('', cache=ResponseCache(revalidate=()))
+            await db.completion_matrix()
+            return await db.completion_matrix()
+
+        matrix = asyncio.run(run())
+        self.assertEqual(len(matrix.as_dict()), 3)
+        # the config goes through _get, like Database.completion_matrix
+        self.assertEqual(configs, ['/rest/system/config'])
+
+    @unittest.skipIf(AsyncDatabase is None, 'aiohttp is not installed')
+    def test_async(self):
+        requested = []
+
+        class _AsyncDatabase(AsyncDatabase):
+
+            async def _request(self, method, endpoint, *args, **kwargs):
+                return CONFIG
+
+            async def completion(self, device, folder):
+                requested.append((device, folder))
+                if device == 'C':
+                    raise SyncthingError('down')
+                return 100.0
+
+        matrix = asyncio.run(_AsyncDatabase('').completion_matrix())
+        self.assertEqual(len(requested), 4)
+        self.assertEqual(matrix.as_dict(), {'A': {'photos': 100.0},
+                                            'B': {'docs': 100.0,
+                                                  'photos': 100.0},
+                                            'C': {}})
+        self.assertEqual(list(matrix.errors), [('C', 'docs')])
@@ -0,0 +1,149 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from syncthing import Events
+from syncthing.cursor import (Cursor, CursorStore, MemoryCursorStore,
+                              FileCursorStore)
+
+
+class ScriptedEvents(Events):
+    """ Serves event ids from a list instead of a Syncthing instance. """
+
+    def __init__(self, ids, start_time='T1', **kwargs):
+        super(ScriptedEvents, self).__init__('', **kwargs)
+        self.ids = ids
+        self.start_time = start_time
+        self.polls = []
+
+    def get(self, endpoint, params=None, **kwargs):
+        if endpoint == 'system/status':
+            return {'startTime': self.start_time}
+        self.polls.append(params['since'])
+        data = [{'id': i} for i in self.ids if i > params['since']][:3]
+        if not data:
+            self.stop()
+        return data
+
+
+class TestCursorStores(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'events.cursor')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_memory(self):
+        store = MemoryCursorStore()
+        self.assertIsNone(store.load('events'))
+        store.save('events', (3, 'T1'))
+        self.assertEqual(store.load('events'), Cursor(3, 'T1'))
+
+    def test_file_roundtrip(self):
+        store = FileCursorStore(self.path, fsync_interval=60)
+        store.save('events', Cursor(3, 'T1'))
+        store.save('events/disk', Cursor(7, 'T1'))
+        self.assertTrue(store._unsynced)
+        store.close()
+        self.assertFalse(store._unsynced)
+        self.assertEqual(os.listdir(self.dir), ['events.cursor'])
+
+        store = FileCursorStore(self.path)
+        self.assertEqual(store.load('events'), Cursor(3, 'T1'))
+        self.assertEqual(store.load('events/disk'), Cursor(7, 'T1'))
+
+    def test_abstract(self):
+        self.assertRaises(TypeError, CursorStore)
+
+        class LoadOnly(CursorStore):
+            def load(self, key):
+                return None
+
+        self.assertRaises(TypeError, LoadOnly)
+
+    def test_file_unreadable(self):
+        with open(self.path, 'w') as f:
+            f.write('{"events": [3,')
+        self.assertIsNone(FileCursorStore(self.path).load('events'))
+
+
+class TestResumableEvents(unittest.TestCase):
+
+    def test_resume(self):
+        store = MemoryCursorStore()
+        events = ScriptedEvents([1, 2, 3, 4, 5], cursor_store=store)
+        for event in events:
+            if event['id'] == 2:
+                break
+        self.assertEqual(store.load('events'), Cursor(2, 'T1'))
+
+        events = ScriptedEvents([1, 2, 3, 4, 5], cursor_store=store)
+        self.assertEqual([e['id'] for e in events], [3, 4, 5])
+        self.assertEqual(events.polls[0], 2)
+        self.assertEqual(store.load('events'), Cursor(5, 'T1'))
+
+    def test_checkpoint_every(self):
+        store = MemoryCursorStore()
+        events = ScriptedEvents(range(1, 8), cursor_store=store,
+                                checkpoint_every=3, checkpoint_interval=60)
+        seen = []
+        for event in events:
+            seen.append(store.load('events'))
+        self.assertEqual(seen[3], Cursor(3, 'T1'))
+        self.assertEqual(seen[6], Cursor(6, 'T1'))
+        self.assertEqual(store.load('events'), Cursor(7, 'T1'))
+
+    def test_flush_on_stop(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        store = FileCursorStore(os.path.join(tmp, 'events.cursor'),
+                                fsync_interval=60)
+        events = ScriptedEvents([1, 2, 3, 4, 5], cursor_store=store,
+                                checkpoint_every=2)
+        for event in events:
+            if event['id'] == 3:
+                # the batched checkpoint is written but not synced yet
+                self.assertEqual(store.load('events'), Cursor(2, 'T1'))
+                self.assertTrue(store._unsynced)
+        self.assertEqual(store.load('events'), Cursor(5, 'T1'))
+        self.assertFalse(store._unsynced)
+
+        # nothing new to save, an earlier batched save is still synced
+        store.save('events', Cursor(5, 'T1'))
+        self.assertTrue(store._unsynced)
+        events = ScriptedEvents([1, 2, 3, 4, 5], cursor_store=store)
+        self.assertEqual(list(events), [])
+        self.assertFalse(store._unsynced)
+
+    def test_syncthing_restarted(self):
+        store = MemoryCursorStore()
+        store.save('events', Cursor(40, 'T1'))
+        events = ScriptedEvents([1, 2], start_time='T2', cursor_store=store)
+        self.assertEqual([e['id'] for e in events], [1, 2])
+        self.assertEqual(store.load('events'), Cursor(2, 'T2'))
+
+    def test_keys(self):
+        self.assertEqual(Events._cursor_key('events', []), 'events')
+        self.assertEqual(Events._cursor_key('events', ['b', 'a']),
+                         'events?events=a,b')
@@ -0,0 +1,138 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import unittest
+
+from requests.exceptions import ConnectionError
+
+from syncthing import Events, SyncthingError
+from syncthing.backoff import Backoff
+
+
+class ScriptedEvents(Events):
+    """ Answers each poll with the next entry of ``script``: a number of
+        events, or an exception to raise. """
+
+    def __init__(self, script, start_times=('T1',), **kwargs):
+        super(ScriptedEvents, self).__init__('', **kwargs)
+        self.script = list(script)
+        self.start_times = list(start_times)
+        self.polls = []
+        self.next_id = 1
+
+    def get(self, endpoint, params=None, **kwargs):
+        if endpoint == 'system/status':
+            start = self.start_times[0]
+            if len(self.start_times) > 1:
+                self.start_times.pop(0)
+            return {'startTime': start}
+        self.polls.append(dict(params))
+        if not self.script:
+            self.stop()
+            return []
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        if step is None:
+            # Syncthing restarted
+            self.next_id = 1
+            return []
+        count = min(step, params['limit'] or step)
+        data = [{'id': i} for i in range(self.next_id, self.next_id + count)]
+        self.next_id += step
+        return data
+
+
+class TestBackoff(unittest.TestCase):
+
+    def test_delays(self):
+        b = Backoff(initial=1, maximum=5, multiplier=2, jitter=0)
+        self.assertEqual([b.delay(n) for n in range(5)], [1, 2, 4, 5, 5])
+        self.assertEqual(b.delay(10000), 5)
+
+    def test_jitter(self):
+        b = Backoff(initial=1, jitter=0.5)
+        for _ in range(50):
+            self.assertTrue(0.5 <= b.delay(0) <= 1)
+
+    def test_max_attempts(self):
+        b = Backoff(max_attempts=2)
+        self.assertIsNotNone(b.delay(1))
+        self.assertIsNone(b.delay(2))
+
+
+class TestLongPolling(unittest.TestCase):
+
+    def test_poll_timeout(self):
+        self.assertEqual(ScriptedEvents([]).poll_timeout, 54)
+        events = ScriptedEvents([2], timeout=10.0)
+        list(events)
+        self.assertEqual(events.polls[0]['timeout'], 9)
+        self.assertEqual(ScriptedEvents([], poll_timeout=5).poll_timeout, 5)
+
+    def test_errors_raise_without_backoff(self):
+        events = ScriptedEvents([ConnectionError('down')])
+        self.assertRaises(SyncthingError, list, events)
+
+    def test_backoff(self):
+        backoff = Backoff(initial=0.001, jitter=0)
+        events = ScriptedEvents([ConnectionError('down'),
+                                 ConnectionError('down'), 2],
+                                backoff=backoff)
+        self.assertEqual([e['id'] for e in events], [1, 2])
+        stats = events.stats()
+        self.assertEqual((stats['errors'], stats['retries']), (2, 2))
+
+    def test_backoff_gives_up(self):
+        events = ScriptedEvents([ConnectionError('down')] * 3,
+                                backoff=Backoff(initial=0.001, max_attempts=2))
+        self.assertRaises(SyncthingError, list, events)
+        self.assertEqual(events.stats()['retries'], 2)
+
+    def test_restart_after_errors(self):
+        events = ScriptedEvents([3, ConnectionError('down'), 2],
+                                start_times=('T1', 'T2'),
+                                backoff=Backoff(initial=0.001))
+        events.next_id = 1
+        ids = []
+        for event in events:
+            ids.append(event['id'])
+            if event['id'] == 3:
+                # the restarted Syncthing numbers its events from 1 again
+                events.next_id = 1
+        self.assertEqual(ids, [1, 2, 3, 1, 2])
+        self.assertEqual(events.polls[-2]['since'], 0)
+
+    def test_adaptive_limit(self):
+        events = ScriptedEvents([10, 10, 10, 1, 1], limit=4,
+                                adaptive_limit=(2, 16))
+        list(events)
+        self.assertEqual([p['limit'] for p in events.polls],
+                         [4, 8, 16, 16, 8, 4])
+        stats = events.stats()
+        self.assertEqual(stats['limit'], 4)
+        # the first two responses were cut by the limit
+        self.assertEqual(stats['missed'], 6 + 2)
+        self.assertEqual(stats['requests'], 6)
+        self.assertEqual(stats['events'], 4 + 8 + 10 + 1 + 1)
+
+    def test_dead_node(self):
+        events = Events('', host='127.0.0.1', port=1, timeout=1.0,
+                        backoff=Backoff(initial=0.001, max_attempts=2))
+        self.assertRaises(SyncthingError, list, events)
+        self.assertEqual(events.stats()['retries'], 2)
@@ -0,0 +1,93 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import time
+import unittest
+
+from syncthing import (CircuitOpenError, RetryPolicy, Syncthing,
+                       SyncthingError)
+from syncthing.fleet import SyncthingFleet
+from syncthing.testing import FakeSyncthing
+
+
+class TestSyncthingFleet(unittest.TestCase):
+
+    def test_nodes(self):
+        with SyncthingFleet([Syncthing('', port=1), Syncthing('', port=2)]) as f:
+            self.assertEqual(sorted(f.nodes), ['localhost:1', 'localhost:2'])
+            self.assertEqual(f.max_workers, 2)
+
+        with SyncthingFleet({'a': {'api_key': '', 'port': 3}}) as f:
+            self.assertEqual(f.nodes['a'].port, 3)
+
+    def test_call_collects_errors(self):
+        nodes = {'up': Syncthing('', port=1), 'down': Syncthing('', port=2)}
+        with SyncthingFleet(nodes) as f:
+            def fn(node):
+                if node.port == 2:
+                    raise SyncthingError('down')
+                return node.port
+            results = f.call(fn)
+            self.assertEqual(results.ok, {'up': 1})
+            self.assertIsInstance(results.failed['down'], SyncthingError)
+
+    def test_attribute_fan_out(self):
+        # nothing is listening on these ports
+        nodes = [Syncthing('', '127.0.0.1', port=1, timeout=1.0)]
+        with SyncthingFleet(nodes) as f:
+            results = f.system.ping()
+            self.assertIsInstance(results.failed['127.0.0.1:1'],
+                                  SyncthingError)
+
+    def test_deadline(self):
+        nodes = {'fast': Syncthing('', port=1), 'slow': Syncthing('', port=2)}
+        with SyncthingFleet(nodes, deadline=0.2) as f:
+            results = f.call(lambda n: time.sleep(n.port - 1) or n.port)
+            self.assertEqual(results.ok, {'fast': 1})
+            self.assertIn('deadline', str(results.failed['slow']))
+
+    def test_deadline_frees_workers(self):
+        fake = FakeSyncthing(latency=2.0).start()
+        self.addCleanup(fake.stop)
+        nodes = {'slow': fake.client(timeout=10.0, retry=RetryPolicy())}
+        with SyncthingFleet(nodes, max_workers=1, deadline=0.2) as f:
+            started = time.monotonic()
+            results = f.system.version()
+            self.assertIn('deadline', str(results.failed['slow']))
+            # the request timed out with the deadline, not after 2s or 10s
+            f._executor.submit(lambda: None).result(5)
+            self.assertLess(time.monotonic() - started, 1.0)
+
+            # no deadline left behind on the worker thread
+            f.deadline = None
+            fake.latency = 0.0
+            self.assertIn('version', f.system.version().ok['slow'])
+
+    def test_health(self):
+        nodes = {'down': Syncthing('', '127.0.0.1', port=1, breaker=True),
+                 'plain': Syncthing('', port=2)}
+        nodes['down'].breaker.failure_threshold = 1
+        with SyncthingFleet(nodes) as f:
+            self.assertEqual(f.health()['down']['state'], 'closed')
+            self.assertIsNone(f.health()['plain'])
+
+            f.call(lambda n: n.system.ping() if n.breaker else None)
+            self.assertEqual(f.health()['down']['state'], 'open')
+
+            results = f.call(lambda n: n.system.ping() if n.breaker else None)
+            self.assertIsInstance(results.failed['down'], CircuitOpenError)
@@ -0,0 +1,179 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import time
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from syncthing import Hooks, MetricsCollector, RateLimiter, RateLimitError
+from syncthing.limits import Limit, TokenBucket
+from syncthing.testing import FakeSyncthing
+
+try:
+    from syncthing.aio import AsyncSyncthing
+except ImportError:
+    AsyncSyncthing = None
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_reserve(self):
+        bucket = TokenBucket(10, burst=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertIsNone(bucket.reserve(max_wait=0.05))
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.01)
+        # queued behind the previous reservation
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.01)
+
+
+    def test_refund(self):
+        bucket = TokenBucket(0.01, burst=2)
+        bucket.reserve()
+        bucket.reserve()
+        self.assertIsNone(bucket.reserve(max_wait=1))
+        bucket.refund()
+        self.assertEqual(bucket.reserve(), 0)
+        # never above the burst
+        bucket.refund()
+        bucket.refund()
+        self.assertEqual((bucket.reserve(), bucket.reserve()), (0, 0))
+        self.assertIsNone(bucket.reserve(max_wait=1))
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_limit_for(self):
+        scan = Limit(rate=0.5)
+        limiter = RateLimiter({'/rest/db/': {'max_in_flight': 8},
+                               '/rest/db/scan': scan,
+                               '/rest/db/browse': None},
+                              default={'rate': 100})
+        self.assertIs(limiter.limit_for('/rest/db/scan'), scan)
+        self.assertEqual(limiter.limit_for('/rest/db/status').max_in_flight,
+                         2)
+        self.assertEqual(limiter.limit_for('/rest/db/need').max_in_flight, 8)
+        self.assertEqual(limiter.limit_for('/rest/db/browse').max_in_flight,
+                         8)
+        self.assertEqual(limiter.limit_for('/rest/system/status').rate, 100)
+        self.assertIsNone(RateLimiter().limit_for('/rest/system/status'))
+
+    def test_rate(self):
+        limiter = RateLimiter({'/rest/db/scan': {'rate': 20, 'burst': 1}})
+        started = time.monotonic()
+        for _ in range(4):
+            limiter.acquire('/rest/db/scan').release()
+        self.assertGreaterEqual(time.monotonic() - started, 0.14)
+
+        stats = limiter.stats()['/rest/db/scan']
+        self.assertEqual(stats['acquired'], 4)
+        self.assertGreater(stats['wait']['max'], 0.04)
+
+        limiter.block = False
+        self.assertIsNone(limiter.acquire('/rest/db/scan'))
+        self.assertEqual(limiter.stats()['/rest/db/scan']['rejected'], 1)
+
+    def test_refused_refunds(self):
+        # a request refused for want of a slot gives its token back
+        limiter = RateLimiter({'/rest/db/scan': {'rate': 0.01, 'burst': 2,
+                                                 'max_in_flight': 1}},
+                              block=False)
+        permit = limiter.acquire('/rest/db/scan')
+        for _ in range(3):
+            self.assertIsNone(limiter.acquire('/rest/db/scan'))
+        permit.release()
+        self.assertIsNotNone(limiter.acquire('/rest/db/scan'))
+
+    def test_refused_refunds_async(self):
+        limiter = RateLimiter({'/rest/db/scan': {'rate': 0.01, 'burst': 2,
+                                                 'max_in_flight': 1}},
+                              max_wait=0.01)
+
+        async def main():
+            permit = await limiter.acquire_async('/rest/db/scan')
+            refused = await limiter.acquire_async('/rest/db/scan')
+            permit.release()
+            return refused, await limiter.acquire_async('/rest/db/scan')
+
+        refused, permit = asyncio.run(main())
+        self.assertIsNone(refused)
+        self.assertIsNotNone(permit)
+
+
+class TestLimiterClient(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeSyncthing(latency=0.1).start()
+
+    def tearDown(self):
+        self.fake.stop()
+
+    def test_max_in_flight(self):
+        metrics = MetricsCollector()
+        limiter = RateLimiter({'/rest/db/status': {'max_in_flight': 1}})
+        with self.fake.client(limiter=limiter, hooks=Hooks(metrics)) as s:
+            self.assertIs(s.db.limiter, limiter)
+            started = time.monotonic()
+            with ThreadPoolExecutor(3) as pool:
+                list(pool.map(s.db.status, ['default'] * 3))
+            self.assertGreaterEqual(time.monotonic() - started, 0.3)
+            self.assertEqual(limiter.limit_for('/rest/db/status').in_flight,
+                             0)
+
+            queued = metrics.snapshot()[('GET', '/rest/db/status')]['queued']
+            self.assertEqual(queued['count'], 3)
+            self.assertGreater(queued['max'], 0.15)
+            self.assertIn('syncthing_client_limiter_wait_seconds_count'
+                          '{method="GET",endpoint="/rest/db/status"} 3',
+                          metrics.prometheus())
+
+            limiter.max_wait = 0.05
+            with ThreadPoolExecutor(2) as pool:
+                futures = [pool.submit(s.db.status, 'default')
+                           for _ in range(2)]
+                errors = [f.exception() for f in futures]
+            self.assertEqual(
+                sum(isinstance(e, RateLimitError) for e in errors), 1)
+
+            # event streams are not subject to the limiter
+            self.assertIsNone(s.events().limiter)
+
+    @unittest.skipIf(AsyncSyncthing is None, 'aiohttp is not installed')
+    def test_async(self):
+        limiter = RateLimiter({'/rest/db/status': {'max_in_flight': 1}})
+
+        async def main():
+            async with AsyncSyncthing('', port=self.fake.port,
+                                      limiter=limiter) as s:
+                started = time.monotonic()
+                await asyncio.gather(
+                    *[s.db.status('default') for _ in range(3)])
+                elapsed = time.monotonic() - started
+
+                limiter.block = False
+                results = await asyncio.gather(
+                    *[s.db.status('default') for _ in range(2)],
+                    return_exceptions=True)
+                return elapsed, results
+
+        elapsed, results = asyncio.run(main())
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertIsInstance(results[1], RateLimitError)
+        self.assertEqual(self.fake.calls[('GET', '/rest/db/status')], 4)
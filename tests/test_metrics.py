@@ -0,0 +1,144 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import asyncio
+import unittest
+
+from syncthing import Syncthing, SyncthingError
+from syncthing.metrics import Hooks, LatencyHistogram, MetricsCollector
+from syncthing.testing import FakeSyncthing
+
+try:
+    from syncthing.aio import AsyncSyncthing
+except ImportError:
+    AsyncSyncthing = None
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentiles(self):
+        h = LatencyHistogram(significant_digits=2)
+        self.assertIsNone(h.percentile(0.5))
+        values = [i / 1e4 for i in range(1, 10001)]  # 0.1 ms .. 1 s
+        for v in values:
+            h.record(v)
+        self.assertEqual(h.count, 10000)
+        self.assertEqual((h.min, h.max), (values[0], values[-1]))
+        for q in (0.5, 0.9, 0.99, 0.999):
+            exact = values[int(q * len(values)) - 1]
+            self.assertAlmostEqual(h.percentile(q), exact, delta=exact * 0.01)
+        self.assertEqual(h.percentile(1.0), values[-1])
+        # constant memory, whatever the number of values
+        self.assertLess(len(h._counts), 1000)
+
+    def test_cumulative(self):
+        h = LatencyHistogram()
+        for v in (0.001, 0.002, 0.02, 3.0):
+            h.record(v)
+        self.assertEqual(h.cumulative([0.0015, 0.01, 1.0]), [1, 2, 3])
+
+
+class TestHooks(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeSyncthing().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+
+    def test_callbacks(self):
+        seen = []
+        hooks = Hooks()
+        hooks.register(pre_request=lambda i: seen.append(('pre', i.endpoint)),
+                       post_response=lambda i, r: seen.append(
+                           ('post', i.status, r.status_code)),
+                       on_error=lambda i, e: seen.append(('error', i.status)))
+        # a failing hook does not break the request
+        hooks.register(pre_request=lambda i: 1 / 0)
+        with self.fake.client(hooks=hooks) as s:
+            self.assertEqual(s.system.ping(), {'ping': 'pong'})
+            self.fake.fail('/rest/system/ping', status=None)
+            with self.assertRaises(SyncthingError):
+                s.system.ping()
+        self.assertEqual(seen, [('pre', '/rest/system/ping'),
+                                ('post', 200, 200),
+                                ('pre', '/rest/system/ping'),
+                                ('error', None)])
+
+    def test_collector(self):
+        metrics = MetricsCollector()
+        with self.fake.client(hooks=Hooks(metrics)) as s:
+            for _ in range(3):
+                s.system.status()
+            s.system.ping('POST')
+            self.fake.fail('/rest/db/status', status=500)
+            with self.assertRaises(SyncthingError):
+                s.db.status('default')
+            entries = list(s.db.iter_browse('default'))
+
+        snapshot = metrics.snapshot()
+        status = snapshot[('GET', '/rest/system/status')]
+        self.assertEqual(status['requests'], 3)
+        self.assertEqual(status['errors'], 0)
+        self.assertEqual(status['statuses'], {200: 3})
+        self.assertGreater(status['bytes_received'], 0)
+        self.assertEqual(status['latency']['count'], 3)
+        self.assertGreater(status['latency']['p99'], 0)
+        self.assertEqual(snapshot[('POST', '/rest/system/ping')]['bytes_sent'],
+                         2)
+        self.assertEqual(snapshot[('GET', '/rest/db/status')]['statuses'],
+                         {500: 1})
+        self.assertEqual(snapshot[('GET', '/rest/db/status')]['errors'], 1)
+        browse = snapshot[('GET', '/rest/db/browse')]
+        self.assertTrue(entries)
+        self.assertGreater(browse['bytes_received'], 100)
+
+        text = metrics.prometheus()
+        self.assertIn('# TYPE syncthing_client_request_duration_seconds '
+                      'histogram', text)
+        self.assertIn('syncthing_client_requests_total{method="GET",'
+                      'endpoint="/rest/system/status",status="200"} 3', text)
+        self.assertIn('syncthing_client_request_duration_seconds_bucket{'
+                      'method="GET",endpoint="/rest/system/status",'
+                      'le="+Inf"} 3', text)
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {})
+
+    @unittest.skipIf(AsyncSyncthing is None, 'aiohttp is not installed')
+    def test_async(self):
+        metrics = MetricsCollector()
+
+        async def main():
+            async with AsyncSyncthing('', port=self.fake.port,
+                                      hooks=Hooks(metrics)) as s:
+                await s.system.status()
+                return [e async for e in s.db.iter_browse('default')]
+
+        self.assertTrue(asyncio.run(main()))
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot[('GET', '/rest/system/status')]['requests'],
+                         1)
+        self.assertGreater(
+            snapshot[('GET', '/rest/db/browse')]['bytes_received'], 100)
+
+    def test_disabled(self):
+        self.assertIsNone(Syncthing('').system.hooks)
@@ -0,0 +1,118 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import pickle
+import datetime
+import unittest
+
+from syncthing import models
+from syncthing.models import SystemStatus, DeviceStats, FileInfo
+
+STATUS = {
+    'myID': 'P56IOI7-MZJNU2Y-IQGDREY-DM2MGTI-MGL3BXN-PQ6W5BM-TBBZ4TJ-XZWICQ2',
+    'startTime': '2016-06-06T19:41:43.039284753+02:00',
+    'uptime': 2635,
+    'goroutines': 83,
+    'someNewField': [1, 2],
+}
+
+
+class TestModels(unittest.TestCase):
+
+    def test_slots(self):
+        status = SystemStatus(STATUS)
+        self.assertFalse(hasattr(status, '__dict__'))
+        with self.assertRaises(AttributeError):
+            status.not_a_field = 1
+
+    def test_fields(self):
+        status = SystemStatus(STATUS)
+        self.assertEqual(status.my_id, STATUS['myID'])
+        self.assertEqual(status.uptime, 2635)
+        self.assertIsNone(status.alloc)
+        self.assertEqual(status['myID'], STATUS['myID'])
+        self.assertEqual(status.get('someNewField'), [1, 2])
+        self.assertIsNone(status.get('missing'))
+
+    def test_lazy_datetime(self):
+        status = SystemStatus(STATUS)
+        self.assertIsInstance(status._start_time, str)
+        start = status.start_time
+        self.assertIsInstance(start, datetime.datetime)
+        self.assertEqual(start.microsecond, 39284)
+        # only the string is held, a parsed value is never cached next to it
+        self.assertEqual(status._start_time, STATUS['startTime'])
+        self.assertEqual(status.start_time, start)
+
+    def test_memory(self):
+        # missing keys share one sentinel instead of a per-record container
+        stats = DeviceStats({'lastSeen': '1984-12-31T16:00:00-08:00'})
+        self.assertIs(stats._last_connection_duration, models._MISSING)
+        self.assertEqual(set(models.Model.__slots__), {'_extra'})
+        self.assertIsNone(stats._extra)
+
+    def test_raw(self):
+        status = SystemStatus(STATUS)
+        status.start_time
+        raw = status.raw
+        for key, value in STATUS.items():
+            self.assertEqual(raw[key], value)
+        self.assertEqual(SystemStatus(raw), status)
+
+    def test_raw_round_trip(self):
+        doc = {'lastSeen': '1984-12-31T16:00:00-08:00'}
+        stats = DeviceStats(doc)
+        self.assertIsNone(stats.last_connection_duration)
+        self.assertEqual(stats.raw, doc)
+        self.assertEqual(SystemStatus(STATUS).raw, STATUS)
+        self.assertEqual(DeviceStats({}).raw, {})
+        # an explicit null is kept, a missing key is not
+        doc = {'lastSeen': None, 'lastConnectionDurationS': 0}
+        self.assertEqual(DeviceStats(doc).raw, doc)
+        self.assertNotEqual(DeviceStats(doc), DeviceStats({}))
+
+    def test_missing_keys(self):
+        stats = DeviceStats({'lastSeen': '1984-12-31T16:00:00-08:00'})
+        with self.assertRaises(KeyError):
+            stats['lastConnectionDurationS']
+        self.assertIsNone(stats.get('lastConnectionDurationS'))
+        self.assertEqual(pickle.loads(pickle.dumps(stats)).raw, stats.raw)
+
+    def test_pickle(self):
+        status = SystemStatus(STATUS)
+        self.assertEqual(pickle.loads(pickle.dumps(status)), status)
+
+    def test_map(self):
+        stats = DeviceStats.map({
+            'DEVICE': {'lastSeen': '1984-12-31T16:00:00-08:00',
+                       'lastConnectionDurationS': 1.5}})
+        self.assertEqual(stats['DEVICE'].last_seen.year, 1984)
+        self.assertEqual(stats['DEVICE'].last_connection_duration, 1.5)
+        self.assertIsNone(DeviceStats.map(None))
+
+    def test_layouts(self):
+        conns = models.connections({'connections': {'A': {'connected': True}},
+                                    'total': {'inBytesTotal': 10}})
+        self.assertTrue(conns['connections']['A'].connected)
+        self.assertEqual(conns['total'].in_bytes_total, 10)
+
+        info = models.file_info({'availability': None,
+                                 'global': {'name': 'a', 'size': 1},
+                                 'local': {'name': 'a', 'size': 2}})
+        self.assertIsInstance(info['global'], FileInfo)
+        self.assertEqual(info['local'].size, 2)
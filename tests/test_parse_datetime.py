@@ -17,9 +17,17 @@
 # <<
 
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from syncthing import SyncthingError, parse_datetime
+from dateutil.parser import parse as dateutil_parser
+
+from syncthing import (SyncthingError, parse_datetime, keys_to_datetime_many,
+                       datetime64_column)
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
 
 
 class TestParseDatetime(unittest.TestCase):
@@ -42,3 +50,65 @@ class TestParseDatetime(unittest.TestCase):
         ]
         for a, b in tests:
             assert parse_datetime(a).toordinal() == b.toordinal()
+
+    def test_rfc3339_fast_path(self):
+        d = parse_datetime('2016-06-06T19:41:43.039284753+02:00')
+        self.assertEqual(d.microsecond, 39284)
+        self.assertEqual(d.utcoffset(), timedelta(hours=2))
+
+        d = parse_datetime('2017-01-12T08:15:02.5Z')
+        self.assertEqual(d.microsecond, 500000)
+        self.assertEqual(d.utcoffset(), timedelta(0))
+
+        self.assertIsNone(parse_datetime('2016-06-06T19:41:43').tzinfo)
+
+    def test_matches_dateutil(self):
+        for s in ('2016-06-06T19:41:43.039284753+02:00',
+                  '2016-06-06T19:41:43.999999999-08:30',
+                  '1984-12-31T16:00:00-08:00',
+                  '0001-01-01T00:00:00Z',
+                  '2016-06-06 19:41:43.1+00:00'):
+            self.assertEqual(parse_datetime(s), dateutil_parser(s))
+
+    def test_fallback(self):
+        self.assertEqual(parse_datetime('June 6 2016'), datetime(2016, 6, 6))
+        self.assertEqual(parse_datetime('06/07/2016', dayfirst=True),
+                         datetime(2016, 7, 6))
+        self.assertRaises(SyncthingError, parse_datetime,
+                          '2016-13-06T19:41:43Z')
+
+
+class TestBulkDatetime(unittest.TestCase):
+    def test_keys_to_datetime_many(self):
+        events = [{'id': i, 'time': '2016-06-06T19:41:43.039284753+02:00'}
+                  for i in range(3)] + [{'id': 3, 'time': None}, {'id': 4}]
+        self.assertIs(keys_to_datetime_many(events, 'time'), events)
+        self.assertEqual(events[0]['time'],
+                         parse_datetime('2016-06-06T19:41:43.039284753+02:00'))
+        self.assertIs(events[0]['time'], events[2]['time'])
+        self.assertIsNone(events[3]['time'])
+        self.assertNotIn('time', events[4])
+
+    def test_keys_to_datetime_many_mapping(self):
+        stats = {'A': {'lastScan': '2016-06-06T19:41:43Z'},
+                 'B': {'lastScan': '2017-06-06T19:41:43Z'}}
+        keys_to_datetime_many(stats, 'lastScan')
+        self.assertEqual(stats['B']['lastScan'].year, 2017)
+        self.assertIsNone(keys_to_datetime_many(None, 'lastScan'))
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_datetime64_column(self):
+        column = datetime64_column([
+            '2016-06-06T19:41:43.039284753+02:00',
+            '2016-06-06T17:41:43.039284753Z',
+            '0001-01-01T00:00:00Z',
+            None,
+            'June 6 2016',
+        ])
+        self.assertEqual(column.dtype, numpy.dtype('datetime64[ns]'))
+        expected = numpy.datetime64('2016-06-06T17:41:43.039284753', 'ns')
+        self.assertEqual(column[0], expected)
+        self.assertEqual(column[1], expected)
+        self.assertTrue(numpy.isnat(column[2]))
+        self.assertTrue(numpy.isnat(column[3]))
+        self.assertEqual(column[4], numpy.datetime64('2016-06-06', 'ns'))
@@ -0,0 +1,141 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import threading
+import unittest
+
+from syncthing import SyncthingError
+from syncthing.pump import EventPump, event_key
+
+
+def item(i, name):
+    return {'id': i, 'type': 'ItemFinished',
+            'data': {'folder': 'default', 'item': name}}
+
+
+class Gated(object):
+    """ Yields its events once released, then fails if asked to. """
+
+    def __init__(self, events, error=None):
+        self.events = events
+        self.error = error
+        self.released = threading.Event()
+
+    def __iter__(self):
+        self.released.wait(5)
+        for event in self.events:
+            yield event
+        if self.error:
+            raise self.error
+
+
+class TestEventPump(unittest.TestCase):
+
+    def test_batches(self):
+        events = [{'id': i} for i in range(1, 8)]
+        with EventPump(events, batch_size=3) as pump:
+            pump._thread.join(5)
+            batches = list(pump)
+        self.assertEqual([len(b) for b in batches], [3, 3, 1])
+        self.assertEqual(pump.stats()['delivered'], 7)
+        self.assertEqual(pump.depth, 0)
+
+    def test_drop_oldest(self):
+        events = [{'id': i} for i in range(1, 11)]
+        pump = EventPump(events, maxsize=4, policy='drop-oldest').start()
+        pump._thread.join(5)
+        self.assertEqual([e['id'] for e in pump.get_batch()], [7, 8, 9, 10])
+        self.assertEqual((pump.received, pump.dropped, pump.max_depth),
+                         (10, 6, 4))
+
+    def test_coalesce(self):
+        events = [item(1, 'a'), item(2, 'b'), item(3, 'a'), item(4, 'c'),
+                  item(5, 'a')]
+        pump = EventPump(events, maxsize=2, policy='coalesce').start()
+        pump._thread.join(5)
+        self.assertEqual([e['id'] for e in pump.get_batch()], [4, 5])
+        self.assertEqual(pump.coalesced, 1)
+        self.assertEqual(pump.dropped, 3)
+
+    def test_coalesce_index(self):
+        keys = []
+
+        def key(event):
+            keys.append(event['id'])
+            return event_key(event)
+
+        # two queued duplicates of 'a': the newest one is replaced
+        events = [item(1, 'a'), item(2, 'a'), item(3, 'b'), item(4, 'a'),
+                  item(5, 'b')]
+        pump = EventPump(events, maxsize=3, policy='coalesce', key=key)
+        pump.start()._thread.join(5)
+        # one key per event, never recomputed for the queued ones
+        self.assertEqual(keys, [1, 2, 3, 4, 5])
+        self.assertEqual([e['id'] for e in pump.get_batch()], [1, 4, 5])
+        self.assertEqual(pump.coalesced, 2)
+        self.assertEqual(pump._index, {})
+
+        # a key leaves the index with its last queued entry only
+        pump = EventPump([], maxsize=3, policy='coalesce')
+        for event in (item(1, 'a'), item(2, 'a')):
+            pump._put(event)
+        self.assertEqual([e['id'] for e in pump.get_batch(1)], [1])
+        self.assertEqual(len(pump._index), 1)
+        for event in (item(3, 'b'), item(4, 'c'), item(5, 'a')):
+            pump._put(event)
+        # 5 replaces 2, still indexed under 'a'
+        self.assertEqual([e['id'] for e in pump.get_batch()], [5, 3, 4])
+        self.assertEqual(pump.coalesced, 1)
+        self.assertEqual(pump._index, {})
+
+    def test_block(self):
+        source = Gated([{'id': i} for i in range(1, 6)])
+        pump = EventPump(source, maxsize=2, batch_size=1).start()
+        self.assertEqual(pump.get_batch(timeout=0.05), [])
+        source.released.set()
+        ids = [e['id'] for batch in pump for e in batch]
+        self.assertEqual(ids, [1, 2, 3, 4, 5])
+        self.assertEqual(pump.max_depth, 2)
+        self.assertEqual(pump.dropped, 0)
+
+    def test_error_after_drain(self):
+        source = Gated([{'id': 1}], SyncthingError('gone'))
+        source.released.set()
+        pump = EventPump(source).start()
+        pump._thread.join(5)
+        self.assertEqual(pump.get_batch(), [{'id': 1}])
+        self.assertRaises(SyncthingError, pump.get_batch)
+        self.assertEqual(pump.get_batch(), [])
+
+    def test_lag(self):
+        source = Gated([{'id': 1}])
+        source.released.set()
+        pump = EventPump(source).start()
+        pump._thread.join(5)
+        self.assertGreaterEqual(pump.lag, 0.0)
+        pump.get_batch()
+        self.assertEqual(pump.lag, 0.0)
+
+    def test_event_key(self):
+        self.assertEqual(event_key(item(1, 'a')),
+                         ('ItemFinished', 'default', 'a', None))
+        self.assertEqual(event_key({'type': 'Ping', 'data': None}),
+                         ('Ping', None, None, None))
+        self.assertNotEqual(
+            event_key({'type': 'DeviceConnected', 'data': {'id': 'A'}}),
+            event_key({'type': 'DeviceConnected', 'data': {'id': 'B'}}))
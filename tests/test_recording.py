@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from syncthing.recording import EventRecorder, EventReplayer
+
+EVENTS = [{'id': i, 'type': 'ItemFinished', 'time': '2017-01-12T08:15:02Z',
+           'data': {'folder': 'default', 'item': 'file-%d' % i}}
+          for i in range(1, 201)]
+
+
+class TestRecording(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.dir, 'capture', 'events')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_roundtrip(self):
+        with EventRecorder(self.prefix) as recorder:
+            self.assertEqual(list(recorder.tee(EVENTS)), EVENTS)
+        self.assertEqual(recorder.paths, [self.prefix + '.00000.jsonl.gz'])
+        self.assertEqual(list(EventReplayer(self.prefix)), EVENTS)
+
+    def test_rotation(self):
+        with EventRecorder(self.prefix, max_bytes=4096,
+                           buffer_size=1024) as recorder:
+            for event in EVENTS:
+                recorder.write(event)
+        self.assertGreater(len(recorder.paths), 3)
+        self.assertEqual(list(EventReplayer(self.prefix)), EVENTS)
+
+        # a new capture continues the numbering
+        with EventRecorder(self.prefix) as second:
+            second.write({'id': 201})
+        replayed = list(EventReplayer(self.prefix))
+        self.assertEqual(replayed[-1], {'id': 201})
+        self.assertEqual(len(replayed), 201)
+
+    def test_foreign_files(self):
+        with EventRecorder(self.prefix) as recorder:
+            recorder.write({'id': 1})
+        # share the prefix and the extension, but are not part of a capture
+        for name in ('.00001x.jsonl.gz', '.00002.bak.jsonl.gz',
+                     '.old.jsonl.gz', '.00003.jsonl.gz.tmp'):
+            with open(self.prefix + name, 'wb') as f:
+                f.write(b'not a capture')
+        self.assertEqual(list(EventReplayer(self.prefix)), [{'id': 1}])
+        with EventRecorder(self.prefix) as second:
+            second.write({'id': 2})
+        self.assertEqual(second.paths, [self.prefix + '.00001.jsonl.gz'])
+
+    def test_truncated(self):
+        recorder = EventRecorder(self.prefix, buffer_size=1)
+        for event in EVENTS[:10]:
+            recorder.write(event)
+        recorder._file.flush()
+        # never closed, the gzip trailer is missing
+        replayed = list(EventReplayer(recorder.paths))
+        self.assertEqual(replayed, EVENTS[:len(replayed)])
+
+    def test_pacing(self):
+        path = self.prefix + '.00000.jsonl.gz'
+        with EventRecorder(self.prefix) as recorder:
+            recorder.write({'id': 1})
+            time.sleep(0.2)
+            recorder.write({'id': 2})
+
+        started = time.monotonic()
+        self.assertEqual(len(list(EventReplayer(path, speed=4))), 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+
+        started = time.monotonic()
+        list(EventReplayer(path))
+        self.assertLess(time.monotonic() - started, 0.04)
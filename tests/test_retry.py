@@ -0,0 +1,117 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import time
+import asyncio
+import unittest
+
+from syncthing import RetryPolicy, SyncthingError
+from syncthing.backoff import Backoff
+from syncthing.testing import FakeSyncthing
+
+try:
+    from syncthing.aio import AsyncSyncthing
+except ImportError:
+    AsyncSyncthing = None
+
+FAST = Backoff(initial=0.01, maximum=0.05, jitter=0)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_delay(self):
+        policy = RetryPolicy(max_attempts=3, backoff=FAST)
+        started = time.monotonic()
+        self.assertIsNone(policy.delay(0, started, 200))
+        self.assertIsNone(policy.delay(0, started, 500))
+        self.assertEqual(policy.delay(0, started, 503), 0.01)
+        self.assertEqual(policy.delay(1, started, transient=True), 0.02)
+        self.assertIsNone(policy.delay(2, started, 503))
+        self.assertIsNone(policy.delay(2, started, 200))
+        self.assertEqual(policy.stats(),
+                         {'retries': 2, 'give_ups': 1, 'recoveries': 1})
+
+        policy = RetryPolicy(backoff=Backoff(initial=1.0, jitter=0),
+                             deadline=0.5)
+        self.assertIsNone(policy.delay(0, started, transient=True))
+        self.assertEqual(policy.give_ups, 1)
+
+    def test_applies(self):
+        policy = RetryPolicy(endpoints=['/rest/db/scan'])
+        self.assertTrue(policy.applies('GET', '/rest/db/status'))
+        self.assertTrue(policy.applies('POST', '/rest/db/scan'))
+        self.assertFalse(policy.applies('POST', '/rest/system/restart'))
+
+
+class TestRetries(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeSyncthing().start()
+
+    def tearDown(self):
+        self.fake.stop()
+
+    def test_get(self):
+        policy = RetryPolicy(max_attempts=3, backoff=FAST)
+        with self.fake.client(retry=policy) as s:
+            self.fake.fail('/rest/system/status', status=None)
+            self.fake.fail('/rest/system/status', status=503)
+            self.assertEqual(s.system.status()['myID'], self.fake.my_id)
+            self.assertEqual(self.fake.calls[('GET', '/rest/system/status')],
+                             3)
+
+            self.fake.fail('/rest/system/version', status=502, times=3)
+            with self.assertRaises(SyncthingError):
+                s.system.version()
+
+            # a 500 is Syncthing refusing the request, not a hiccup
+            with self.assertRaises(SyncthingError):
+                s.db.status('missing')
+            self.assertEqual(self.fake.calls[('GET', '/rest/db/status')], 1)
+
+        self.assertEqual(policy.stats(),
+                         {'retries': 4, 'give_ups': 1, 'recoveries': 1})
+
+    def test_post_opt_in(self):
+        with self.fake.client(retry=RetryPolicy(backoff=FAST)) as s:
+            self.fake.fail('/rest/db/scan', status=503)
+            with self.assertRaises(SyncthingError):
+                s.db.scan('default')
+            self.assertEqual(self.fake.calls[('POST', '/rest/db/scan')], 1)
+
+        policy = RetryPolicy(backoff=FAST, endpoints=['/rest/db/scan'])
+        with self.fake.client(retry=policy) as s:
+            self.fake.fail('/rest/db/scan', status=503)
+            self.assertEqual(s.db.scan('default'), '')
+            self.assertEqual(self.fake.calls[('POST', '/rest/db/scan')], 3)
+
+    @unittest.skipIf(AsyncSyncthing is None, 'aiohttp is not installed')
+    def test_async(self):
+        policy = RetryPolicy(max_attempts=3, backoff=FAST)
+
+        async def main():
+            async with AsyncSyncthing('', port=self.fake.port,
+                                      retry=policy) as s:
+                # aiohttp itself retries a dropped connection once
+                self.fake.fail('/rest/system/status', status=503, times=2)
+                return await s.system.status()
+
+        self.assertEqual(asyncio.run(main())['myID'], self.fake.my_id)
+        self.assertEqual(policy.stats(),
+                         {'retries': 2, 'give_ups': 0, 'recoveries': 1})
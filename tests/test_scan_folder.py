@@ -16,21 +16,15 @@
 #     python-syncthing, 2016
 # <<
 
-import os
 import unittest
 
 from six import string_types
 
-from syncthing import Syncthing, SyncthingError, BaseAPI
-
-KEY = os.getenv('SYNCTHING_API_KEY')
-HOST = os.getenv('SYNCTHING_HOST', '127.0.0.1')
-PORT = os.getenv('SYNCTHING_PORT', 8384)
-IS_HTTPS = bool(int(os.getenv('SYNCTHING_HTTPS', '0')))
-SSL_CERT_FILE = os.getenv('SYNCTHING_CERT_FILE')
+from syncthing.testing import env_client
 
 def syncthing():
-    return Syncthing(KEY, HOST, PORT, 10.0, IS_HTTPS, SSL_CERT_FILE)
+    # SYNCTHING_* environment variables, or a local FakeSyncthing
+    return env_client()
 
 
 s = syncthing()
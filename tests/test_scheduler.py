@@ -0,0 +1,134 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import time
+import threading
+import unittest
+
+from syncthing import Hooks, SyncthingError
+from syncthing.scheduler import ScanScheduler, merge_subs
+from syncthing.testing import FakeSyncthing
+
+
+class TestMergeSubs(unittest.TestCase):
+
+    def test_merge(self):
+        self.assertEqual(merge_subs(['a/b', 'a', 'a b', 'a/b/c']),
+                         ['a', 'a b'])
+        self.assertEqual(merge_subs(['/a/', './a', 'b\\c']), ['a', 'b/c'])
+        self.assertEqual(merge_subs(['a', None]), [''])
+        self.assertEqual(merge_subs([]), [])
+
+        # siblings merge into their parent, which may merge in turn
+        self.assertEqual(merge_subs(['x/a/1', 'x/a/2', 'x/a/3', 'x/b', 'x/c',
+                                     'y'], threshold=3), ['x', 'y'])
+        # and the parent covers the deeper paths of its other children
+        self.assertEqual(merge_subs(['a/1', 'a/2', 'a/3', 'a/b/c'],
+                                    threshold=3), ['a'])
+        self.assertEqual(merge_subs(['a/1', 'a/2', 'a/b/c', 'a/b/d', 'e'],
+                                    threshold=2), [''])
+        self.assertEqual(merge_subs(['a', 'b', 'c'], threshold=3), [''])
+        self.assertEqual(merge_subs(['a/%d' % i for i in range(5)] + ['b'],
+                                    threshold=10, max_subs=5), [''])
+
+
+class _RecordingDatabase(object):
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.running = {}
+        self.max_running = {}
+        self.lock = threading.Lock()
+
+    def scan(self, folder, sub=None, next_=None):
+        with self.lock:
+            self.calls.append((folder, sub, next_))
+            self.running[folder] = self.running.get(folder, 0) + 1
+            self.max_running[folder] = max(self.max_running.get(folder, 0),
+                                           self.running[folder])
+            total = sum(self.running.values())
+            self.max_running['*'] = max(self.max_running.get('*', 0), total)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running[folder] -= 1
+        return ''
+
+
+class TestScanScheduler(unittest.TestCase):
+
+    def test_batch(self):
+        db = _RecordingDatabase()
+        with ScanScheduler(db, window=10, threshold=4) as scheduler:
+            for i in range(50):
+                scheduler.schedule('f1', 'photos/%d.jpg' % i)
+            scheduler.schedule('f1', 'docs/a.txt', next_=30)
+            scheduler.schedule('f1', 'docs/a.txt', next_=10)
+            scheduler.schedule('f1', 'docs/b.txt')
+            scheduler.schedule('f2', 'x')
+            scheduler.schedule('f2', None)
+            self.assertEqual(scheduler.pending, 55)
+            self.assertEqual(db.calls, [])
+
+        self.assertEqual(sorted(db.calls), [
+            ('f1', 'docs/a.txt', 30), ('f1', 'docs/b.txt', 30),
+            ('f1', 'photos', 30), ('f2', None, None)])
+        # folders in parallel, paths of a folder one at a time
+        self.assertEqual(db.max_running['f1'], 1)
+        self.assertEqual(db.max_running['*'], 2)
+        self.assertEqual(scheduler.stats(),
+                         {'requested': 55, 'sent': 4, 'failed': 0,
+                          'deduped': 1, 'merged': 50, 'pending': 0,
+                          'saved': 51})
+        self.assertEqual(scheduler.saved, 51)
+
+        with self.assertRaises(SyncthingError):
+            scheduler.schedule('f1')
+
+    def test_window(self):
+        db = _RecordingDatabase(delay=0)
+        with ScanScheduler(db, window=0.05, max_delay=0.2) as scheduler:
+            scheduler.schedule('f1', 'a')
+            time.sleep(0.15)
+            self.assertEqual(db.calls, [('f1', 'a', None)])
+
+            # a steady stream of requests is flushed after max_delay
+            started = time.monotonic()
+            while not db.calls[1:] and time.monotonic() - started < 1:
+                scheduler.schedule('f1', 'b')
+                time.sleep(0.01)
+            self.assertEqual(db.calls[1], ('f1', 'b', None))
+            self.assertLess(time.monotonic() - started, 0.4)
+
+    def test_syncthing(self):
+        subs = []
+        hooks = Hooks()
+        hooks.register(pre_request=lambda info: subs.append(
+            info.params['sub']))
+
+        with FakeSyncthing() as fake, fake.client(hooks=hooks) as s:
+            fake.fail('/rest/db/scan', status=503)
+            with ScanScheduler(s, window=0.01) as scheduler:
+                scheduler.schedule('default', 'a/b')
+                scheduler.schedule('default', 'a')
+                scheduler.flush()
+                scheduler.schedule('default', 'c')
+            self.assertEqual(subs, ['a', 'c'])
+            self.assertEqual(fake.calls[('POST', '/rest/db/scan')], 2)
+            self.assertEqual(scheduler.failed, 1)
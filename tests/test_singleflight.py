@@ -0,0 +1,110 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import time
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from syncthing import SingleFlight, SyncthingError
+from syncthing.testing import FakeSyncthing
+
+try:
+    from syncthing.aio import AsyncSyncthing
+except ImportError:
+    AsyncSyncthing = None
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_do(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return {'n': len(calls)}
+
+        with ThreadPoolExecutor(5) as pool:
+            leader = pool.submit(flight.do, 'k', fn)
+            started.wait()
+            followers = [pool.submit(flight.do, 'k', fn) for _ in range(4)]
+            results = [f.result() for f in [leader] + followers]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(flight.stats(),
+                         {'calls': 1, 'shared': 4, 'in_flight': 0})
+
+        # finished calls are not reused
+        self.assertEqual(flight.do('k', fn), {'n': 2})
+
+    def test_error(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def fn():
+            started.set()
+            time.sleep(0.1)
+            raise SyncthingError('boom')
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(flight.do, 'k', fn)
+            started.wait()
+            follower = pool.submit(flight.do, 'k', fn)
+            for future in (leader, follower):
+                self.assertIsInstance(future.exception(), SyncthingError)
+        self.assertEqual(len(flight), 0)
+
+
+class TestSingleFlightClient(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeSyncthing(latency=0.2).start()
+
+    def tearDown(self):
+        self.fake.stop()
+
+    def test_threads(self):
+        with self.fake.client(single_flight=True) as s:
+            with ThreadPoolExecutor(8) as pool:
+                statuses = list(pool.map(s.db.status, ['default'] * 6 +
+                                         ['2vw2z-xwpvk'] * 2))
+            self.assertEqual(statuses[0], statuses[5])
+            self.assertEqual(self.fake.calls[('GET', '/rest/db/status')], 2)
+            self.assertEqual(s.single_flight.stats()['shared'], 6)
+
+            # not shared with the event streams
+            self.assertIsNone(s.events().single_flight)
+
+    @unittest.skipIf(AsyncSyncthing is None, 'aiohttp is not installed')
+    def test_async(self):
+        async def main():
+            async with AsyncSyncthing('', port=self.fake.port,
+                                      single_flight=True) as s:
+                return await asyncio.gather(
+                    *[s.db.status('default') for _ in range(5)])
+
+        statuses = asyncio.run(main())
+        self.assertEqual(len(statuses), 5)
+        self.assertEqual(self.fake.calls[('GET', '/rest/db/status')], 1)
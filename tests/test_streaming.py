@@ -0,0 +1,141 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import json
+import unittest
+
+from syncthing import Database, SyncthingError
+from syncthing.streaming import (BrowseEntry, browse_entries, json_events,
+                                 _json_events)
+
+
+def chunked(doc, size):
+    body = json.dumps(doc, ensure_ascii=False).encode('utf-8')
+    return chunked_bytes(body, size)
+
+
+def chunked_bytes(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def rebuild(events):
+    """ Assembles parser events back into the Python value. """
+    stack, keys, root = [], [], []
+    for event, value in events:
+        if event == 'map_key':
+            keys[-1] = value
+            continue
+        if event in ('end_map', 'end_array'):
+            stack.pop()
+            keys.pop()
+            continue
+        if event == 'start_map':
+            value = {}
+        elif event == 'start_array':
+            value = []
+        if not stack:
+            root.append(value)
+        elif isinstance(stack[-1], list):
+            stack[-1].append(value)
+        else:
+            stack[-1][keys[-1]] = value
+        if event in ('start_map', 'start_array'):
+            stack.append(value)
+            keys.append(None)
+    return root[0]
+
+
+class TestJsonEvents(unittest.TestCase):
+    docs = [
+        {'a': [1, 2.5, -300.0, True, False, None, 'x"y\\u00e9'],
+         'b': {}, 'c': [], 'ü': 'ß'},
+        [[[]]],
+        {'k': {'k': {'k': [{'z': None}]}}},
+        12345,
+        'plain',
+    ]
+
+    def test_any_chunk_boundary(self):
+        for parse in (_json_events, json_events):
+            for doc in self.docs:
+                for size in (1, 2, 3, 7, 4096):
+                    self.assertEqual(rebuild(parse(chunked(doc, size))), doc)
+
+    def test_malformed(self):
+        with self.assertRaises(ValueError):
+            list(_json_events([b'{"a": [1, 2']))
+        with self.assertRaises(ValueError):
+            list(_json_events([b'{"a": nope}']))
+        # unbalanced or mismatched closing brackets
+        for body in (b'}', b']', b'[1]]', b'{"a": 1}}', b'{"a": 1]', b'[1}'):
+            with self.assertRaises(ValueError):
+                list(_json_events([body]))
+
+    def test_separators(self):
+        # a missing, misplaced or extra ':' or ','
+        for body in (b'{"a":1 "b":2}', b'[1:2]', b'[1 2]', b'{"a" 1}',
+                     b'{"a":}', b'{"a"}', b'{"a":1,}', b'[1,]', b'[,1]',
+                     b'{,}', b'{1:2}', b'{"a"::1}', b':1', b'1 2', b'{} []',
+                     b'', b'  '):
+            for parse in (_json_events, json_events):
+                with self.assertRaises(ValueError, msg=body):
+                    list(parse(chunked_bytes(body, 1)))
+                with self.assertRaises(ValueError, msg=body):
+                    list(parse([body]))
+
+        events = list(_json_events(chunked_bytes(b' { "a" : [ 1 , 2 ] } ', 1)))
+        self.assertEqual([e for e, _ in events],
+                         ['start_map', 'map_key', 'start_array', 'number',
+                          'number', 'end_array', 'end_map'])
+
+    def test_malformed_browse(self):
+        class _Database(Database):
+            def _stream(self, endpoint, params=None, chunk_size=None):
+                return iter([b'[{"name": "a"}', b']]'])
+
+        with self.assertRaises(SyncthingError):
+            list(_Database('').iter_browse('default'))
+
+
+class TestBrowseEntries(unittest.TestCase):
+
+    def test_v014_layout(self):
+        doc = {'docs': {'a.txt': ['2015-04-20T22:20:45+09:00', 130],
+                        'sub': {'b': ['2015-04-20T22:20:46+09:00', 1]}},
+               'c': ['2015-04-20T22:20:47+09:00', 5],
+               'empty': {}}
+        entries = list(browse_entries(_json_events(chunked(doc, 5)), 'root'))
+        self.assertEqual(entries, [
+            BrowseEntry('root/docs/a.txt', '2015-04-20T22:20:45+09:00', 130),
+            BrowseEntry('root/docs/sub/b', '2015-04-20T22:20:46+09:00', 1),
+            BrowseEntry('root/c', '2015-04-20T22:20:47+09:00', 5),
+        ])
+
+    def test_tree_entry_layout(self):
+        doc = [{'name': 'docs', 'modTime': 't0', 'size': 0,
+                'type': 'FILE_INFO_TYPE_DIRECTORY',
+                'children': [{'name': 'a.txt', 'modTime': 't1', 'size': 3,
+                              'type': 'FILE_INFO_TYPE_FILE'},
+                             {'name': 'e', 'type': 'FILE_INFO_TYPE_DIRECTORY',
+                              'children': []}]},
+               {'name': 'c', 'modTime': 't2', 'size': 5,
+                'type': 'FILE_INFO_TYPE_FILE'}]
+        entries = list(browse_entries(_json_events(chunked(doc, 3))))
+        self.assertEqual(entries, [BrowseEntry('docs/a.txt', 't1', 3),
+                                   BrowseEntry('c', 't2', 5)])
@@ -17,20 +17,19 @@
 # <<
 from __future__ import unicode_literals
 
-import os
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-from syncthing import Syncthing, SyncthingError, BaseAPI
-
-KEY = os.getenv('SYNCTHING_API_KEY')
-HOST = os.getenv('SYNCTHING_HOST', '127.0.0.1')
-PORT = os.getenv('SYNCTHING_PORT', 8384)
-IS_HTTPS = bool(int(os.getenv('SYNCTHING_HTTPS', '0')))
-SSL_CERT_FILE = os.getenv('SYNCTHING_CERT_FILE')
+import syncthing as api
+from syncthing import (Syncthing, SyncthingError, BaseAPI, PooledSession,
+                       Database, NeedEntry)
+from syncthing.testing import env_client
 
 def syncthing():
-    return Syncthing(KEY, HOST, PORT, 10.0, IS_HTTPS, SSL_CERT_FILE)
+    # SYNCTHING_* environment variables, or a local FakeSyncthing
+    return env_client()
 
 
 class TestBaseAPI(unittest.TestCase):
@@ -51,6 +50,19 @@ class TestBaseAPI(unittest.TestCase):
         assert hasattr(s, 'stats')
         assert hasattr(s, 'misc')
 
+    def test_c_shared_session(self):
+        with Syncthing('', pool_maxsize=4, idle_timeout=5.0) as s:
+            sessions = {id(api.session) for api in
+                        (s.system, s.database, s.stats, s.misc, s.events())}
+            self.assertEqual(sessions, {id(s.session)})
+            self.assertEqual(s.session.pool_maxsize, 4)
+            self.assertEqual(s.session.idle_timeout, 5.0)
+
+        # stand-alone instances own, and close, their own pool
+        api = BaseAPI('')
+        self.assertIsInstance(api.session, PooledSession)
+        api.close()
+
     def test_c_connection(self):
         sync = syncthing()
         resp = requests.get(sync.misc.url)
@@ -103,4 +115,113 @@ class TestSystemAPI(unittest.TestCase):
     def test_status(self):
         s = syncthing()
         status = s.system.status()
-        self.assertIsInstance(status, dict)
\ No newline at end of file
+        self.assertIsInstance(status, dict)
+
+class _Executor(ThreadPoolExecutor):
+    """ Remembers the executors :meth:`Database.iter_need` shut down. """
+
+    shut_down = []
+
+    def shutdown(self, *args, **kwargs):
+        _Executor.shut_down.append(self)
+        super(_Executor, self).shutdown(*args, **kwargs)
+
+
+class _Database(Database):
+    """ Serves :meth:`.need` pages of ``names``, without a server. """
+
+    def __init__(self, names, total=True, failing=()):
+        super(_Database, self).__init__('')
+        self.names = names
+        self.total = total
+        self.failing = failing
+        self.pages = []
+        self.lock = threading.Lock()
+
+    def _get(self, endpoint, data=None, headers=None, params=None, *args):
+        assert endpoint == '/rest/db/need', endpoint
+        page, perpage = params['page'], params['perpage']
+        with self.lock:
+            self.pages.append(page)
+        if page in self.failing:
+            raise SyncthingError('page %d failed' % page)
+        names = self.names[(page - 1) * perpage:page * perpage]
+        resp = {'progress': [], 'queued': [],
+                'rest': [{'name': n, 'size': 1} for n in names],
+                'page': page, 'perpage': perpage}
+        if self.total:
+            resp['total'] = len(self.names)
+        return resp
+
+
+class TestDatabaseAPI(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, api, 'ThreadPoolExecutor',
+                        api.ThreadPoolExecutor)
+        api.ThreadPoolExecutor = _Executor
+        del _Executor.shut_down[:]
+
+    def test_iter_need_pages(self):
+        names = ['f%d' % i for i in range(5)]
+        for prefetch in (True, False):
+            for total in (True, False):
+                db = _Database(names, total=total)
+                entries = list(db.iter_need('default', perpage=2,
+                                            prefetch=prefetch))
+                self.assertEqual([e.name for e in entries], names)
+                self.assertTrue(all(e.category == 'rest' for e in entries))
+                self.assertEqual(db.pages, [1, 2, 3])
+
+    def test_iter_need_stops_at_total(self):
+        # a full last page: the total ends the walk, the length can't
+        for prefetch in (True, False):
+            db = _Database(['a', 'b', 'c', 'd'])
+            entries = list(db.iter_need('default', perpage=2,
+                                        prefetch=prefetch))
+            self.assertEqual(len(entries), 4)
+            self.assertEqual(db.pages, [1, 2])
+
+        # without a total one empty page is needed to find the end
+        db = _Database(['a', 'b', 'c', 'd'], total=False)
+        self.assertEqual(len(list(db.iter_need('default', perpage=2))), 4)
+        self.assertEqual(db.pages, [1, 2, 3])
+
+    def test_iter_need_early_exit(self):
+        db = _Database(['f%d' % i for i in range(10)])
+        it = db.iter_need('default', perpage=2)
+        self.assertEqual(next(it).name, 'f0')
+        self.assertEqual(_Executor.shut_down, [])
+        it.close()
+        self.assertEqual(len(_Executor.shut_down), 1)
+        # only the page being consumed and the prefetched one were asked for
+        self.assertLessEqual(set(db.pages), {1, 2})
+
+        list(_Database([]).iter_need('default', perpage=2))
+        self.assertEqual(len(_Executor.shut_down), 2)
+
+    def test_iter_need_prefetch_error(self):
+        db = _Database(['f%d' % i for i in range(6)], failing=(2,))
+        it = db.iter_need('default', perpage=2)
+        # the failed prefetch surfaces once its page is reached
+        self.assertEqual([next(it).name, next(it).name], ['f0', 'f1'])
+        with self.assertRaises(SyncthingError):
+            next(it)
+        self.assertEqual(db.pages, [1, 2])
+        self.assertEqual(len(_Executor.shut_down), 1)
+        self.assertEqual(list(it), [])
+
+    def test_need_page(self):
+        resp = {'progress': [{'name': 'a', 'size': 1}],
+                'queued': None,
+                'rest': [{'name': 'b', 'size': 2}, {'name': 'c', 'size': 3}],
+                'page': 1, 'perpage': 3}
+        entries, more = Database._need_page(resp, 1, 3)
+        self.assertEqual([(e.category, e.name) for e in entries],
+                         [('progress', 'a'), ('rest', 'b'), ('rest', 'c')])
+        self.assertIsInstance(entries[0], NeedEntry)
+        self.assertTrue(more)
+
+        self.assertFalse(Database._need_page(resp, 1, 4)[1])
+        resp['total'] = 3
+        self.assertFalse(Database._need_page(resp, 1, 3)[1])
+        self.assertEqual(Database._need_page({}, 1, 3), ([], False))
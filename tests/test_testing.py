@@ -0,0 +1,158 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# >>
+#     Copyright (c) 2016-2017, Blake VandeMerwe
+#
+#       Permission is hereby granted, free of charge, to any person obtaining
+#       a copy of this software and associated documentation files
+#       (the "Software"), to deal in the Software without restriction,
+#       including without limitation the rights to use, copy, modify, merge,
+#       publish, distribute, sublicense, and/or sell copies of the Software,
+#       and to permit persons to whom the Software is furnished to do so, subject
+#       to the following conditions: The above copyright notice and this permission
+#       notice shall be included in all copies or substantial portions
+#       of the Software.
+#
+#     python-syncthing, 2016
+# <<
+from __future__ import unicode_literals
+
+import time
+import unittest
+import threading
+
+from syncthing import SyncthingError, NeedEntry
+from syncthing.testing import FakeSyncthing, normalize_device_id
+
+
+class TestFakeSyncthing(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeSyncthing(api_key='key', devices=4, files=60,
+                                 need=12).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+
+    def setUp(self):
+        self.s = self.fake.client()
+
+    def tearDown(self):
+        self.s.close()
+
+    def test_device_id(self):
+        valid = 'P56IOI7-MZJNU2Y-IQGDREY-DM2MGTI-MGL3BXN-PQ6W5BM-TBBZ4TJ-XZWICQ2'
+        self.assertEqual(normalize_device_id(valid.lower()), valid)
+        self.assertEqual(normalize_device_id(valid.replace('-', '')), valid)
+        with self.assertRaises(ValueError):
+            normalize_device_id(valid[:-1] + 'A')
+        for device in self.fake.devices:
+            self.assertEqual(self.s.misc.device_id(device), device)
+
+    def test_api_key(self):
+        with self.fake.client(api_key='wrong') as s:
+            with self.assertRaises(SyncthingError):
+                s.system.ping()
+        self.assertEqual(self.s.system.ping(), {'ping': 'pong'})
+
+    def test_completion_matrix(self):
+        matrix = self.s.db.completion_matrix()
+        self.assertEqual(sorted(matrix.devices), sorted(self.fake.devices))
+        self.assertEqual(sorted(matrix.folders), ['2vw2z-xwpvk', 'default'])
+        self.assertEqual(matrix.errors, {})
+        for device in self.fake.devices:
+            for folder in matrix.folders:
+                self.assertEqual(
+                    matrix.get(device, folder),
+                    self.s.db.completion(device, folder))
+
+    def test_iter_browse(self):
+        def flatten(entries, prefix=''):
+            for e in entries:
+                path = prefix + e['name']
+                if 'DIRECTORY' in e['type']:
+                    for f in flatten(e.get('children', []), path + '/'):
+                        yield f
+                else:
+                    yield path, e['modTime'], e['size']
+
+        tree = self.s.db.browse('default')
+        streamed = list(self.s.db.iter_browse('default', chunk_size=256))
+        self.assertEqual(len(streamed), 60)
+        self.assertEqual(sorted(streamed), sorted(flatten(tree)))
+
+        docs = list(self.s.db.iter_browse('default', prefix='docs'))
+        self.assertTrue(docs)
+        self.assertTrue(all(e.path.startswith('docs/') for e in docs))
+
+        top = self.s.db.browse('default', levels=0)
+        self.assertTrue(all('children' not in e for e in top))
+
+    def test_iter_need(self):
+        for prefetch in (True, False):
+            entries = list(self.s.db.iter_need('2vw2z-xwpvk', perpage=5,
+                                               prefetch=prefetch))
+            self.assertEqual(len(entries), 12)
+            self.assertIsInstance(entries[0], NeedEntry)
+            self.assertEqual([e.category for e in entries[:6]],
+                             ['progress'] + ['queued'] * 4 + ['rest'])
+            self.assertEqual(len(set(e.name for e in entries)), 12)
+
+    def test_scan(self):
+        folder = '2vw2z-xwpvk'
+        last_scan = self.s.stats.folder()[folder]['lastScan']
+        self.assertEqual(self.s.db.scan(folder, 'docs'), '')
+        self.assertGreater(self.s.stats.folder()[folder]['lastScan'],
+                           last_scan)
+        with self.assertRaises(SyncthingError):
+            self.s.db.scan('missing')
+
+    def test_typed(self):
+        status = self.s.system.status(typed=True)
+        self.assertEqual(status.my_id, self.fake.my_id)
+        self.assertEqual(status.start_time.tzinfo.utcoffset(None).seconds, 0)
+        self.assertEqual(self.s.db.status('default', typed=True).state, 'idle')
+
+    def test_failures(self):
+        self.fake.fail('/rest/system/version', status=503, times=2)
+        for _ in range(2):
+            with self.assertRaises(SyncthingError):
+                self.s.system.version()
+        self.assertIn('version', self.s.system.version())
+
+        self.fake.fail('/rest/system/version', status=None)
+        with self.assertRaises(SyncthingError):
+            self.s.system.version()
+        self.assertIn('version', self.s.system.version())
+
+    def test_latency(self):
+        self.fake.latency = 0.05
+        try:
+            started = time.monotonic()
+            self.s.system.ping()
+            self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        finally:
+            self.fake.latency = 0.0
+
+    def test_events(self):
+        events = self.s.events(filters=['ItemFinished'], timeout=5.0)
+        self.fake.emit('ItemFinished', {'folder': 'default', 'item': 'a'})
+        self.fake.emit('StateChanged', {'folder': 'default'})
+        self.fake.emit('ItemFinished', {'folder': 'default', 'item': 'b'})
+        items = []
+        for event in events:
+            items.append(event['data']['item'])
+            if len(items) == 2:
+                events.stop()
+        self.assertEqual(items, ['a', 'b'])
+
+        # long-polls wait for the next event
+        events = self.s.events(last_seen_id=events.last_seen_id, timeout=5.0)
+        started = time.monotonic()
+        threading.Timer(0.2, self.fake.emit,
+                        ('ItemFinished', {'item': 'c'})).start()
+        event = next(iter(events))
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertEqual(event['data'], {'item': 'c'})